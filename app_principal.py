@@ -1,16 +1,40 @@
-import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
+import os
+import threading
+
+# Con PERFIL_ARRANQUE=<ruta.json> se mide cada fase del arranque (ver perfil_arranque.py)
+import perfil_arranque
+
+if perfil_arranque.ACTIVO:
+    # Solo para medirlas por separado: los dashboards las importan igualmente
+    with perfil_arranque.fase('importar pandas/numpy/plotly'):
+        import numpy
+        import pandas
+        import plotly.graph_objects
+
+with perfil_arranque.fase('importar dash/flask'):
+    import dash
+    from dash import dcc, html
+    from dash.dependencies import Input, Output
+    from flask import Response, jsonify
+
+import cache
+import cache_respuestas
+import datos
+import metricas
+import registro_datos
 
 # Importa los módulos de los dashboards
-import dashboard_derivaciones
-import dashboard_eficiencia
-import dashboard_encuesta
+with perfil_arranque.fase('importar dashboards'):
+    import dashboard_derivaciones
+    import dashboard_eficiencia
+    import dashboard_tendencias
+    import dashboard_encuesta
 
 # Crea la aplicación principal de Dash
-app = dash.Dash(__name__, suppress_callback_exceptions=True)
-app.title = "Dashboard Principal"
-server = app.server
+with perfil_arranque.fase('crear app'):
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.title = "Dashboard Principal"
+    server = app.server
 
 # Define el layout principal con pestañas
 app.layout = html.Div(style={'backgroundColor': '#2c2c2c', 'margin': '0px', 'padding': '0px', 'height': '100vh'}, children=[
@@ -28,6 +52,12 @@ app.layout = html.Div(style={'backgroundColor': '#2c2c2c', 'margin': '0px', 'pad
             style={"fontFamily": "'Segoe UI', sans-serif", 'color': '#8F8E8E', 'backgroundColor': '#2c2c2c', 'padding': '10px 6px', 'border': '1px solid #2c2c2c', 'borderRadius': '1px'},
             selected_style={"fontFamily": "'Segoe UI', sans-serif", 'color': "#EFEFEF", 'backgroundColor': '#1a1a1a', 'padding': '10px 6px', 'margin': '0px 0px', 'fontWeight': 'bold', 'border': '1px solid #00FFFF', 'borderRadius': '18px'}
         ),
+        dcc.Tab(
+            label='| Tendencias por Intendencia |',
+            value='tab-tendencias',
+            style={"fontFamily": "'Segoe UI', sans-serif", 'color': '#8F8E8E', 'backgroundColor': '#2c2c2c', 'padding': '10px 6px', 'border': '1px solid #2c2c2c', 'borderRadius': '1px'},
+            selected_style={"fontFamily": "'Segoe UI', sans-serif", 'color': "#EFEFEF", 'backgroundColor': '#1a1a1a', 'padding': '10px 6px', 'margin': '0px 0px', 'fontWeight': 'bold', 'border': '1px solid #00FFFF', 'borderRadius': '18px'}
+        ),
         dcc.Tab(
             label='| Respuesta de Encuesta |',
             value='tab-encuesta',
@@ -39,9 +69,22 @@ app.layout = html.Div(style={'backgroundColor': '#2c2c2c', 'margin': '0px', 'pad
 ])
 
 # Registra los callbacks de cada dashboard
-dashboard_derivaciones.register_callbacks(app)
-dashboard_eficiencia.register_callbacks(app)
-dashboard_encuesta.register_callbacks(app)
+with perfil_arranque.fase('registrar callbacks'):
+    dashboard_derivaciones.register_callbacks(app)
+    dashboard_eficiencia.register_callbacks(app)
+    dashboard_tendencias.register_callbacks(app)
+    dashboard_encuesta.register_callbacks(app)
+
+# Los datos de cada pestaña se cargan la primera vez que se abre. Con
+# PRECARGAR_DATOS (p. ej. "derivaciones,eficiencia" o "todas") se cargan ya
+# en segundo plano, sin retrasar las primeras peticiones del worker.
+precarga = os.environ.get('PRECARGAR_DATOS', '').strip()
+if precarga:
+    nombres = None if precarga == 'todas' else [n.strip() for n in precarga.split(',') if n.strip()]
+    threading.Thread(target=registro_datos.precargar, args=(nombres,), name='precarga-datos', daemon=True).start()
+
+# Vigila los archivos de datos y recarga los que cambien (RECARGA_INTERVALO=0 lo desactiva)
+registro_datos.iniciar_vigilancia()
 
 # Callback para renderizar el contenido de la pestaña seleccionada
 @app.callback(Output('contenido-tab', 'children'),
@@ -51,9 +94,60 @@ def render_content(tab):
         return dashboard_derivaciones.get_layout()
     elif tab == 'tab-eficiencia':
         return dashboard_eficiencia.get_layout()
+    elif tab == 'tab-tendencias':
+        return dashboard_tendencias.get_layout()
     elif tab == 'tab-encuesta':
         return dashboard_encuesta.get_layout()
 
+# Latencia, llamadas, errores y tamaño de respuesta de cada callback de
+# servidor. Se instrumenta después de registrar todos los callbacks.
+metricas.instrumentar(app)
+
+@server.route('/metrics')
+def exponer_metricas():
+    return Response(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Respuestas de callbacks ya comprimidas por (entradas, versión de datos); ver cache_respuestas.py
+cache_respuestas.instalar(app)
+
+# Contadores de las cachés de figuras (aciertos, fallos, expulsiones)
+@server.route('/estado/caches')
+def estado_caches():
+    return jsonify(cache.estadisticas())
+
+# Versión vigente de cada fuente de datos
+@server.route('/estado/datos')
+def estado_datos():
+    return jsonify(registro_datos.versiones())
+
+# Filas leídas, válidas y rechazadas (con motivos) de la última lectura de cada CSV de eficiencia
+@server.route('/estado/ingesta')
+def estado_ingesta():
+    return jsonify({os.path.basename(ruta): datos.reporte_rechazos(ruta)
+                    for ruta in datos.expandir_rutas([dashboard_eficiencia.csv_path])})
+
+# En modo perfil se completa el arranque en el acto: carga de cada fuente y
+# primer render (índice, layout y pestaña inicial), y se escribe el reporte
+if perfil_arranque.ACTIVO:
+    for nombre in registro_datos.versiones():
+        with perfil_arranque.fase(f'cargar datos: {nombre}'):
+            registro_datos.obtener(nombre)
+
+    cliente = server.test_client()
+    with perfil_arranque.fase('primer render: index'):
+        cliente.get('/')
+    with perfil_arranque.fase('primer render: layout'):
+        cliente.get('/_dash-layout')
+    with perfil_arranque.fase('primer render: tab-derivaciones'):
+        cliente.post('/_dash-update-component', json={
+            'output': 'contenido-tab.children',
+            'outputs': {'id': 'contenido-tab', 'property': 'children'},
+            'inputs': [{'id': 'tabs-principal', 'property': 'value', 'value': 'tab-derivaciones'}],
+            'changedPropIds': ['tabs-principal.value'],
+            'state': []
+        })
+    perfil_arranque.escribir_reporte()
+
 # Ejecuta la aplicación
 if __name__ == '__main__':
     app.run(debug=True, port=8050)
\ No newline at end of file
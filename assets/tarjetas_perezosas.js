@@ -0,0 +1,37 @@
+// Carga perezosa de los gráficos de la encuesta (ver dashboard_encuesta.py).
+// El id de cada tarjeta .tarjeta-perezosa-encuesta es su id patrón de Dash
+// serializado ({"index": <posición de la pregunta>, "type": "tarjeta-encuesta"}). Cuando la
+// tarjeta entra en pantalla se pone en true su store 'visible-encuesta' y el
+// callback de la tarjeta pide el gráfico al servidor.
+(function () {
+    const CLASE = 'tarjeta-perezosa-encuesta';
+    // Dash usa el id como key de React: otra página son nodos nuevos
+    const observadas = new WeakSet();
+
+    const visibilidad = new IntersectionObserver(function (entradas) {
+        entradas.forEach(function (entrada) {
+            if (!entrada.isIntersecting) {
+                return;
+            }
+            visibilidad.unobserve(entrada.target);
+            let id;
+            try {
+                id = JSON.parse(entrada.target.id);
+            } catch (e) {
+                return;
+            }
+            window.dash_clientside.set_props({type: 'visible-encuesta', index: id.index}, {data: true});
+        });
+    }, {rootMargin: '200px 0px'});  // se pide un poco antes de que se vea
+
+    function observarTarjetas() {
+        document.querySelectorAll('.' + CLASE).forEach(function (tarjeta) {
+            if (!observadas.has(tarjeta)) {
+                observadas.add(tarjeta);
+                visibilidad.observe(tarjeta);
+            }
+        });
+    }
+
+    new MutationObserver(observarTarjetas).observe(document.documentElement, {childList: true, subtree: true});
+})();
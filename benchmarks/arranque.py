@@ -0,0 +1,116 @@
+"""
+Benchmark de arranque en frío: mide el tiempo hasta la primera respuesta
+correcta de un worker recién lanzado (índice + callback de la pestaña
+inicial). Con --max-segundos sirve como control antes de desplegar: termina
+con código 1 si la mediana supera el límite.
+
+Uso:
+    python benchmarks/arranque.py [--repeticiones 5] [--max-segundos 10] [--salida arranque.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PETICION_PESTANA = {
+    'output': 'contenido-tab.children',
+    'outputs': {'id': 'contenido-tab', 'property': 'children'},
+    'inputs': [{'id': 'tabs-principal', 'property': 'value', 'value': 'tab-derivaciones'}],
+    'changedPropIds': ['tabs-principal.value'],
+    'state': []
+}
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def comando_servidor(puerto, servidor):
+    if servidor == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-w', '1', '-b', f'127.0.0.1:{puerto}', 'app_principal:server']
+    return [sys.executable, '-c', f"import app_principal; app_principal.app.run(port={puerto}, debug=False)"]
+
+def responde(url, cuerpo=None):
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+    peticion = urllib.request.Request(url, data=datos, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(peticion, timeout=5) as r:
+            r.read()
+            return r.status == 200
+    except OSError:
+        return False
+
+def medir_arranque(servidor, limite_espera, con_perfil):
+    puerto = puerto_libre()
+    base = f'http://127.0.0.1:{puerto}'
+    entorno = {**os.environ, 'RECARGA_INTERVALO': '0'}
+    ruta_perfil = None
+    if con_perfil:
+        with tempfile.NamedTemporaryFile(suffix='.json', prefix='perfil_arranque_', delete=False) as f:
+            ruta_perfil = f.name
+        entorno['PERFIL_ARRANQUE'] = ruta_perfil
+
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando_servidor(puerto, servidor), cwd=RAIZ, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - inicio < limite_espera:
+            if proceso.poll() is not None:
+                raise RuntimeError(f"El servidor terminó con código {proceso.returncode}")
+            if responde(base + '/') and responde(base + '/_dash-update-component', PETICION_PESTANA):
+                resultado = {'segundos_primera_respuesta': round(time.perf_counter() - inicio, 4)}
+                if ruta_perfil and os.path.exists(ruta_perfil):
+                    with open(ruta_perfil, encoding='utf-8') as f:
+                        resultado['perfil'] = json.load(f)
+                    os.remove(ruta_perfil)
+                return resultado
+            time.sleep(0.02)
+        raise RuntimeError(f"Sin respuesta tras {limite_espera} s")
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--servidor', choices=['gunicorn', 'dash'], default='gunicorn')
+    parser.add_argument('--max-segundos', type=float, default=None,
+                        help='falla (código 1) si la mediana supera este valor')
+    parser.add_argument('--limite-espera', type=float, default=120)
+    parser.add_argument('--perfil', action='store_true',
+                        help='incluye el perfil por fases (PERFIL_ARRANQUE) de cada corrida')
+    parser.add_argument('--salida', default=None, help='ruta del reporte JSON (por defecto, stdout)')
+    args = parser.parse_args()
+
+    corridas = [medir_arranque(args.servidor, args.limite_espera, args.perfil) for _ in range(args.repeticiones)]
+    tiempos = [c['segundos_primera_respuesta'] for c in corridas]
+    reporte = {
+        'servidor': args.servidor,
+        'repeticiones': args.repeticiones,
+        'mediana_s': round(statistics.median(tiempos), 4),
+        'min_s': min(tiempos),
+        'max_s': max(tiempos),
+        'corridas': corridas
+    }
+
+    texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    if args.max_segundos is not None and reporte['mediana_s'] > args.max_segundos:
+        print(f"Arranque en frío de {reporte['mediana_s']} s supera el límite de {args.max_segundos} s", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
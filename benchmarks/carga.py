@@ -0,0 +1,372 @@
+"""
+Prueba de carga con usuarios concurrentes contra /_dash-update-component.
+Cada usuario simulado repite sesiones realistas (abre cada pestaña, pulsa
+botones de año, cambia los desplegables) durante --duracion segundos. El
+reporte incluye rendimiento, percentiles de latencia por callback, memoria
+residente de cada worker y los contadores de las cachés de figuras.
+
+Dos modos:
+  en-proceso  la aplicación se importa aquí y los usuarios son hilos que usan
+              el cliente de pruebas de Flask (sin red; un solo proceso).
+  gunicorn    se lanza un gunicorn local con --workers/--threads y los
+              usuarios hablan HTTP con conexiones persistentes.
+
+Uso:
+    python benchmarks/carga.py [--modo gunicorn] [--usuarios 30] [--duracion 30] [--workers 2] [--salida carga.json]
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from arranque import RAIZ, puerto_libre, responde
+from peticiones import (TARJETAS_EN_PANTALLA, componentes_de_layout, peticion_pestana, peticion_derivaciones, peticion_eficiencia,
+                        peticion_tendencias, peticion_pagina_encuesta, peticion_estadisticas_encuesta, peticion_grafico_encuesta, preguntas_de_pagina)
+
+RUTA_CALLBACKS = '/_dash-update-component'
+PERCENTILES = (50, 90, 95, 99)
+
+# =============================================
+# CLIENTES
+# =============================================
+class ClienteEnProceso:
+    def __init__(self, server):
+        self.cliente = server.test_client()
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        respuesta = self.cliente.open(ruta, method=metodo, json=cuerpo)
+        return respuesta.status_code, respuesta.get_data()
+
+class ClienteHTTP:
+    """Una conexión persistente por usuario, como un navegador con keep-alive."""
+    def __init__(self, puerto):
+        self.puerto = puerto
+        self.conexion = None
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+        # Como un navegador: acepta gzip (la caché de respuestas lo sirve ya comprimido)
+        cabeceras = {'Accept-Encoding': 'gzip'}
+        if datos is not None:
+            cabeceras['Content-Type'] = 'application/json'
+        for intento in range(2):
+            if self.conexion is None:
+                self.conexion = http.client.HTTPConnection('127.0.0.1', self.puerto, timeout=60)
+            try:
+                self.conexion.request(metodo, ruta, body=datos, headers=cabeceras)
+                respuesta = self.conexion.getresponse()
+                contenido = respuesta.read()
+                if respuesta.getheader('Content-Encoding') == 'gzip':
+                    contenido = gzip.decompress(contenido)
+                return respuesta.status, contenido
+            except (http.client.HTTPException, OSError):
+                # El worker pudo cerrar la conexión inactiva: se reintenta una vez
+                self.conexion.close()
+                self.conexion = None
+                if intento:
+                    raise
+
+# =============================================
+# SESIÓN DE UN USUARIO
+# =============================================
+class Usuario:
+    def __init__(self, cliente, semilla, pausa_media):
+        self.cliente = cliente
+        self.rng = random.Random(semilla)
+        self.pausa_media = pausa_media
+        self.registros = []
+
+    def pedir(self, etiqueta, cuerpo):
+        inicio = time.perf_counter()
+        try:
+            estado, contenido = self.cliente.pedir('POST', RUTA_CALLBACKS, cuerpo)
+        except (http.client.HTTPException, OSError):
+            estado, contenido = 0, b''
+        self.registros.append((etiqueta, time.perf_counter() - inicio, estado, len(contenido)))
+        return json.loads(contenido) if estado == 200 else None
+
+    def pausar(self):
+        if self.pausa_media > 0:
+            time.sleep(self.rng.expovariate(1 / self.pausa_media))
+
+    def abrir_pestana(self, tab):
+        respuesta = self.pedir('render_content', peticion_pestana(tab))
+        self.pausar()
+        if respuesta is None:
+            return None
+        return componentes_de_layout(respuesta['response']['contenido-tab']['children'])
+
+    def sesion(self):
+        rng = self.rng
+
+        # --- Derivaciones: disparo inicial, varios años y a veces el grupo ---
+        props = self.abrir_pestana('tab-derivaciones')
+        if props is not None:
+            anios = [b['id']['index'] for b in props.get('btn-anio-derivaciones', [])]
+            anio = props['store-selected-year-derivaciones'].get('data')
+            grupo = props['filtro-intendencia-grupo']['value']
+            self.pedir('actualizar_analisis_derivaciones', peticion_derivaciones(anio, grupo))
+            for _ in range(rng.randint(2, 6)):
+                self.pausar()
+                if anios:
+                    anio = rng.choice(anios)
+                    self.pedir('actualizar_analisis_derivaciones', peticion_derivaciones(anio, grupo, 'store-selected-year-derivaciones.data'))
+                if rng.random() < 0.3:
+                    grupo = 'REGIONALES' if grupo == 'TODAS' else 'TODAS'
+                    self.pedir('actualizar_analisis_derivaciones', peticion_derivaciones(anio, grupo))
+
+        # --- Eficiencia: selección inicial y algunos subconjuntos de años ---
+        props = self.abrir_pestana('tab-eficiencia')
+        if props is not None:
+            filtro = props['filtro-anio']
+            opciones = [o['value'] for o in filtro.get('options', [])]
+            self.pedir('actualizar_graficos', peticion_eficiencia(filtro.get('value')))
+            for _ in range(rng.randint(1, 4)):
+                self.pausar()
+                seleccion = sorted(rng.sample(opciones, rng.randint(1, len(opciones)))) if opciones else []
+                self.pedir('actualizar_graficos', peticion_eficiencia(seleccion))
+
+        # --- Tendencias: disparo inicial y algunas métricas o años ---
+        props = self.abrir_pestana('tab-tendencias')
+        if props is not None:
+            anios = [o['value'] for o in props['dropdown-anio-tendencias'].get('options', [])]
+            metricas = [o['value'] for o in props['dropdown-metrica-tendencias'].get('options', [])]
+            anio = props['dropdown-anio-tendencias'].get('value')
+            metrica = props['dropdown-metrica-tendencias'].get('value')
+            self.pedir('actualizar_tendencias', peticion_tendencias(anio, metrica))
+            for _ in range(rng.randint(1, 3)):
+                self.pausar()
+                if anios and rng.random() < 0.5:
+                    anio = rng.choice(anios)
+                    self.pedir('actualizar_tendencias', peticion_tendencias(anio, metrica, 'dropdown-anio-tendencias.value'))
+                elif metricas:
+                    metrica = rng.choice(metricas)
+                    self.pedir('actualizar_tendencias', peticion_tendencias(anio, metrica))
+
+        # --- Encuesta: una página, las tarjetas que se ven, desplazamiento, grupo y otras páginas ---
+        props = self.abrir_pestana('tab-encuesta')
+        if props is not None:
+            desplegable = props['dropdown-filter-encuesta']
+            grupos = [o['value'] if isinstance(o, dict) else o for o in desplegable.get('options', [])]
+            grupo = desplegable.get('value')
+            paginas = [o['value'] for o in props['dropdown-pagina-encuesta'].get('options', [])]
+            self.pedir('actualizar_estadisticas_encuesta', peticion_estadisticas_encuesta(grupo))
+            pendientes = self.abrir_pagina_encuesta(props['dropdown-pagina-encuesta'].get('value'))
+            vistas = self.ver_tarjetas(pendientes, TARJETAS_EN_PANTALLA, grupo)
+            for _ in range(rng.randint(1, 4)):
+                self.pausar()
+                accion = rng.random()
+                if accion < 0.4 and pendientes:
+                    vistas += self.ver_tarjetas(pendientes, rng.randint(1, TARJETAS_EN_PANTALLA), grupo)
+                elif accion < 0.7 and grupos:
+                    # Las tarjetas ya vistas se vuelven a pedir con el filtro nuevo
+                    grupo = rng.choice(grupos)
+                    self.pedir('actualizar_estadisticas_encuesta', peticion_estadisticas_encuesta(grupo))
+                    self.ver_tarjetas(list(vistas), len(vistas), grupo)
+                elif paginas:
+                    pendientes = self.abrir_pagina_encuesta(rng.choice(paginas))
+                    vistas = self.ver_tarjetas(pendientes, TARJETAS_EN_PANTALLA, grupo)
+
+    def abrir_pagina_encuesta(self, pagina):
+        """Posiciones de las preguntas de la página (sus tarjetas llegan vacías)."""
+        respuesta = self.pedir('mostrar_pagina_encuesta', peticion_pagina_encuesta(pagina))
+        return preguntas_de_pagina(respuesta) if respuesta is not None else []
+
+    def ver_tarjetas(self, pendientes, cuantas, grupo):
+        """Las siguientes tarjetas entran en pantalla y piden su gráfico; se quitan de pendientes."""
+        vistas = pendientes[:cuantas]
+        del pendientes[:cuantas]
+        for posicion in vistas:
+            self.pedir('actualizar_grafico_encuesta', peticion_grafico_encuesta(posicion, grupo))
+        return vistas
+
+    def correr(self, limite):
+        while time.perf_counter() < limite:
+            self.sesion()
+
+# =============================================
+# MEMORIA DE LOS WORKERS (/proc, solo Linux)
+# =============================================
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def hijos(pid):
+    encontrados = []
+    for entrada in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entrada}/stat') as f:
+                # El nombre del proceso va entre paréntesis y puede tener espacios
+                campos = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(campos[1]) == pid:
+            encontrados.append(int(entrada))
+    return encontrados
+
+def muestrear_memoria(procesos, muestras, detener, intervalo=0.5):
+    while True:
+        for rol, pid in procesos():
+            rss = rss_mb(pid)
+            if rss is not None:
+                muestras.setdefault((rol, pid), []).append(rss)
+        if detener.wait(intervalo):
+            return
+
+# =============================================
+# REPORTE
+# =============================================
+def resumen_latencias(latencias):
+    ms = np.asarray(latencias) * 1000
+    resumen = {f'p{p}': round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))}
+    resumen['media'] = round(float(ms.mean()), 3)
+    resumen['max'] = round(float(ms.max()), 3)
+    return resumen
+
+def armar_reporte(registros, segundos):
+    correctos = [r for r in registros if r[2] == 200]
+    reporte = {
+        'peticiones': len(registros),
+        'errores': len(registros) - len(correctos),
+        'segundos': round(segundos, 3),
+        'rendimiento_rps': round(len(registros) / segundos, 2) if segundos > 0 else None,
+        'latencia_ms': resumen_latencias([r[1] for r in correctos]) if correctos else None,
+        'por_callback': {}
+    }
+    for etiqueta in sorted({r[0] for r in registros}):
+        propios = [r for r in registros if r[0] == etiqueta]
+        buenos = [r for r in propios if r[2] == 200]
+        reporte['por_callback'][etiqueta] = {
+            'peticiones': len(propios),
+            'errores': len(propios) - len(buenos),
+            'latencia_ms': resumen_latencias([r[1] for r in buenos]) if buenos else None,
+            'bytes_medio': round(float(np.mean([r[3] for r in buenos])), 1) if buenos else None
+        }
+    return reporte
+
+# =============================================
+# EJECUCIÓN
+# =============================================
+def correr_usuarios(crear_cliente, args):
+    usuarios = [Usuario(crear_cliente(), args.semilla + i, args.pausa) for i in range(args.usuarios)]
+    limite = time.perf_counter() + args.duracion
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=u.correr, args=(limite,), name=f'usuario-{i}') for i, u in enumerate(usuarios)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    segundos = time.perf_counter() - inicio
+    return [r for u in usuarios for r in u.registros], segundos
+
+def ejecutar_en_proceso(args):
+    sys.path.insert(0, RAIZ)
+    import app_principal
+    procesos = lambda: [('proceso', os.getpid())]
+    return ejecutar(lambda: ClienteEnProceso(app_principal.server), procesos, args)
+
+def ejecutar_gunicorn(args, entorno):
+    puerto = puerto_libre()
+    comando = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '--threads', str(args.threads),
+               '-b', f'127.0.0.1:{puerto}', '--timeout', '120', 'app_principal:server']
+    proceso = subprocess.Popen(comando, cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limite_espera = time.perf_counter() + 120
+        while not responde(f'http://127.0.0.1:{puerto}/'):
+            if proceso.poll() is not None:
+                raise RuntimeError(f"gunicorn terminó con código {proceso.returncode}")
+            if time.perf_counter() > limite_espera:
+                raise RuntimeError("gunicorn no respondió en 120 s")
+            time.sleep(0.1)
+        procesos = lambda: [('maestro', proceso.pid)] + [('worker', pid) for pid in hijos(proceso.pid)]
+        return ejecutar(lambda: ClienteHTTP(puerto), procesos, args)
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=30)
+
+def ejecutar(crear_cliente, procesos, args):
+    muestras = {}
+    detener = threading.Event()
+    muestreo = threading.Thread(target=muestrear_memoria, args=(procesos, muestras, detener), daemon=True)
+    muestreo.start()
+    try:
+        registros, segundos = correr_usuarios(crear_cliente, args)
+    finally:
+        detener.set()
+        muestreo.join()
+
+    reporte = armar_reporte(registros, segundos)
+    reporte['memoria_mb'] = [
+        {'rol': rol, 'pid': pid, 'rss_inicial': round(serie[0], 1), 'rss_max': round(max(serie), 1), 'rss_final': round(serie[-1], 1)}
+        for (rol, pid), serie in sorted(muestras.items(), key=lambda m: m[0][1])
+    ]
+    # Con varios workers, esto es lo de aquel que atienda la petición
+    estado, contenido = crear_cliente().pedir('GET', '/estado/caches')
+    reporte['caches_un_worker'] = json.loads(contenido) if estado == 200 else None
+    return reporte
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modo', choices=['en-proceso', 'gunicorn'], default='gunicorn')
+    parser.add_argument('--usuarios', type=int, default=30)
+    parser.add_argument('--duracion', type=float, default=30, help='segundos de carga')
+    parser.add_argument('--pausa', type=float, default=0.5,
+                        help='pausa media entre clics en segundos (exponencial); 0 = sin pausas')
+    parser.add_argument('--workers', type=int, default=2, help='solo en modo gunicorn')
+    parser.add_argument('--threads', type=int, default=1, help='hilos por worker, solo en modo gunicorn')
+    parser.add_argument('--tamano-cache', type=int, default=None,
+                        help='CACHE_FIGURAS_TAMANO para la corrida (0 desactiva las cachés de figuras)')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default=None, help='ruta del reporte JSON (por defecto, stdout)')
+    args = parser.parse_args()
+
+    # Las variables se fijan antes de importar o lanzar la aplicación
+    entorno = {**os.environ, 'RECARGA_INTERVALO': '0'}
+    if args.tamano_cache is not None:
+        entorno['CACHE_FIGURAS_TAMANO'] = str(args.tamano_cache)
+
+    if args.modo == 'en-proceso':
+        os.environ.update(entorno)
+        reporte = ejecutar_en_proceso(args)
+    else:
+        reporte = ejecutar_gunicorn(args, entorno)
+
+    reporte = {
+        'modo': args.modo,
+        'usuarios': args.usuarios,
+        'duracion_s': args.duracion,
+        'pausa_media_s': args.pausa,
+        'workers': args.workers if args.modo == 'gunicorn' else 1,
+        'threads': args.threads if args.modo == 'gunicorn' else args.usuarios,
+        'tamano_cache': args.tamano_cache,
+        **reporte
+    }
+    latencia = reporte['latencia_ms'] or {}
+    print(f"{reporte['peticiones']} peticiones, {reporte['errores']} errores, {reporte['rendimiento_rps']} pet/s, "
+          f"p50 {latencia.get('p50')} ms, p95 {latencia.get('p95')} ms", file=sys.stderr)
+
+    texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+if __name__ == '__main__':
+    main()
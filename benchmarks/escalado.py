@@ -0,0 +1,244 @@
+"""
+Benchmark de escalado: genera datos sintéticos de varios tamaños (ver
+generadores.py) y mide, para cada tamaño, la lectura de los archivos, la
+preparación de los datos derivados de cada dashboard, los constructores de
+figuras y los callbacks principales (en frío, con las cachés vacías, y con
+la caché de figuras ya llena). El reporte JSON sirve para comparar corridas.
+
+Uso:
+    python benchmarks/escalado.py [--escalas pequeno,mediano,grande] [--repeticiones 5] [--salida escalado.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# Sin vigilante de archivos: las fuentes se registran a mano más abajo
+os.environ.setdefault('RECARGA_INTERVALO', '0')
+
+import numpy as np
+import pandas as pd
+import plotly
+import dash
+
+import app_principal
+import cache
+import dashboard_derivaciones
+import dashboard_eficiencia
+import dashboard_encuesta
+import dashboard_tendencias
+import datos
+import registro_datos
+import generadores
+from peticiones import (peticion_pestana, peticion_derivaciones, peticion_eficiencia, peticion_tendencias, peticion_pagina_encuesta,
+                        peticion_estadisticas_encuesta, peticion_grafico_encuesta)
+
+# Eficiencia: intendencias x años (x meses). Encuesta: respuestas x preguntas.
+ESCALAS = {
+    'pequeno': {
+        'eficiencia': {'num_intendencias': 50, 'num_anios': 6, 'mensual': False},
+        'encuesta': {'num_respuestas': 1_000, 'num_preguntas': 20}
+    },
+    'mediano': {
+        'eficiencia': {'num_intendencias': 500, 'num_anios': 12, 'mensual': True},
+        'encuesta': {'num_respuestas': 4_000, 'num_preguntas': 50}
+    },
+    'grande': {
+        'eficiencia': {'num_intendencias': 2_000, 'num_anios': 30, 'mensual': True},
+        'encuesta': {'num_respuestas': 100_000, 'num_preguntas': 200}
+    }
+}
+
+def medir(funcion, repeticiones, preparar=None):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'mediana_s': round(statistics.median(tiempos), 6),
+        'min_s': round(min(tiempos), 6),
+        'max_s': round(max(tiempos), 6)
+    }, resultado
+
+def borrar_sidecar(ruta):
+    try:
+        os.remove(datos.ruta_sidecar(ruta))
+    except FileNotFoundError:
+        pass
+
+def medir_callback(cliente, cuerpo, repeticiones):
+    def enviar():
+        respuesta = cliente.post('/_dash-update-component', json=cuerpo)
+        if respuesta.status_code != 200:
+            raise RuntimeError(f"{cuerpo['output']}: HTTP {respuesta.status_code}")
+        return len(respuesta.get_data())
+    en_frio, tamano = medir(enviar, repeticiones, preparar=cache.limpiar_todas)
+    con_cache, _ = medir(enviar, repeticiones)
+    return {'en_frio': en_frio, 'con_cache': con_cache, 'bytes_respuesta': tamano}
+
+# =============================================
+# MEDICIONES POR ESCALA
+# =============================================
+def medir_escala(nombre, parametros, directorio, repeticiones, max_celdas_excel):
+    resultado = {'parametros': parametros}
+
+    # --- Eficiencia (CSV compartido por derivaciones y eficiencia) ---
+    df_eficiencia = generadores.generar_eficiencia(**parametros['eficiencia'])
+    ruta_csv = generadores.escribir_eficiencia(df_eficiencia, os.path.join(directorio, f'eficiencia_{nombre}.csv'))
+    lectura = {
+        'filas': len(df_eficiencia),
+        'bytes_archivo': os.path.getsize(ruta_csv),
+        'parsear_eficiencia': medir(lambda: datos.parsear_eficiencia(ruta_csv), repeticiones)[0],
+        'leer_con_sidecar_sin_sidecar': medir(lambda: datos.leer_con_sidecar(ruta_csv, datos.parsear_eficiencia), repeticiones,
+                                              preparar=lambda: borrar_sidecar(ruta_csv))[0],
+        'leer_con_sidecar_valido': medir(lambda: datos.leer_con_sidecar(ruta_csv, datos.parsear_eficiencia), repeticiones)[0]
+    }
+    resultado['lectura_eficiencia'] = lectura
+
+    # --- Encuesta: el Excel solo si no es demasiado grande para openpyxl ---
+    df_encuesta = generadores.generar_encuesta(**parametros['encuesta'])
+    celdas = df_encuesta.size
+    lectura = {'filas': len(df_encuesta), 'celdas': celdas}
+    if celdas <= max_celdas_excel:
+        ruta_xlsx = generadores.escribir_encuesta(df_encuesta, os.path.join(directorio, f'encuesta_{nombre}.xlsx'))
+        lectura['bytes_archivo'] = os.path.getsize(ruta_xlsx)
+        lectura['parsear_encuesta'] = medir(lambda: datos.parsear_encuesta(ruta_xlsx), repeticiones)[0]
+        datos.leer_encuesta(ruta_xlsx)
+        lectura['leer_encuesta_sidecar_valido'] = medir(lambda: datos.leer_encuesta(ruta_xlsx), repeticiones)[0]
+    else:
+        lectura['parsear_encuesta'] = f'omitido: {celdas} celdas > --max-celdas-excel {max_celdas_excel}'
+    # El costo de leer el sidecar no depende del formato de origen: se mide
+    # sobre un CSV con los mismos datos para que sirva en cualquier tamaño
+    ruta_csv_encuesta = os.path.join(directorio, f'encuesta_{nombre}.csv')
+    df_encuesta.to_csv(ruta_csv_encuesta, index=False)
+    datos.leer_con_sidecar(ruta_csv_encuesta, lambda r: df_encuesta)
+    lectura['leer_con_sidecar_valido'] = medir(lambda: datos.leer_con_sidecar(ruta_csv_encuesta, lambda r: df_encuesta), repeticiones)[0]
+    resultado['lectura_encuesta'] = lectura
+
+    # --- Datos derivados de cada dashboard ---
+    resultado['preparacion'] = {
+        'derivaciones.cargar_datos': medir(lambda: dashboard_derivaciones.cargar_datos([ruta_csv]), repeticiones)[0],
+        'eficiencia.cargar_datos': medir(lambda: dashboard_eficiencia.cargar_datos([ruta_csv]), repeticiones)[0],
+        'tendencias.cargar_datos': medir(lambda: dashboard_tendencias.cargar_datos([ruta_csv]), repeticiones)[0],
+        'encuesta.preparar_datos': medir(lambda: dashboard_encuesta.preparar_datos(df_encuesta), repeticiones)[0]
+    }
+
+    # Las fuentes de la aplicación pasan a apuntar a los datos sintéticos
+    registro_datos.registrar('derivaciones', [ruta_csv], dashboard_derivaciones.cargar_datos, dashboard_derivaciones.DATOS_VACIOS)
+    registro_datos.registrar('eficiencia', [ruta_csv], dashboard_eficiencia.cargar_datos, dashboard_eficiencia.DATOS_VACIOS)
+    registro_datos.registrar('tendencias', [ruta_csv], dashboard_tendencias.cargar_datos, dashboard_tendencias.DATOS_VACIOS)
+    registro_datos.registrar('encuesta', [ruta_csv_encuesta], lambda rutas: dashboard_encuesta.preparar_datos(df_encuesta), dashboard_encuesta.DATOS_VACIOS)
+    registro_datos.precargar()
+    cache.limpiar_todas()
+
+    # --- Constructores de figuras ---
+    datos_derivaciones = registro_datos.obtener('derivaciones').datos
+    anio = datos_derivaciones['anios_filtrables'][0]
+    celda = datos_derivaciones['cubo'][(int(anio), 'TODAS')]
+    datos_eficiencia = registro_datos.obtener('eficiencia').datos
+    todos_los_anios = (1 << len(datos_eficiencia['matriz_heatmap']['anios'])) - 1
+    datos_tendencias = registro_datos.obtener('tendencias').datos
+    indice = registro_datos.obtener('encuesta').datos['indice_respuestas']
+    pregunta = max(indice['preguntas'], key=lambda col: len(indice['preguntas'][col]['respuestas']))
+    posicion = registro_datos.obtener('encuesta').datos['columnas_graficables'].index(pregunta)
+    todos = dashboard_encuesta.mascara_encuestados(indice, dashboard_encuesta.TODAS)
+    # Filtro cruzado: la respuesta más frecuente de otra pregunta, más grupo e IRE
+    otra = next(col for col in indice['preguntas'] if col != pregunta)
+    respuestas_otra, conteos_otra = dashboard_encuesta.conteos_pregunta(indice, otra, todos)
+    filtros = {otra: {respuestas_otra[-1]}}
+    grupo = generadores.GRUPOS_EFICIENCIA[0]
+    ires = indice['ires'][:max(1, len(indice['ires']) // 2)]
+    resultado['figuras'] = {
+        'crear_grafico_derivaciones': medir(lambda: dashboard_derivaciones.crear_grafico_derivaciones(
+            celda['df_agg'], celda['df_comparacion_agg'], celda['df_2025_agg'], anio, celda['nombre_anio_comparacion']).to_dict(), repeticiones)[0],
+        'calcular_resultados_eficiencia': medir(lambda: dashboard_eficiencia.calcular_resultados(datos_eficiencia, todos_los_anios), repeticiones)[0],
+        'crear_grafico_barras_horizontales': medir(lambda: dashboard_encuesta.crear_grafico_barras_horizontales(
+            *dashboard_encuesta.conteos_pregunta(indice, pregunta, todos), pregunta), repeticiones)[0],
+        'conteos_pregunta[filtro cruzado]': medir(lambda: dashboard_encuesta.conteos_pregunta(
+            indice, pregunta, dashboard_encuesta.mascara_encuestados(indice, grupo, ires, filtros)), repeticiones)[0]
+    }
+
+    # --- Callbacks, de punta a punta por HTTP (incluye serialización) ---
+    cliente = app_principal.server.test_client()
+    anios_eficiencia = datos_eficiencia['anios_filtrables']
+    resultado['callbacks'] = {
+        'render_content[tab-derivaciones]': medir_callback(cliente, peticion_pestana('tab-derivaciones'), repeticiones),
+        'render_content[tab-eficiencia]': medir_callback(cliente, peticion_pestana('tab-eficiencia'), repeticiones),
+        'render_content[tab-tendencias]': medir_callback(cliente, peticion_pestana('tab-tendencias'), repeticiones),
+        'render_content[tab-encuesta]': medir_callback(cliente, peticion_pestana('tab-encuesta'), repeticiones),
+        'actualizar_analisis_derivaciones[TODAS]': medir_callback(cliente, peticion_derivaciones(int(anio), 'TODAS'), repeticiones),
+        'actualizar_analisis_derivaciones[REGIONALES]': medir_callback(cliente, peticion_derivaciones(int(anio), 'REGIONALES'), repeticiones),
+        'actualizar_graficos[todos los años]': medir_callback(cliente, peticion_eficiencia([int(a) for a in anios_eficiencia]), repeticiones),
+        'actualizar_graficos[un año]': medir_callback(cliente, peticion_eficiencia([int(anios_eficiencia[0])]), repeticiones),
+        'actualizar_tendencias[delta_eficiencia]': medir_callback(cliente, peticion_tendencias(
+            datos_tendencias['anio_inicial'], dashboard_tendencias.METRICA_INICIAL), repeticiones),
+        'actualizar_tendencias[cagr_cancelados]': medir_callback(cliente, peticion_tendencias(
+            datos_tendencias['anio_inicial'], 'cagr_cancelados'), repeticiones),
+        'mostrar_pagina_encuesta[primera]': medir_callback(cliente, peticion_pagina_encuesta(0), repeticiones),
+        'actualizar_estadisticas_encuesta[filtro cruzado]': medir_callback(cliente, peticion_estadisticas_encuesta(
+            grupo, 'dropdown-respuestas-encuesta.value', ires=ires, respuestas=[(otra, respuestas_otra[-1])]), repeticiones),
+        'actualizar_grafico_encuesta[todas]': medir_callback(cliente, peticion_grafico_encuesta(posicion, dashboard_encuesta.TODAS), repeticiones),
+        'actualizar_grafico_encuesta[filtro cruzado]': medir_callback(cliente, peticion_grafico_encuesta(
+            posicion, grupo, ires=ires, respuestas=[(otra, respuestas_otra[-1])]), repeticiones)
+    }
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', default=','.join(ESCALAS), help=f'subconjunto de {", ".join(ESCALAS)}')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--max-celdas-excel', type=int, default=250_000,
+                        help='no se escribe ni se mide el Excel de encuestas más grandes que esto')
+    parser.add_argument('--directorio', default=None, help='dónde dejar los archivos generados (por defecto, uno temporal que se borra)')
+    parser.add_argument('--salida', default=None, help='ruta del reporte JSON (por defecto, stdout)')
+    args = parser.parse_args()
+
+    escalas = [e.strip() for e in args.escalas.split(',') if e.strip()]
+    desconocidas = [e for e in escalas if e not in ESCALAS]
+    if desconocidas:
+        parser.error(f"Escalas desconocidas: {', '.join(desconocidas)}")
+
+    directorio = args.directorio or tempfile.mkdtemp(prefix='escalado_')
+    os.makedirs(directorio, exist_ok=True)
+    try:
+        resultados = {}
+        for nombre in escalas:
+            print(f"Midiendo escala '{nombre}'...", file=sys.stderr)
+            resultados[nombre] = medir_escala(nombre, ESCALAS[nombre], directorio, args.repeticiones, args.max_celdas_excel)
+    finally:
+        if args.directorio is None:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    reporte = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'entorno': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+            'dash': dash.__version__
+        },
+        'repeticiones': args.repeticiones,
+        'escalas': resultados
+    }
+
+    texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Generadores de datos sintéticos con la misma forma que los archivos reales:
+el CSV de eficiencia (INTENDENCIA;ANIO;NUMERADOR;DENOMINADOR;EFICIENCIA, con
+MES opcional para filas mensuales) y la encuesta (IRE, grupo_eficiencia y
+una columna por pregunta). Son deterministas para una misma semilla.
+"""
+import numpy as np
+import pandas as pd
+
+GRUPOS_EFICIENCIA = ['mayor a Linea Base', 'menor a Linea Base']
+
+def nombres_intendencias(num_intendencias):
+    # 'ILM' siempre está: el grupo REGIONALES de derivaciones la excluye
+    return ['ILM'] + [f'I{i:04d}' for i in range(1, num_intendencias)]
+
+def generar_eficiencia(num_intendencias, num_anios, mensual=False, anio_inicial=2020, semilla=0):
+    """
+    Panel intendencia x año (x mes). Los años empiezan en 2020 porque el
+    parser descarta los anteriores; los dashboards tratan 2025 como año en
+    curso, así que conviene que num_anios >= 6.
+    """
+    rng = np.random.default_rng(semilla)
+    intendencias = np.array(nombres_intendencias(num_intendencias))
+    anios = np.arange(anio_inicial, anio_inicial + num_anios)
+    meses = np.arange(1, 13) if mensual else np.array([0])
+
+    # Tamaño de cada intendencia estable entre años, con ruido por periodo
+    escala = rng.lognormal(mean=6.5, sigma=1.0, size=len(intendencias)) / len(meses)
+    idx_int, idx_anio, idx_mes = np.meshgrid(np.arange(len(intendencias)), np.arange(len(anios)), np.arange(len(meses)), indexing='ij')
+    idx_int, idx_anio, idx_mes = idx_int.ravel(), idx_anio.ravel(), idx_mes.ravel()
+
+    denominador = np.maximum(1, rng.poisson(escala[idx_int] * rng.uniform(0.6, 1.4, size=len(idx_int))))
+    numerador = rng.binomial(denominador, rng.beta(2, 18, size=len(idx_int)))
+    df = pd.DataFrame({
+        'INTENDENCIA': intendencias[idx_int],
+        'ANIO': anios[idx_anio],
+        'NUMERADOR': numerador,
+        'DENOMINADOR': denominador,
+        'EFICIENCIA': np.round(numerador / denominador * 100, 1)
+    })
+    if mensual:
+        df.insert(2, 'MES', meses[idx_mes])
+    return df
+
+def escribir_eficiencia(df, ruta_csv):
+    df.to_csv(ruta_csv, sep=';', encoding='latin1', index=False)
+    return ruta_csv
+
+def generar_encuesta(num_respuestas, num_preguntas, num_ires=None, semilla=0):
+    """
+    Encuesta con num_preguntas columnas categóricas de 3 a 8 alternativas y
+    algunas respuestas vacías. Devuelve el DataFrame ya con tipos category,
+    como lo deja datos.parsear_encuesta.
+    """
+    rng = np.random.default_rng(semilla)
+    num_ires = num_ires or max(1, min(num_respuestas, 200))
+    ires = np.array([f'IRE{i:03d}' for i in range(num_ires)])
+
+    # Cada IRE pertenece a un grupo; unos pocos quedan sin grupo
+    grupo_ire = rng.integers(-1, len(GRUPOS_EFICIENCIA), size=num_ires)
+    codigos_ire = rng.integers(0, num_ires, size=num_respuestas)
+    columnas = {
+        'IRE': pd.Categorical.from_codes(codigos_ire, categories=ires),
+        'grupo_eficiencia': pd.Categorical.from_codes(grupo_ire[codigos_ire], categories=GRUPOS_EFICIENCIA)
+    }
+    for p in range(num_preguntas):
+        num_alternativas = int(rng.integers(3, 9))
+        alternativas = [f'Alternativa {a + 1} de la pregunta {p + 1}' for a in range(num_alternativas)]
+        pesos = rng.dirichlet(np.ones(num_alternativas))
+        codigos = rng.choice(num_alternativas, size=num_respuestas, p=pesos)
+        codigos[rng.random(num_respuestas) < 0.03] = -1
+        columnas[f'{p + 1:03d} Pregunta sintética {p + 1}'] = pd.Categorical.from_codes(codigos, categories=alternativas)
+    return pd.DataFrame(columnas)
+
+def escribir_encuesta(df, ruta_xlsx):
+    # openpyxl escribe unas 30 mil celdas por segundo: solo para tamaños moderados
+    df.to_excel(ruta_xlsx, index=False)
+    return ruta_xlsx
@@ -0,0 +1,196 @@
+"""
+Memoria de cada proceso de gunicorn con los datos ya cargados. Se lanza un
+gunicorn local con PRECARGAR_DATOS=todas, se abre cada pestaña varias veces
+(para que todos los workers atiendan alguna) y, cuando la memoria deja de
+moverse, se lee /proc/<pid>/smaps_rollup del maestro y de cada worker:
+
+  rss         memoria residente; cada página compartida cuenta entera
+  pss         parte proporcional: una página compartida por N procesos cuenta 1/N
+  compartida  páginas que el proceso comparte con otros (p. ej. sidecars mapeados)
+  privada     páginas propias del proceso
+
+La suma de PSS es la memoria que ocupa de verdad el servicio. Con
+--sinteticos se mide una copia de la aplicación con datos generados (ver
+generadores.py), más grandes que los reales. Con --aplicacion se mide otro
+árbol (p. ej. un checkout de otra rama) y con --comparar <reporte.json> se
+agregan los valores de una corrida anterior. Solo Linux (usa /proc).
+
+Uso:
+    python benchmarks/memoria_workers.py [--workers 4] [--preload] [--sinteticos] [--salida memoria.json] [--comparar antes.json]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from arranque import RAIZ, puerto_libre, responde
+from carga import hijos
+import generadores
+from peticiones import componentes_de_layout, peticion_pestana, peticiones_iniciales
+
+PESTANAS = ['tab-derivaciones', 'tab-eficiencia', 'tab-tendencias', 'tab-encuesta']
+ARCHIVO_EFICIENCIA = 'Eficiencia_cobranzaNC_2020-2025.csv'
+ARCHIVO_ENCUESTA = 'limpieza encuesta_cnc.xlsx'
+CAMPOS_SMAPS = {
+    'Rss': 'rss', 'Pss': 'pss',
+    'Shared_Clean': 'compartida', 'Shared_Dirty': 'compartida',
+    'Private_Clean': 'privada', 'Private_Dirty': 'privada'
+}
+
+# =============================================
+# MEMORIA POR PROCESO
+# =============================================
+def memoria(pid):
+    """MB de rss, pss, compartida y privada del proceso."""
+    valores = dict.fromkeys(['rss', 'pss', 'compartida', 'privada'], 0.0)
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linea in f:
+            partes = linea.split()
+            if partes and partes[0].rstrip(':') in CAMPOS_SMAPS:
+                valores[CAMPOS_SMAPS[partes[0].rstrip(':')]] += int(partes[1]) / 1024
+    return {clave: round(valor, 1) for clave, valor in valores.items()}
+
+def esperar_estable(pids, tolerancia_mb=1.0, muestras=4, intervalo=0.5, limite_s=120):
+    """Espera a que la memoria total de pids deje de variar más de tolerancia_mb."""
+    historial = []
+    limite = time.perf_counter() + limite_s
+    while time.perf_counter() < limite:
+        historial.append(sum(memoria(pid)['rss'] for pid in pids))
+        if len(historial) >= muestras and max(historial[-muestras:]) - min(historial[-muestras:]) <= tolerancia_mb:
+            return True
+        time.sleep(intervalo)
+    return False
+
+# =============================================
+# APLICACIÓN A MEDIR
+# =============================================
+def copiar_con_sinteticos(origen, destino, args):
+    """Copia la aplicación de origen a destino y pone datos generados en lugar de los reales."""
+    for ruta in glob.glob(os.path.join(origen, '*.py')):
+        shutil.copy2(ruta, destino)
+    if os.path.isdir(os.path.join(origen, 'assets')):
+        shutil.copytree(os.path.join(origen, 'assets'), os.path.join(destino, 'assets'))
+    generadores.escribir_eficiencia(
+        generadores.generar_eficiencia(args.intendencias, args.anios, mensual=True),
+        os.path.join(destino, ARCHIVO_EFICIENCIA))
+    generadores.escribir_encuesta(
+        generadores.generar_encuesta(args.respuestas, args.preguntas),
+        os.path.join(destino, ARCHIVO_ENCUESTA))
+
+def pedir(puerto, cuerpo):
+    peticion = urllib.request.Request(f'http://127.0.0.1:{puerto}/_dash-update-component',
+                                      data=json.dumps(cuerpo).encode(), headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(peticion, timeout=300) as r:
+        return json.loads(r.read())
+
+def calentar(puerto, rondas):
+    """Abre cada pestaña rondas veces, cada petición en una conexión nueva (y así en workers distintos)."""
+    for _ in range(rondas):
+        for tab in PESTANAS:
+            respuesta = pedir(puerto, peticion_pestana(tab))
+            props = componentes_de_layout(respuesta['response']['contenido-tab']['children'])
+            for cuerpo in peticiones_iniciales(tab, props).values():
+                pedir(puerto, cuerpo)
+
+def medir(directorio, args):
+    entorno = {**os.environ, 'RECARGA_INTERVALO': '0', 'PRECARGAR_DATOS': 'todas'}
+    # Sidecars ya construidos: se mide el estado estable, no el primer parseo
+    subprocess.run([sys.executable, 'datos.py'], cwd=directorio, env=entorno, check=True, stdout=subprocess.DEVNULL)
+
+    puerto = puerto_libre()
+    comando = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f'127.0.0.1:{puerto}', '--timeout', '300']
+    if args.preload:
+        comando.append('--preload')
+    proceso = subprocess.Popen(comando + ['app_principal:server'], cwd=directorio, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limite_espera = time.perf_counter() + 300
+        while not responde(f'http://127.0.0.1:{puerto}/'):
+            if proceso.poll() is not None:
+                raise RuntimeError(f"gunicorn terminó con código {proceso.returncode}")
+            if time.perf_counter() > limite_espera:
+                raise RuntimeError("gunicorn no respondió en 300 s")
+            time.sleep(0.2)
+
+        calentar(puerto, args.rondas)
+        workers = hijos(proceso.pid)
+        estable = esperar_estable([proceso.pid] + workers)
+        procesos = [{'rol': 'maestro', 'pid': proceso.pid, **memoria(proceso.pid)}]
+        procesos += [{'rol': 'worker', 'pid': pid, **memoria(pid)} for pid in sorted(workers)]
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=30)
+
+    solo_workers = [p for p in procesos if p['rol'] == 'worker']
+    return {
+        'memoria_estable': estable,
+        'procesos': procesos,
+        'por_worker_mb': {clave: round(sum(p[clave] for p in solo_workers) / len(solo_workers), 1)
+                          for clave in ('rss', 'pss', 'compartida', 'privada')} if solo_workers else None,
+        'total_mb': {clave: round(sum(p[clave] for p in procesos), 1) for clave in ('rss', 'pss')}
+    }
+
+# =============================================
+# REPORTE
+# =============================================
+def comparar(reporte, anterior):
+    for seccion in ('por_worker_mb', 'total_mb'):
+        actual, previo = reporte.get(seccion), anterior.get(seccion)
+        if not actual or not previo:
+            continue
+        for clave in list(actual):
+            if clave in previo:
+                actual[f'{clave}_antes'] = previo[clave]
+                actual[f'reduccion_{clave}_pct'] = round((1 - actual[clave] / previo[clave]) * 100, 1) if previo[clave] else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--preload', action='store_true', help='lanza gunicorn con --preload')
+    parser.add_argument('--rondas', type=int, default=None, help='veces que se abre cada pestaña (por defecto, 3 por worker)')
+    parser.add_argument('--aplicacion', default=RAIZ, help='árbol de la aplicación a medir (por defecto, este)')
+    parser.add_argument('--sinteticos', action='store_true', help='mide una copia con datos generados')
+    parser.add_argument('--intendencias', type=int, default=2_000, help='con --sinteticos (datos mensuales)')
+    parser.add_argument('--anios', type=int, default=30, help='con --sinteticos')
+    parser.add_argument('--respuestas', type=int, default=10_000, help='con --sinteticos')
+    parser.add_argument('--preguntas', type=int, default=40, help='con --sinteticos')
+    parser.add_argument('--comparar', default=None, help='reporte anterior contra el cual comparar')
+    parser.add_argument('--salida', default=None, help='ruta del reporte JSON (por defecto, stdout)')
+    args = parser.parse_args()
+    args.rondas = args.rondas or 3 * args.workers
+
+    if args.sinteticos:
+        with tempfile.TemporaryDirectory(prefix='memoria_workers_') as directorio:
+            copiar_con_sinteticos(os.path.abspath(args.aplicacion), directorio, args)
+            resultado = medir(directorio, args)
+    else:
+        resultado = medir(os.path.abspath(args.aplicacion), args)
+
+    reporte = {
+        'workers': args.workers,
+        'preload': args.preload,
+        'datos': {'intendencias': args.intendencias, 'anios': args.anios, 'mensual': True,
+                  'respuestas': args.respuestas, 'preguntas': args.preguntas} if args.sinteticos else 'reales',
+        **resultado
+    }
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(reporte, json.load(f))
+
+    print(f"{args.workers} workers: PSS total {reporte['total_mb']['pss']} MB, "
+          f"RSS medio por worker {reporte['por_worker_mb']['rss']} MB", file=sys.stderr)
+    texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+if __name__ == '__main__':
+    main()
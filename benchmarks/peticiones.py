@@ -0,0 +1,129 @@
+"""
+Cuerpos de las peticiones a /_dash-update-component que hace el navegador
+para cada callback de servidor, tal como los arma el renderer de Dash.
+"""
+import json
+
+# Tarjetas de la encuesta que se ven al abrir una página sin desplazarse
+TARJETAS_EN_PANTALLA = 4
+
+def peticion_pestana(tab):
+    return {
+        'output': 'contenido-tab.children',
+        'outputs': {'id': 'contenido-tab', 'property': 'children'},
+        'inputs': [{'id': 'tabs-principal', 'property': 'value', 'value': tab}],
+        'changedPropIds': ['tabs-principal.value'],
+        'state': []
+    }
+
+def peticion_derivaciones(anio, grupo, disparador='filtro-intendencia-grupo.value'):
+    salidas = [('grafico-derivaciones', 'figure'), ('grafico-cancelados', 'figure'), ('stats-panel-derivaciones', 'children')]
+    return {
+        'output': '..' + '...'.join(f'{i}.{p}' for i, p in salidas) + '..',
+        'outputs': [{'id': i, 'property': p} for i, p in salidas],
+        'inputs': [{'id': 'store-selected-year-derivaciones', 'property': 'data', 'value': anio},
+                   {'id': 'filtro-intendencia-grupo', 'property': 'value', 'value': grupo}],
+        'changedPropIds': [disparador],
+        'state': []
+    }
+
+def peticion_eficiencia(anios):
+    salidas = [('heatmap-arriba', 'figure'), ('heatmap-abajo', 'figure'), ('anios-datos', 'children'),
+               ('num-intendencias', 'children'), ('error-panel', 'children'), ('error-panel', 'style')]
+    return {
+        'output': '..' + '...'.join(f'{i}.{p}' for i, p in salidas) + '..',
+        'outputs': [{'id': i, 'property': p} for i, p in salidas],
+        'inputs': [{'id': 'filtro-anio', 'property': 'value', 'value': anios}],
+        'changedPropIds': ['filtro-anio.value'],
+        'state': []
+    }
+
+def peticion_tendencias(anio, metrica, disparador='dropdown-metrica-tendencias.value'):
+    salidas = [('grafico-ranking-tendencias', 'figure'), ('tabla-tendencias', 'data'),
+               ('tabla-tendencias', 'sort_by'), ('stats-panel-tendencias', 'children')]
+    return {
+        'output': '..' + '...'.join(f'{i}.{p}' for i, p in salidas) + '..',
+        'outputs': [{'id': i, 'property': p} for i, p in salidas],
+        'inputs': [{'id': 'dropdown-anio-tendencias', 'property': 'value', 'value': anio},
+                   {'id': 'dropdown-metrica-tendencias', 'property': 'value', 'value': metrica}],
+        'changedPropIds': [disparador],
+        'state': []
+    }
+
+def _filtros_encuesta(grupo, ires, respuestas):
+    """Entradas de los filtros de la encuesta; respuestas: pares (pregunta, respuesta) del filtro cruzado."""
+    return [{'id': 'dropdown-filter-encuesta', 'property': 'value', 'value': grupo},
+            {'id': 'dropdown-ire-encuesta', 'property': 'value', 'value': list(ires)},
+            {'id': 'dropdown-respuestas-encuesta', 'property': 'value',
+             'value': [json.dumps([p, r], ensure_ascii=False) for p, r in respuestas]}]
+
+def peticion_pagina_encuesta(pagina):
+    return {
+        'output': 'tarjetas-encuesta.children',
+        'outputs': {'id': 'tarjetas-encuesta', 'property': 'children'},
+        'inputs': [{'id': 'dropdown-pagina-encuesta', 'property': 'value', 'value': pagina}],
+        'changedPropIds': ['dropdown-pagina-encuesta.value'],
+        'state': []
+    }
+
+def peticion_estadisticas_encuesta(grupo, disparador='dropdown-filter-encuesta.value', ires=(), respuestas=()):
+    return {
+        'output': 'total-ires-encuesta.children',
+        'outputs': {'id': 'total-ires-encuesta', 'property': 'children'},
+        'inputs': _filtros_encuesta(grupo, ires, respuestas),
+        'changedPropIds': [disparador],
+        'state': []
+    }
+
+def peticion_grafico_encuesta(posicion, grupo, ires=(), respuestas=()):
+    """Lo que pide la tarjeta de la pregunta en posicion al entrar en pantalla (el pedido lo arma el navegador)."""
+    pedido = {'grupo': grupo, 'ires': list(ires),
+              'respuestas': [json.dumps([p, r], ensure_ascii=False) for p, r in respuestas]}
+    return {
+        'output': '{"index":["MATCH"],"type":"grafico-encuesta"}.figure',
+        'outputs': {'id': {'index': posicion, 'type': 'grafico-encuesta'}, 'property': 'figure'},
+        'inputs': [{'id': {'index': posicion, 'type': 'pedido-encuesta'}, 'property': 'data', 'value': pedido}],
+        'changedPropIds': [f'{{"index":{posicion},"type":"pedido-encuesta"}}.data'],
+        'state': []
+    }
+
+def preguntas_de_pagina(respuesta):
+    """Posiciones de las preguntas de las tarjetas que devolvió mostrar_pagina_encuesta, en orden."""
+    tarjetas = componentes_de_layout(respuesta['response']['tarjetas-encuesta']['children']).get('tarjeta-encuesta', [])
+    return [t['id']['index'] for t in tarjetas]
+
+def componentes_de_layout(nodo, encontrados=None):
+    """props de cada componente con id; los de id patrón (dict) se agrupan por 'type'."""
+    if encontrados is None:
+        encontrados = {}
+    if isinstance(nodo, list):
+        for hijo in nodo:
+            componentes_de_layout(hijo, encontrados)
+    elif isinstance(nodo, dict) and isinstance(nodo.get('props'), dict):
+        props = nodo['props']
+        ident = props.get('id')
+        if isinstance(ident, str):
+            encontrados[ident] = props
+        elif isinstance(ident, dict):
+            encontrados.setdefault(ident.get('type'), []).append(props)
+        componentes_de_layout(props.get('children'), encontrados)
+    return encontrados
+
+def peticiones_iniciales(tab, props):
+    """Callbacks de servidor que dispara el layout de cada pestaña al montarse (props: componentes_de_layout)."""
+    if tab == 'tab-derivaciones':
+        return {'actualizar_analisis_derivaciones': peticion_derivaciones(
+            props['store-selected-year-derivaciones'].get('data'), props['filtro-intendencia-grupo']['value'])}
+    if tab == 'tab-eficiencia':
+        return {'actualizar_graficos': peticion_eficiencia(props['filtro-anio'].get('value'))}
+    if tab == 'tab-tendencias':
+        return {'actualizar_tendencias': peticion_tendencias(
+            props['dropdown-anio-tendencias'].get('value'), props['dropdown-metrica-tendencias'].get('value'))}
+    # Los gráficos de la encuesta no: los pide cada tarjeta al entrar en pantalla
+    return {
+        'mostrar_pagina_encuesta': peticion_pagina_encuesta(props['dropdown-pagina-encuesta'].get('value')),
+        'actualizar_estadisticas_encuesta': peticion_estadisticas_encuesta(
+            props['dropdown-filter-encuesta']['value'],
+            ires=props['dropdown-ire-encuesta'].get('value') or (),
+            respuestas=[json.loads(v) for v in props['dropdown-respuestas-encuesta'].get('value') or ()])
+    }
@@ -0,0 +1,84 @@
+"""
+Tamaño de las respuestas que recibe el navegador al abrir cada pestaña con
+su selección inicial: el layout de la pestaña (render_content) y los
+callbacks que ese layout dispara. En la encuesta se suman además los
+gráficos de las tarjetas que se ven sin desplazarse (TARJETAS_EN_PANTALLA),
+que cada tarjeta pide por su cuenta. Se informa el JSON tal cual y
+comprimido con gzip, que es lo que viaja si el proxy comprime.
+
+Con --comparar <reporte.json> (p. ej. uno generado en otra rama) se agrega
+el tamaño anterior y la reducción de cada pestaña.
+
+Uso:
+    python benchmarks/tamano_respuestas.py [--salida tamanos.json] [--comparar antes.json]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ.setdefault('RECARGA_INTERVALO', '0')
+
+import app_principal
+from peticiones import (TARJETAS_EN_PANTALLA, componentes_de_layout, peticion_grafico_encuesta, peticion_pestana,
+                        peticiones_iniciales, preguntas_de_pagina)
+
+def medir(cliente, cuerpo):
+    respuesta = cliente.post('/_dash-update-component', json=cuerpo)
+    if respuesta.status_code != 200:
+        raise RuntimeError(f"{cuerpo['output']}: HTTP {respuesta.status_code}")
+    contenido = respuesta.get_data()
+    return {'bytes': len(contenido), 'bytes_gzip': len(gzip.compress(contenido, compresslevel=6))}, json.loads(contenido)
+
+def medir_pestanas():
+    cliente = app_principal.server.test_client()
+    reporte = {}
+    for tab in ['tab-derivaciones', 'tab-eficiencia', 'tab-tendencias', 'tab-encuesta']:
+        tamano, respuesta = medir(cliente, peticion_pestana(tab))
+        callbacks = {'render_content': tamano}
+        props = componentes_de_layout(respuesta['response']['contenido-tab']['children'])
+        for nombre, cuerpo in peticiones_iniciales(tab, props).items():
+            callbacks[nombre], respuesta = medir(cliente, cuerpo)
+            if nombre == 'mostrar_pagina_encuesta':
+                grupo = props['dropdown-filter-encuesta']['value']
+                for posicion in preguntas_de_pagina(respuesta)[:TARJETAS_EN_PANTALLA]:
+                    callbacks[f'actualizar_grafico_encuesta[{posicion}]'] = medir(cliente, peticion_grafico_encuesta(posicion, grupo))[0]
+        reporte[tab] = {
+            'bytes': sum(c['bytes'] for c in callbacks.values()),
+            'bytes_gzip': sum(c['bytes_gzip'] for c in callbacks.values()),
+            'callbacks': callbacks
+        }
+    return reporte
+
+def comparar(reporte, anterior):
+    for tab, actual in reporte.items():
+        previo = anterior.get(tab)
+        if previo is None:
+            continue
+        for clave in ('bytes', 'bytes_gzip'):
+            actual[f'{clave}_antes'] = previo[clave]
+            actual[f'reduccion_{clave}_pct'] = round((1 - actual[clave] / previo[clave]) * 100, 1) if previo[clave] else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comparar', default=None, help='reporte anterior contra el cual comparar')
+    parser.add_argument('--salida', default=None, help='ruta del reporte JSON (por defecto, stdout)')
+    args = parser.parse_args()
+
+    reporte = medir_pestanas()
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(reporte, json.load(f))
+
+    texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+import os
+import threading
+
+# =============================================
+# CACHÉ LRU ACOTADA
+# =============================================
+# Tamaño por defecto configurable con la variable de entorno CACHE_FIGURAS_TAMANO
+TAMANO_POR_DEFECTO = int(os.environ.get('CACHE_FIGURAS_TAMANO', '128'))
+
+# Todas las cachés creadas, para poder consultarlas o vaciarlas en bloque
+_caches = []
+
+class CacheLRU:
+    """
+    Caché LRU segura entre hilos con contadores de aciertos, fallos y
+    expulsiones. Si dos peticiones piden la misma clave a la vez, ambas
+    pueden construir el valor: se prefiere eso a bloquear al resto de claves.
+    """
+    def __init__(self, nombre, tamano_max=None):
+        self.nombre = nombre
+        self.tamano_max = TAMANO_POR_DEFECTO if tamano_max is None else tamano_max
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        _caches.append(self)
+
+    def obtener(self, clave, construir):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+
+        valor = construir()
+        self.guardar(clave, valor)
+        return valor
+
+    def buscar(self, clave):
+        """Como obtener, pero sin construir: devuelve None si la clave no está."""
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        if self.tamano_max <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_max:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'nombre': self.nombre,
+                'tamano': len(self._datos),
+                'tamano_max': self.tamano_max,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'expulsiones': self.expulsiones
+            }
+
+def estadisticas():
+    return [c.estadisticas() for c in _caches]
+
+def limpiar_todas():
+    for c in _caches:
+        c.limpiar()
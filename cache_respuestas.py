@@ -0,0 +1,110 @@
+from typing import NamedTuple
+import gzip
+import hashlib
+import json
+import os
+
+from flask import g, request
+
+import registro_datos
+from cache import CacheLRU
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# =============================================
+# CACHÉ DE RESPUESTAS DE CALLBACKS
+# =============================================
+# Las salidas de los callbacks dependen solo de sus entradas y de la versión
+# de los datos. Esta caché se pone delante de /_dash-update-component: una
+# petición repetida se responde con el cuerpo ya comprimido (gzip y, si está
+# instalado el paquete brotli, también br) sin pasar por Dash, pandas ni
+# plotly. Tamaño (en respuestas) con CACHE_RESPUESTAS_TAMANO; 0 la desactiva.
+TAMANO = int(os.environ.get('CACHE_RESPUESTAS_TAMANO', '256'))
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+
+class RespuestaComprimida(NamedTuple):
+    gzip: bytes
+    br: bytes
+
+cache_respuestas = CacheLRU('respuestas_callbacks', TAMANO)
+
+def clave_peticion(cuerpo, versiones):
+    """
+    Clave de una petición de callback: salida, valores de entrada y de estado
+    y versiones de los datos. changedPropIds no entra: ningún callback de la
+    aplicación mira qué entrada lo disparó (callback_context.triggered).
+    """
+    try:
+        peticion = json.loads(cuerpo)
+        partes = [peticion['output'], peticion.get('inputs', []), peticion.get('state', []), versiones]
+    except (ValueError, KeyError, TypeError):
+        return None
+    texto = json.dumps(partes, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+
+def comprimir(cuerpo):
+    return RespuestaComprimida(
+        gzip=gzip.compress(cuerpo, compresslevel=NIVEL_GZIP),
+        br=brotli.compress(cuerpo, quality=CALIDAD_BROTLI) if brotli is not None else None
+    )
+
+def _codificaciones_aceptadas():
+    return {parte.split(';')[0].strip().lower() for parte in request.headers.get('Accept-Encoding', '').split(',')}
+
+def _escribir(respuesta, entrada):
+    """Pone en respuesta el cuerpo de entrada en la codificación que acepte el cliente."""
+    respuesta.vary.add('Accept-Encoding')
+    aceptadas = _codificaciones_aceptadas()
+    if entrada.br is not None and 'br' in aceptadas:
+        respuesta.set_data(entrada.br)
+        respuesta.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in aceptadas:
+        respuesta.set_data(entrada.gzip)
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    else:
+        respuesta.set_data(gzip.decompress(entrada.gzip))
+    return respuesta
+
+def instalar(app):
+    """Engancha la caché al servidor Flask de app (si CACHE_RESPUESTAS_TAMANO > 0)."""
+    if cache_respuestas.tamano_max <= 0:
+        return False
+    server = app.server
+    ruta = app.config.routes_pathname_prefix + '_dash-update-component'
+
+    # Una versión nueva de cualquier fuente deja inservibles sus entradas: se liberan ya
+    for nombre in registro_datos.versiones():
+        registro_datos.al_cambiar(nombre, cache_respuestas.limpiar)
+
+    @server.before_request
+    def servir_desde_cache():
+        if request.method != 'POST' or request.path != ruta:
+            return None
+        versiones = registro_datos.versiones()
+        clave = clave_peticion(request.get_data(), versiones)
+        if clave is None:
+            return None
+        entrada = cache_respuestas.buscar(clave)
+        if entrada is not None:
+            return _escribir(server.response_class(mimetype='application/json'), entrada)
+        g.clave_respuesta = (clave, versiones)
+        return None
+
+    @server.after_request
+    def guardar_en_cache(respuesta):
+        clave = g.pop('clave_respuesta', None)
+        if clave is None or respuesta.status_code != 200 or respuesta.direct_passthrough or 'Content-Encoding' in respuesta.headers:
+            return respuesta
+        clave, versiones = clave
+        entrada = comprimir(respuesta.get_data())
+        # Si los datos cambiaron mientras se calculaba (o se cargaron por
+        # primera vez), la respuesta ya no corresponde a la clave
+        if registro_datos.versiones() == versiones:
+            cache_respuestas.guardar(clave, entrada)
+        return _escribir(respuesta, entrada)
+
+    return True
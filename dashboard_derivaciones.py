@@ -1,36 +1,76 @@
-import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from dash import dcc, html, Input, Output, State, ALL, callback_context
+from dash import dcc, html, Input, Output, State, ALL
 import os
 import json
 
+import datos
+import registro_datos
+from cache import CacheLRU
+from figuras import podar_plantilla
+
 # =============================================
-# FUNCIÓN PARA LEER ARCHIVO
+# CARGAR Y PROCESAR DATOS
 # =============================================
-def leer_archivo(ruta_csv):
-    df = pd.read_csv(ruta_csv, sep=';', encoding='latin1')
-    df.columns = df.columns.str.strip()
-    df = df.rename(columns={'AÑO': 'ANIO', 'Porcentaje de Eficiencia': 'EFICIENCIA'})
-
-    for col in ['EFICIENCIA', 'NUMERADOR', 'DENOMINADOR']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '.', regex=False), errors='coerce')
-
-    df = df.fillna(0)
-    df['ANIO'] = pd.to_numeric(df['ANIO'], errors='coerce')
-    df = df.dropna(subset=['ANIO', 'INTENDENCIA'])
-    df = df[df['ANIO'] >= 2020]
-    return df
+def cargar_y_procesar_datos(rutas):
+    # Sumas por año e intendencia, en pandas o en SQLite según EFICIENCIA_BACKEND
+    sumas = datos.agregar_eficiencia(rutas, total_deriv=('DENOMINADOR', 'sum'), total_cobros=('NUMERADOR', 'sum'))
+    anios_filtrables = sorted(sumas.index.unique('ANIO'))
+    return sumas, anios_filtrables
 
 # =============================================
-# CARGAR Y PROCESAR DATOS
+# CUBO DE AGREGADOS (AÑO x GRUPO x INTENDENCIA)
 # =============================================
-def cargar_y_procesar_datos(ruta_csv):
-    df = leer_archivo(ruta_csv)
-    df_2025 = df[df['ANIO'] == 2025].copy()
-    anios_filtrables = sorted(df["ANIO"].unique())
-    return df, df_2025, anios_filtrables
+GRUPOS_INTENDENCIA = ['TODAS', 'REGIONALES']
+ETIQUETAS_GRUPO = {'TODAS': 'Todas las Intendencias', 'REGIONALES': 'Intendencias Regionales'}
+
+def construir_cubo(sumas, anios_filtrables):
+    """
+    Precalcula, una sola vez por carga de datos, todo lo que el callback de
+    derivaciones necesita para cada combinación de año y grupo: las sumas por
+    intendencia del año, del año de comparación y de 2025 (ya alineadas) y
+    los totales de las tarjetas. sumas viene indexado por (ANIO, INTENDENCIA).
+    """
+    cubo = {}
+    if sumas.empty:
+        return cubo
+
+    vacio = sumas.iloc[0:0].droplevel('ANIO')
+    sumas_por_anio = {anio: sumas.xs(anio, level='ANIO') for anio in sumas.index.unique('ANIO')}
+    sumas_2025 = sumas_por_anio.get(2025, vacio)
+    anio_max = sumas.index.get_level_values('ANIO').max()
+
+    for anio_sel in anios_filtrables:
+        # Determinar el año de comparación
+        anio_comparacion = anio_max if anio_sel == anios_filtrables[0] else anio_sel - 1
+        sumas_comparacion = sumas_por_anio.get(anio_comparacion, vacio)
+
+        for grupo in GRUPOS_INTENDENCIA:
+            df_agg = sumas_por_anio.get(anio_sel, vacio)
+            if grupo == 'REGIONALES':
+                df_agg = df_agg.drop(index='ILM', errors='ignore')
+            if df_agg.empty:
+                continue
+            df_agg = df_agg.reset_index().sort_values('total_deriv', ascending=True)
+
+            intendencias = df_agg['INTENDENCIA']
+            df_comparacion_agg = sumas_comparacion.reindex(intendencias, fill_value=0).reset_index()
+            df_comparacion_agg.columns = ['INTENDENCIA', 'total_deriv_comp', 'total_cobros_comp']
+            df_2025_agg = sumas_2025.reindex(intendencias, fill_value=0).reset_index()
+            df_2025_agg.columns = ['INTENDENCIA', 'total_deriv_2025', 'total_cobros_2025']
+
+            total_deriv = df_agg['total_deriv'].sum()
+            total_cobro = df_agg['total_cobros'].sum()
+            cubo[(int(anio_sel), grupo)] = {
+                'df_agg': df_agg,
+                'df_comparacion_agg': df_comparacion_agg,
+                'df_2025_agg': df_2025_agg,
+                'nombre_anio_comparacion': f'{anio_comparacion}',
+                'total_deriv': total_deriv,
+                'total_cobro': total_cobro,
+                'prom_eficiencia': (total_cobro / total_deriv * 100) if total_deriv > 0 else 0
+            }
+    return cubo
 
 # =============================================
 # FUNCIONES PARA CREAR GRÁFICOS
@@ -97,17 +137,32 @@ def crear_grafico_cancelados(df_agg, df_comparacion_agg, df_2025_agg, anio_sel,
     fig.update_xaxes(showgrid=False, tickangle=0, showticklabels=True, tickfont=dict(size=11), tickcolor='#2c2c2c', automargin=False, title_standoff=45, ticklen=10, ticks="outside")
     return fig
 
+def figuras_celda(celda, anio_sel):
+    """Las dos figuras de una celda del cubo, ya como dict y con la plantilla podada."""
+    fig_derivaciones = crear_grafico_derivaciones(celda['df_agg'], celda['df_comparacion_agg'], celda['df_2025_agg'], anio_sel, celda['nombre_anio_comparacion'])
+    fig_cancelados = crear_grafico_cancelados(celda['df_agg'], celda['df_comparacion_agg'], celda['df_2025_agg'], anio_sel, celda['nombre_anio_comparacion'])
+    return podar_plantilla(fig_derivaciones.to_dict()), podar_plantilla(fig_cancelados.to_dict())
+
 # =============================================
 # CARGAR DATOS INICIALES
 # =============================================
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(script_dir, "Eficiencia_cobranzaNC_2020-2025.csv")
-    df_full, df_2025, anios_filtrables = cargar_y_procesar_datos(csv_path)
+def cargar_datos(rutas):
+    sumas, anios_filtrables = cargar_y_procesar_datos(rutas)
+    return {
+        'anios_filtrables': anios_filtrables,
+        'cubo': construir_cubo(sumas, anios_filtrables)
+    }
 
-except Exception as e:
-    print(f"Error al cargar datos en dashboard_derivaciones: {e}")
-    df_full, df_2025, anios_filtrables = pd.DataFrame(), pd.DataFrame(), []
+DATOS_VACIOS = {'anios_filtrables': [], 'cubo': {}}
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# Un CSV, un directorio de CSV o un glob (EFICIENCIA_ORIGEN); ver datos.expandir_rutas
+csv_path = os.environ.get('EFICIENCIA_ORIGEN') or os.path.join(script_dir, "Eficiencia_cobranzaNC_2020-2025.csv")
+registro_datos.registrar('derivaciones', [csv_path], cargar_datos, DATOS_VACIOS)
+
+# Figuras ya serializadas por (año, grupo de intendencias, versión de datos)
+cache_figuras = CacheLRU('figuras_derivaciones')
+registro_datos.al_cambiar('derivaciones', cache_figuras.limpiar)
 
 
 # =============================================
@@ -140,6 +195,7 @@ radio_item_selected_style = {
 # LAYOUT DE LA APLICACIÓN
 # =============================================
 def get_layout():
+    anios_filtrables = registro_datos.obtener('derivaciones').datos['anios_filtrables']
     layout = html.Div(
         className='dashboard-content',
         style={"backgroundColor": "#2c2c2c", "color": "white", "padding": "10px", "fontFamily": "Arial, sans-serif"},
@@ -167,10 +223,7 @@ def get_layout():
                             ),
                             dcc.Dropdown(
                                 id="filtro-intendencia-grupo",
-                                options=[
-                                    {'label': 'Todas las Intendencias', 'value': 'TODAS'},
-                                    {'label': 'Intendencias Regionales', 'value': 'REGIONALES'}
-                                ],
+                                options=[{'label': ETIQUETAS_GRUPO[grupo], 'value': grupo} for grupo in GRUPOS_INTENDENCIA],
                                 value='TODAS',
                                 clearable=False,
                                 style={'color': '#000', 'backgroundColor': '#ADD8E6', 'minWidth': '200px', 'flex': '1'}
@@ -193,33 +246,36 @@ def get_layout():
 # CALLBACKS
 # =============================================
 def register_callbacks(app):
-    @app.callback(
+    # Callbacks de pura interfaz: se resuelven en el navegador, sin ida y vuelta al servidor
+    app.clientside_callback(
+        """
+        function(n_clicks, current_year) {
+            const ctx = dash_clientside.callback_context;
+            if (!ctx.triggered.length || !ctx.triggered[0].value) {
+                return current_year;
+            }
+            const prop_id = ctx.triggered[0].prop_id;
+            return JSON.parse(prop_id.slice(0, prop_id.lastIndexOf('.'))).index;
+        }
+        """,
         Output('store-selected-year-derivaciones', 'data'),
         Input({'type': 'btn-anio-derivaciones', 'index': ALL}, 'n_clicks'),
         State('store-selected-year-derivaciones', 'data'),
         prevent_initial_call=True
     )
-    def update_selected_year(n_clicks, current_year):
-        ctx = callback_context
-        if not ctx.triggered or not ctx.triggered[0]['value']:
-            return current_year
-
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        year = json.loads(button_id)['index']
-        return year
 
-    @app.callback(
+    app.clientside_callback(
+        f"""
+        function(selected_year, ids) {{
+            const estilo = {json.dumps(radio_item_style)};
+            const estilo_seleccionado = {json.dumps(radio_item_selected_style)};
+            return ids.map(id => id.index === selected_year ? estilo_seleccionado : estilo);
+        }}
+        """,
         Output({'type': 'btn-anio-derivaciones', 'index': ALL}, 'style'),
-        Input('store-selected-year-derivaciones', 'data')
+        Input('store-selected-year-derivaciones', 'data'),
+        State({'type': 'btn-anio-derivaciones', 'index': ALL}, 'id')
     )
-    def update_button_styles(selected_year):
-        styles = []
-        for anio in anios_filtrables:
-            if anio == selected_year:
-                styles.append(radio_item_selected_style)
-            else:
-                styles.append(radio_item_style)
-        return styles
 
     @app.callback(
         [Output("grafico-derivaciones", "figure"),
@@ -234,56 +290,21 @@ def register_callbacks(app):
         if not anio_sel:
             return fig_empty, fig_empty, []
 
-        # Filtrar datos para el año seleccionado
-        df_filtered_by_year = df_full[df_full["ANIO"] == anio_sel].copy()
-
-        # Determinar el año de comparación
-        if anio_sel == anios_filtrables[0]:
-            anio_comparacion = df_full['ANIO'].max()
-            nombre_anio_comparacion = f'{anio_comparacion}'
-        else:
-            anio_comparacion = anio_sel - 1
-            nombre_anio_comparacion = f'{anio_comparacion}'
-
-        df_comparacion_raw = df_full[df_full["ANIO"] == anio_comparacion].copy()
-
-        # Aplicar filtro de intendencia
-        if intendencia_grupo_sel == 'REGIONALES':
-            df_filt = df_filtered_by_year[df_filtered_by_year['INTENDENCIA'] != 'ILM'].copy()
-            df_comparacion_filt = df_comparacion_raw[df_comparacion_raw['INTENDENCIA'] != 'ILM'].copy()
-        else: # 'TODAS'
-            df_filt = df_filtered_by_year.copy()
-            df_comparacion_filt = df_comparacion_raw.copy()
-
-        if df_filt.empty:
+        # Instantánea vigente de los datos (puede cambiar entre peticiones)
+        instantanea = registro_datos.obtener('derivaciones')
+        celda = instantanea.datos['cubo'].get((int(anio_sel), intendencia_grupo_sel))
+        if celda is None:
             return fig_empty, fig_empty, []
 
-        # Procesamiento de datos
-        df_agg = df_filt.groupby('INTENDENCIA').agg(
-            total_deriv=('DENOMINADOR', 'sum'),
-            total_cobros=('NUMERADOR', 'sum')
-        ).reset_index().sort_values('total_deriv', ascending=True)
-
-        df_comparacion_agg = df_comparacion_filt.groupby('INTENDENCIA').agg(
-            total_deriv_comp=('DENOMINADOR', 'sum'),
-            total_cobros_comp=('NUMERADOR', 'sum')
-        ).reset_index()
-        df_comparacion_agg = pd.merge(df_agg[['INTENDENCIA']], df_comparacion_agg, on='INTENDENCIA', how='left').fillna(0)
-
-        df_2025_agg = df_2025.groupby('INTENDENCIA').agg(
-            total_deriv_2025=('DENOMINADOR', 'sum'),
-            total_cobros_2025=('NUMERADOR', 'sum')
-        ).reset_index()
-        df_2025_agg = pd.merge(df_agg[['INTENDENCIA']], df_2025_agg, on='INTENDENCIA', how='left').fillna(0)
-
-        # Crear figuras
-        fig_derivaciones = crear_grafico_derivaciones(df_agg, df_comparacion_agg, df_2025_agg, anio_sel, nombre_anio_comparacion)
-        fig_cancelados = crear_grafico_cancelados(df_agg, df_comparacion_agg, df_2025_agg, anio_sel, nombre_anio_comparacion)
+        # Crear figuras (o reutilizarlas si esta selección ya se construyó)
+        fig_derivaciones, fig_cancelados = cache_figuras.obtener(
+            (int(anio_sel), intendencia_grupo_sel, instantanea.version), lambda: figuras_celda(celda, anio_sel)
+        )
 
-        # Calcular estadísticas
-        total_deriv = df_filt['DENOMINADOR'].sum()
-        total_cobro = df_filt['NUMERADOR'].sum()
-        prom_eficiencia = (total_cobro / total_deriv * 100) if total_deriv > 0 else 0
+        # Estadísticas precalculadas en el cubo
+        total_deriv = celda['total_deriv']
+        total_cobro = celda['total_cobro']
+        prom_eficiencia = celda['prom_eficiencia']
 
         stats_cards = [
             html.Div(style=card_style, children=[
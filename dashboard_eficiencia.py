@@ -1,123 +1,246 @@
-import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from dash import dcc, html, Input, Output
+from functools import lru_cache
 import os
+import threading
 
-# =============================================
-# FUNCIÓN PARA LEER ARCHIVO
-# =============================================
-def leer_archivo(ruta_csv):
-    df = pd.read_csv(ruta_csv, sep=';', encoding='latin1')
-    df.columns = df.columns.str.strip()
-    df = df.rename(columns={'AÑO': 'ANIO'})
-
-    if 'EFICIENCIA' in df.columns:
-        df['EFICIENCIA'] = pd.to_numeric(df['EFICIENCIA'].astype(str).str.replace(',', '.', regex=False), errors='coerce')
-    else:
-        df['EFICIENCIA'] = 1.0
-
-    df['EFICIENCIA'] = df['EFICIENCIA'].fillna(0)
-    df['ANIO'] = pd.to_numeric(df['ANIO'], errors='coerce')
-    df = df.dropna(subset=['ANIO', 'INTENDENCIA'])
-    df = df[df['ANIO'] >= 2020]
-    return df
+import datos
+import registro_datos
+from cache import CacheLRU
+from figuras import arreglo_binario, plantilla_reducida, podar_plantilla, redondear_para_mostrar
 
 # =============================================
 # CARGAR Y PROCESAR DATOS
 # =============================================
-def cargar_y_procesar_datos(ruta_csv):
-    df = leer_archivo(ruta_csv)
-    df_2025 = df[df['ANIO'] == 2025].copy()
-    df_historico = df[df['ANIO'] < 2025].copy()
-    anios_filtrables = sorted(df_historico["ANIO"].unique())
-    return df_historico, df_2025, anios_filtrables
+def cargar_y_procesar_datos(rutas):
+    # Suma y conteo de eficiencias por año e intendencia, en pandas o en SQLite según EFICIENCIA_BACKEND
+    sumas = datos.agregar_eficiencia(rutas, suma=('EFICIENCIA', 'sum'), conteo=('EFICIENCIA', 'count'))
+    anios = sumas.index.get_level_values('ANIO')
+    sumas_historico = sumas[anios < 2025]
+    sumas_2025 = sumas[anios == 2025]
+    anios_filtrables = sorted(sumas_historico.index.unique('ANIO'))
+    return sumas_historico, sumas_2025, anios_filtrables
 
 # =============================================
-# SECCIÓN DE ESTÉTICA DE GRÁFICOS
+# MATRIZ HISTÓRICA PARA LOS HEATMAPS
 # =============================================
-def crear_heatmap(df_grupo, df_2025_grupo, titulo, color_scale_2025, color_scale_prom, color_scale_hist):
-    if df_grupo.empty:
-        fig = go.Figure()
-        fig.update_layout(title=f'{titulo} (Sin datos)', paper_bgcolor="#2c2c2c", plot_bgcolor="#2c2c2c", font_color="white")
-        return fig
+def construir_matriz_heatmap(sumas_historico, sumas_2025):
+    """
+    Acumula una sola vez todo el histórico en matrices NumPy (intendencias x
+    años) de sumas y conteos de eficiencia. Cada heatmap solo recorta filas y
+    columnas de estas matrices en lugar de volver a pivotar el DataFrame.
+    """
+    suma = sumas_historico['suma'].unstack('ANIO', fill_value=0)
+    conteo = sumas_historico['conteo'].unstack('ANIO', fill_value=0)
+    eficiencia_2025 = (sumas_2025['suma'] / sumas_2025['conteo']).droplevel('ANIO').reindex(suma.index).fillna(0)
+
+    intendencias = suma.index.to_numpy(dtype=str)
+    anios = suma.columns.to_numpy(dtype=int)
+    suma = suma.to_numpy(dtype=float)
+    conteo = conteo.to_numpy(dtype=np.int64)
+    return {
+        'intendencias': intendencias,
+        'anios': anios,
+        'suma': suma,
+        'conteo': conteo,
+        # Promedio por celda; 0 donde no hay dato (como pivot_table con fill_value=0)
+        'promedio': np.divide(suma, conteo, out=np.zeros_like(suma), where=conteo > 0),
+        'eficiencia_2025': eficiencia_2025.to_numpy(dtype=float)
+    }
 
-    pivot_historico = df_grupo.pivot_table(index="INTENDENCIA", columns="ANIO", values="EFICIENCIA", fill_value=0)
-    prom_anios_ant = pivot_historico.mean(axis=1).to_frame(name='Prom. Años Anteriores')
-    df_2025_grupo = df_2025_grupo.set_index('INTENDENCIA')[['EFICIENCIA']].rename(columns={'EFICIENCIA': 2025})
-    df_final = prom_anios_ant.join(df_2025_grupo, how='left').fillna(0)
-    orden_intendencias = df_final.sort_values(2025, ascending=True).index
-    pivot_historico = pivot_historico.reindex(orden_intendencias).dropna(how='all')
-    df_final = df_final.reindex(orden_intendencias).dropna(how='all')
+def mascara_anios(matriz, anios_sel):
+    """Máscara de bits de los años elegidos según su posición en matriz['anios']."""
+    posiciones = np.flatnonzero(np.isin(matriz['anios'], anios_sel))
+    return sum(1 << int(p) for p in posiciones)
 
+def columnas_de_mascara(mascara, num_anios):
+    return np.flatnonzero((mascara >> np.arange(num_anios)) & 1)
+
+# =============================================
+# SECCIÓN DE ESTÉTICA DE GRÁFICOS
+# =============================================
+@lru_cache(maxsize=None)
+def layout_base_heatmap():
+    # make_subplots y la validación de plotly son lo más caro de cada figura:
+    # el layout común de los tres paneles se arma y valida una sola vez
     fig = make_subplots(
         rows=1, cols=3,
         column_widths=[0.6, 0.15, 0.15],
         horizontal_spacing=0.05,
         shared_yaxes=True
     )
-
-    fig.add_trace(go.Heatmap(
-        z=pivot_historico.values,
-        x=pivot_historico.columns.astype(str),
-        y=pivot_historico.index,
-        colorscale=color_scale_hist, showscale=False,
-        text=pivot_historico.applymap(lambda x: f'{x:.1f}'),
-        texttemplate="%{text}",
-        textfont=dict(size=9, color='rgba(255, 255, 255, 0.8)'),
-        hovertemplate="<b>%{y}</b><br>Año: %{x}<br>Eficiencia: %{z:.1f}<extra></extra>",
-        xgap=1.8, ygap=1.8
-    ), row=1, col=1)
-
-    fig.add_trace(go.Heatmap(
-        z=df_final[['Prom. Años Anteriores']].values,
-        x=['Prom. Años Anteriores'], y=df_final.index,
-        colorscale=color_scale_prom, showscale=False,
-        text=df_final[['Prom. Años Anteriores']].applymap(lambda x: f'<b>{x:.1f}</b>'),
-        texttemplate="%{text}", textfont=dict(size=11, color="white"),
-        hovertemplate="%{z:.1f}<extra></extra>",
-        xgap=1.8, ygap=1.8
-    ), row=1, col=2)
-
-    fig.add_trace(go.Heatmap(
-        z=df_final[[2025]].values,
-        x=['2025'], y=df_final.index,
-        colorscale=color_scale_2025, showscale=False,
-        text=df_final[[2025]].applymap(lambda x: f'<b>{x:.1f}</b>'),
-        texttemplate="%{text}", textfont=dict(size=12, color="white"),
-        hovertemplate="%{z:.1f}<extra></extra>",
-        xgap=1.8, ygap=1.8
-    ), row=1, col=3)
-
     fig.update_layout(
-        title={'text': titulo, 'x': 0.05, 'xanchor': 'left', 'font': {'size': 16, 'color': 'white'}},
         paper_bgcolor="#2c2c2c", plot_bgcolor='rgba(0,0,0,0)', font_color="white",
-        height=max(300, len(df_final.index) * 40 + 120),
         margin=dict(l=180, r=100, t=140, b=80), showlegend=False
     )
-    
     fig.update_xaxes(showgrid=False, automargin=False, title_standoff=45, ticklen=4, ticks="outside", tickcolor='#2c2c2c', tickfont=dict(size=11))
     fig.update_yaxes(showgrid=False, automargin=False, title_standoff=45, ticklen=6, ticks="outside", tickcolor='#2c2c2c', tickfont=dict(size=11))
+    layout = fig.to_dict()['layout']
+    layout['template'] = plantilla_reducida(layout['template'], {'heatmap'})
+    return layout
+
+def crear_heatmap(matriz, filas, columnas, titulo, color_scale_2025, color_scale_prom, color_scale_hist):
+    """
+    Devuelve la figura como dict (listo para dcc.Graph) a partir de recortes
+    de la matriz histórica; no pasa por la validación de plotly.
+    """
+    if len(filas) == 0 or len(columnas) == 0:
+        fig = go.Figure()
+        fig.update_layout(title=f'{titulo} (Sin datos)', paper_bgcolor="#2c2c2c", plot_bgcolor="#2c2c2c", font_color="white")
+        return podar_plantilla(fig.to_dict())
+
+    historico = matriz['promedio'][np.ix_(filas, columnas)]
+    # Solo los años con algún dato en este grupo; las celdas vacías cuentan como 0
+    con_datos = matriz['conteo'][np.ix_(filas, columnas)].any(axis=0)
+    historico = historico[:, con_datos]
+    anios = matriz['anios'][columnas][con_datos]
+    prom_anios_ant = historico.mean(axis=1)
+    eficiencia_2025 = matriz['eficiencia_2025'][filas]
+
+    orden = np.argsort(eficiencia_2025, kind='quicksort')
+    historico = historico[orden]
+    intendencias = matriz['intendencias'][filas][orden]
+    prom_anios_ant = prom_anios_ant[orden, np.newaxis]
+    eficiencia_2025 = eficiencia_2025[orden, np.newaxis]
 
-    return fig
+    # El texto de cada celda lo formatea plotly.js a partir de z (texttemplate),
+    # así no se genera una cadena por celda en Python. z viaja en binario
+    # (float32), ya redondeado a la décima que se muestra
+    trazas = [
+        dict(
+            type='heatmap', xaxis='x', yaxis='y',
+            z=arreglo_binario(redondear_para_mostrar(historico)),
+            x=anios.astype(str),
+            y=intendencias,
+            colorscale=color_scale_hist, showscale=False,
+            texttemplate="%{z:.1f}",
+            textfont=dict(size=9, color='rgba(255, 255, 255, 0.8)'),
+            hovertemplate="<b>%{y}</b><br>Año: %{x}<br>Eficiencia: %{z:.1f}<extra></extra>",
+            xgap=1.8, ygap=1.8
+        ),
+        dict(
+            type='heatmap', xaxis='x2', yaxis='y2',
+            z=arreglo_binario(redondear_para_mostrar(prom_anios_ant)),
+            x=['Prom. Años Anteriores'], y=intendencias,
+            colorscale=color_scale_prom, showscale=False,
+            texttemplate="<b>%{z:.1f}</b>", textfont=dict(size=11, color="white"),
+            hovertemplate="%{z:.1f}<extra></extra>",
+            xgap=1.8, ygap=1.8
+        ),
+        dict(
+            type='heatmap', xaxis='x3', yaxis='y3',
+            z=arreglo_binario(redondear_para_mostrar(eficiencia_2025)),
+            x=['2025'], y=intendencias,
+            colorscale=color_scale_2025, showscale=False,
+            texttemplate="<b>%{z:.1f}</b>", textfont=dict(size=12, color="white"),
+            hovertemplate="%{z:.1f}<extra></extra>",
+            xgap=1.8, ygap=1.8
+        )
+    ]
+
+    layout = {
+        **layout_base_heatmap(),
+        'title': {'text': titulo, 'x': 0.05, 'xanchor': 'left', 'font': {'size': 16, 'color': 'white'}},
+        'height': max(300, len(intendencias) * 40 + 120)
+    }
+    return {'data': trazas, 'layout': layout}
+
+# =============================================
+# RESULTADOS POR SUBCONJUNTO DE AÑOS
+# =============================================
+color_verde_intenso = [[0, "#4CAF50"], [1, "#1a4d1a"]]
+color_verde_medio = [[0, "#66CDAA"], [1, "#2E8B57"]]
+color_verde_suave = [[0, "#98FB98"], [1, "#558255"]]
+
+color_rojo_intenso = [[0, "#4d1a1a"], [1, "#F44336"]]
+color_rojo_medio = [[0, "#E9967A"], [1, "#8A3232"]]
+color_rojo_suave = [[0, "#E9967A"], [1, "#9F3E3E"]]
+
+def calcular_resultados(datos_eficiencia, mascara):
+    """
+    Figuras y textos del tablero para un subconjunto de años (máscara de
+    bits). Qué intendencias aparecen sale de una reducción enmascarada sobre
+    la matriz de conteos, sin filtrar ni unir DataFrames.
+    """
+    matriz = datos_eficiencia['matriz_heatmap']
+    linea_base_global = datos_eficiencia['linea_base_global']
+
+    columnas = columnas_de_mascara(mascara, len(matriz['anios']))
+    presentes = matriz['conteo'][:, columnas].sum(axis=1) > 0
+
+    if len(columnas) == 0 or not presentes.any():
+        raise ValueError("No hay datos históricos para los años seleccionados.")
+
+    filas_arriba = np.flatnonzero(presentes & (matriz['eficiencia_2025'] >= linea_base_global))
+    filas_abajo = np.flatnonzero(presentes & (matriz['eficiencia_2025'] < linea_base_global))
+
+    fig_arriba = crear_heatmap(matriz, filas_arriba, columnas, f"<b>Intendencias con Eficiencia 2025 ≥ {linea_base_global:.1f}%</b>", color_verde_intenso, color_verde_medio, color_verde_suave)
+    fig_abajo = crear_heatmap(matriz, filas_abajo, columnas, f"<b>Intendencias con Eficiencia 2025 < {linea_base_global:.1f}%</b>", color_rojo_intenso, color_rojo_medio, color_rojo_suave)
+
+    anios = matriz['anios'][columnas]
+    anios_datos_text = f"{anios.min()} - {anios.max()}"
+    num_intendencias_text = int(presentes.sum())
+    return fig_arriba, fig_abajo, anios_datos_text, num_intendencias_text
+
+# Resultados ya calculados por (máscara de años, versión de datos)
+cache_figuras = CacheLRU('figuras_eficiencia')
+
+def precalentar_cache():
+    """
+    Calcula de antemano los resultados de todos los subconjuntos de años
+    (2^N - 1). Solo se hace si caben todos en la caché.
+    """
+    instantanea = registro_datos.obtener('eficiencia')
+    num_anios = len(instantanea.datos['matriz_heatmap']['anios'])
+    total = (1 << num_anios) - 1
+    if num_anios == 0 or total > cache_figuras.tamano_max:
+        return 0
+    for mascara in range(1, total + 1):
+        try:
+            cache_figuras.obtener((mascara, instantanea.version), lambda: calcular_resultados(instantanea.datos, mascara))
+        except ValueError:
+            pass
+    return total
+
+def _precalentar_en_segundo_plano():
+    threading.Thread(target=precalentar_cache, name='precalentar-eficiencia', daemon=True).start()
 
 # =============================================
 # CARGAR DATOS INICIALES
 # =============================================
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(script_dir, "Eficiencia_cobranzaNC_2020-2025.csv")
-    df_historico, df_2025, anios_filtrables = cargar_y_procesar_datos(csv_path)
-    
-    df_linea_base_source = df_historico[df_historico['ANIO'].between(2020, 2024)]
-    pivot_linea_base = df_linea_base_source.pivot_table(index='INTENDENCIA', columns='ANIO', values='EFICIENCIA', fill_value=0)
+def cargar_datos(rutas):
+    sumas_historico, sumas_2025, anios_filtrables = cargar_y_procesar_datos(rutas)
+
+    # Promedio por intendencia y año (0 si falta), como el pivot_table del DataFrame
+    anios = sumas_historico.index.get_level_values('ANIO')
+    sumas_linea_base = sumas_historico[(anios >= 2020) & (anios <= 2024)]
+    pivot_linea_base = (sumas_linea_base['suma'] / sumas_linea_base['conteo']).unstack('ANIO', fill_value=0)
     linea_base_global = pivot_linea_base.values.mean()
 
-except Exception as e:
-    print(f"Error al cargar datos en dashboard_eficiencia: {e}")
-    df_historico, df_2025, anios_filtrables = pd.DataFrame(), pd.DataFrame(), []
-    linea_base_global = 0
+    return {
+        'anios_filtrables': anios_filtrables,
+        'linea_base_global': linea_base_global,
+        'matriz_heatmap': construir_matriz_heatmap(sumas_historico, sumas_2025)
+    }
+
+DATOS_VACIOS = {
+    'anios_filtrables': [], 'linea_base_global': 0,
+    'matriz_heatmap': {'intendencias': np.array([], dtype=str), 'anios': np.array([], dtype=int),
+                       'suma': np.empty((0, 0)), 'conteo': np.empty((0, 0), dtype=np.int64),
+                       'promedio': np.empty((0, 0)), 'eficiencia_2025': np.array([])}
+}
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# Un CSV, un directorio de CSV o un glob (EFICIENCIA_ORIGEN); ver datos.expandir_rutas
+csv_path = os.environ.get('EFICIENCIA_ORIGEN') or os.path.join(script_dir, "Eficiencia_cobranzaNC_2020-2025.csv")
+registro_datos.registrar('eficiencia', [csv_path], cargar_datos, DATOS_VACIOS)
+registro_datos.al_cambiar('eficiencia', cache_figuras.limpiar)
+
+# Con PRECALENTAR_FIGURAS=1 se llenan las cachés tras la primera carga y cada recarga
+if os.environ.get('PRECALENTAR_FIGURAS') == '1':
+    registro_datos.al_cambiar('eficiencia', _precalentar_en_segundo_plano)
 
 # =============================================
 # ESTILOS
@@ -136,6 +259,9 @@ card_style = {
 # LAYOUT DE LA APLICACIÓN
 # =============================================
 def get_layout():
+    datos_eficiencia = registro_datos.obtener('eficiencia').datos
+    anios_filtrables = datos_eficiencia['anios_filtrables']
+    linea_base_global = datos_eficiencia['linea_base_global']
     layout = html.Div(
         className='dashboard-content',
         style={
@@ -233,41 +359,17 @@ def register_callbacks(app):
         error_content = []
         error_style = {"display": "none"}
 
+        instantanea = registro_datos.obtener('eficiencia')
+        matriz = instantanea.datos['matriz_heatmap']
+
         try:
             if not anios_sel:
-                df_filt = df_historico.copy()
-                anios_sel = anios_filtrables
-            else:
-                df_filt = df_historico[df_historico["ANIO"].isin(anios_sel)].copy()
-
-            if df_filt.empty:
-                raise ValueError("No hay datos históricos para los años seleccionados.")
-
-            df_merged = df_filt.merge(df_2025[['INTENDENCIA', 'EFICIENCIA']], on='INTENDENCIA', how='left', suffixes=['_', '_2025'])
-            df_merged['EFICIENCIA_2025'] = df_merged['EFICIENCIA_2025'].fillna(0)
-
-            intendencias_arriba = df_merged[df_merged['EFICIENCIA_2025'] >= linea_base_global]['INTENDENCIA'].unique()
-            intendencias_abajo = df_merged[df_merged['EFICIENCIA_2025'] < linea_base_global]['INTENDENCIA'].unique()
+                anios_sel = instantanea.datos['anios_filtrables']
 
-            df_arriba = df_filt[df_filt['INTENDENCIA'].isin(intendencias_arriba)]
-            df_abajo = df_filt[df_filt['INTENDENCIA'].isin(intendencias_abajo)]
-            
-            df_2025_arriba = df_2025[df_2025['INTENDENCIA'].isin(intendencias_arriba)]
-            df_2025_abajo = df_2025[df_2025['INTENDENCIA'].isin(intendencias_abajo)]
-
-            color_verde_intenso = [[0, "#4CAF50"], [1, "#1a4d1a"]]
-            color_verde_medio = [[0, "#66CDAA"], [1, "#2E8B57"]]
-            color_verde_suave = [[0, "#98FB98"], [1, "#558255"]]
-
-            color_rojo_intenso = [[0, "#4d1a1a"], [1, "#F44336"]]
-            color_rojo_medio = [[0, "#E9967A"], [1, "#8A3232"]]
-            color_rojo_suave = [[0, "#E9967A"], [1, "#9F3E3E"]]
-
-            fig_arriba = crear_heatmap(df_arriba, df_2025_arriba, f"<b>Intendencias con Eficiencia 2025 ≥ {linea_base_global:.1f}%</b>", color_verde_intenso, color_verde_medio, color_verde_suave)
-            fig_abajo = crear_heatmap(df_abajo, df_2025_abajo, f"<b>Intendencias con Eficiencia 2025 < {linea_base_global:.1f}%</b>", color_rojo_intenso, color_rojo_medio, color_rojo_suave)
-            
-            anios_datos_text = f"{min(anios_sel)} - {max(anios_sel)}"
-            num_intendencias_text = len(df_merged['INTENDENCIA'].unique())
+            mascara = mascara_anios(matriz, anios_sel)
+            fig_arriba, fig_abajo, anios_datos_text, num_intendencias_text = cache_figuras.obtener(
+                (mascara, instantanea.version), lambda: calcular_resultados(instantanea.datos, mascara)
+            )
 
             return fig_arriba, fig_abajo, anios_datos_text, num_intendencias_text, error_content, error_style
 
@@ -1,31 +1,153 @@
 import pandas as pd
 import plotly.graph_objects as go
-from dash import dcc, html, Input, Output, State, callback_context
+from dash import dcc, html, Input, Output, MATCH, ctx
+from dash.exceptions import PreventUpdate
 import os
 import json
 import numpy as np
 
+import datos
+import registro_datos
+from figuras import podar_plantilla
+
 # =============================================
-# FUNCIÓN PARA LEER ARCHIVO
+# ÍNDICE DE MAPAS DE BITS (PREGUNTA x RESPUESTA)
 # =============================================
-def leer_archivo(ruta_xlsx):
-    # Lee un archivo de Excel. Se necesita tener instalado 'openpyxl'
-    df = pd.read_excel(ruta_xlsx)
-    df.columns = df.columns.str.strip()
-    return df
+# Cada encuestado es un bit. Para cada respuesta de cada pregunta, cada IRE y
+# cada grupo de eficiencia se guarda el mapa de bits de quienes la tienen,
+# empaquetado en palabras de 64 bits. Combinar filtros es un AND entre mapas
+# y contar las respuestas de una pregunta es un popcount por fila: unas pocas
+# operaciones vectorizadas sobre N/64 palabras, sin enmascarar el DataFrame.
+TODAS = 'Todas las intendencias'
+OPCIONES_GRUPO = [
+    {'label': 'Mayores a Línea Base', 'value': 'mayor a Linea Base'},
+    {'label': 'Menores a Línea Base', 'value': 'menor a Linea Base'},
+    {'label': 'Todas las intendencias', 'value': TODAS}
+]
+
+if hasattr(np, 'bitwise_count'):
+    _contar_bits = np.bitwise_count
+else:
+    # NumPy < 2.0: popcount con una tabla sobre los bytes de cada palabra
+    _BITS_POR_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    def _contar_bits(palabras):
+        return _BITS_POR_BYTE[palabras.view(np.uint8)]
+
+def mapas_de_bits(presencia):
+    """Matriz booleana (filas x encuestados) como mapas de bits en palabras de 64 bits."""
+    presencia = np.atleast_2d(presencia)
+    empaquetado = np.packbits(presencia, axis=1, bitorder='little')
+    palabras = np.zeros((presencia.shape[0], -(-presencia.shape[1] // 64) * 8), dtype=np.uint8)
+    palabras[:, :empaquetado.shape[1]] = empaquetado
+    return palabras.view(np.uint64)
+
+def mapas_por_codigo(codigos, num_codigos):
+    """Un mapa por código 0..num_codigos-1; los -1 (vacíos) no quedan en ninguno."""
+    return mapas_de_bits(codigos[np.newaxis, :] == np.arange(num_codigos)[:, np.newaxis])
+
+def construir_indice_respuestas(df_encuesta, columnas_graficables):
+    """Mapas de bits de la encuesta: por grupo de eficiencia, por IRE y por (pregunta, respuesta)."""
+    num_encuestados = len(df_encuesta)
+    codigos_grupo, grupos = pd.factorize(df_encuesta['grupo_eficiencia'])
+    if 'IRE' in df_encuesta.columns:
+        codigos_ire, ires = pd.factorize(df_encuesta['IRE'], sort=True)
+    else:
+        codigos_ire, ires = np.full(num_encuestados, -1), []
+
+    preguntas = {}
+    for col in columnas_graficables:
+        codigos, respuestas = pd.factorize(df_encuesta[col])
+        preguntas[col] = {'respuestas': np.asarray(respuestas, dtype=str), 'bits': mapas_por_codigo(codigos, len(respuestas))}
+
+    return {
+        'todos': mapas_de_bits(np.ones(num_encuestados, dtype=bool))[0],
+        'grupos': list(grupos),
+        'bits_grupos': mapas_por_codigo(codigos_grupo, len(grupos)),
+        'ires': [str(ire) for ire in ires],
+        'bits_ires': mapas_por_codigo(codigos_ire, len(ires)),
+        'preguntas': preguntas
+    }
+
+def _union(bits, filas):
+    # OR de las filas elegidas; sin filas, el mapa vacío
+    return np.bitwise_or.reduce(bits[filas], axis=0) if len(filas) else np.zeros(bits.shape[1], dtype=np.uint64)
+
+def mascara_encuestados(indice, grupo, ires=None, filtros=None, excluir=None):
+    """
+    Mapa de bits de los encuestados del grupo de eficiencia, de alguna de las
+    IRE elegidas (todas si no hay) y que, en cada pregunta de filtros
+    ({pregunta: respuestas}), dieron alguna de esas respuestas. La pregunta
+    excluir no se filtra: su propio gráfico sigue mostrando todas sus respuestas.
+    """
+    if grupo == TODAS:
+        mascara = indice['todos']
+    elif grupo in indice['grupos']:
+        mascara = indice['bits_grupos'][indice['grupos'].index(grupo)]
+    else:
+        return np.zeros_like(indice['todos'])
+
+    if ires:
+        mascara = mascara & _union(indice['bits_ires'], np.flatnonzero(np.isin(indice['ires'], list(ires))))
+    for columna, respuestas in (filtros or {}).items():
+        if columna == excluir:
+            continue
+        pregunta = indice['preguntas'].get(columna)
+        if pregunta is None:
+            return np.zeros_like(indice['todos'])
+        mascara = mascara & _union(pregunta['bits'], np.flatnonzero(np.isin(pregunta['respuestas'], list(respuestas))))
+    return mascara
+
+def contar_ires(indice, mascara):
+    """IRE distintas entre los encuestados de la máscara."""
+    return int(np.count_nonzero((indice['bits_ires'] & mascara).any(axis=1)))
+
+def conteos_pregunta(indice, columna, mascara):
+    """Respuestas con al menos una aparición entre los encuestados de la máscara y sus conteos, de menor a mayor."""
+    pregunta = indice['preguntas'][columna]
+    conteos = _contar_bits(pregunta['bits'] & mascara).sum(axis=-1, dtype=np.int64)
+
+    con_respuestas = np.flatnonzero(conteos > 0)
+    orden = con_respuestas[np.argsort(conteos[con_respuestas], kind='stable')]
+    return pregunta['respuestas'][orden], conteos[orden]
+
+def filtros_de_respuestas(valores):
+    """Valores del desplegable de respuestas ('[pregunta, respuesta]' en JSON) como {pregunta: {respuestas}}."""
+    filtros = {}
+    for valor in valores or []:
+        columna, respuesta = json.loads(valor)
+        filtros.setdefault(columna, set()).add(respuesta)
+    return filtros
+
+def opciones_respuestas(indice):
+    """Opciones del desplegable de filtros por respuesta: una por cada (pregunta, respuesta)."""
+    return [
+        {'label': f'{columna}: {respuesta}', 'value': json.dumps([columna, respuesta], ensure_ascii=False)}
+        for columna, pregunta in indice['preguntas'].items()
+        for respuesta in sorted(pregunta['respuestas'])
+    ]
 
 # =============================================
 # CARGAR DATOS INICIALES
 # =============================================
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    xlsx_path = os.path.join(script_dir, "limpieza encuesta_cnc.xlsx")
-    df_encuesta = leer_archivo(xlsx_path)
+def cargar_datos(rutas):
+    return preparar_datos(datos.leer_encuesta(rutas[0]))
+
+def preparar_datos(df_encuesta):
     columnas_graficables = df_encuesta.columns[2:].tolist() # Excluir IRE y grupo_eficiencia
-except Exception as e:
-    print(f"Error al cargar datos en dashboard_encuesta: {e}")
-    df_encuesta = pd.DataFrame()
-    columnas_graficables = []
+    return {
+        'df_encuesta': df_encuesta,
+        'columnas_graficables': columnas_graficables,
+        'indice_respuestas': construir_indice_respuestas(df_encuesta, columnas_graficables)
+    }
+
+DATOS_VACIOS = {
+    'df_encuesta': pd.DataFrame(), 'columnas_graficables': [],
+    'indice_respuestas': construir_indice_respuestas(pd.DataFrame({'grupo_eficiencia': []}), [])
+}
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+xlsx_path = os.path.join(script_dir, "limpieza encuesta_cnc.xlsx")
+registro_datos.registrar('encuesta', [xlsx_path], cargar_datos, DATOS_VACIOS)
 
 # =============================================
 # ESTILOS Y COLORES
@@ -40,19 +162,6 @@ control_panel_style = {
     'borderRadius': '10px', 'boxShadow': '0 2px 4px rgba(0, 0, 0, 0.2)',
 }
 
-# Estilo base para los botones de filtro de preguntas
-button_style = {
-    'backgroundColor': '#333333', 'color': 'white', 'padding': '8px 15px',
-    'borderRadius': '5px', 'cursor': 'pointer', 'border': '1px solid #444',
-    'transition': 'all 0.2s ease-in-out'
-}
-
-# Estilo para el botón cuando está seleccionado (activo)
-button_selected_style = {
-    **button_style,
-    'backgroundColor': '#00FFFF', 'color': 'black', 'border': '1px solid #00FFFF'
-}
-
 # Estilo para las tarjetas que contienen cada gráfico
 graph_card_style = {
     'backgroundColor': '#333333', 'padding': '20px', 'borderRadius': '10px',
@@ -73,49 +182,58 @@ color_celeste = "#A98700" # Color para la barra más alta (respuesta más común
 color_neutro = '#888888' # Color para las otras barras
 color_neutro2 = "#7D7D7D" # Color para las otras barras
 
+# Estilo de las etiquetas de respuesta dentro de cada barra.
+# El blanco contrasta bien con los colores oscuros que usamos (celeste y gris).
+estilo_etiqueta_respuesta = dict(
+    xref='x', yref='y',
+    font=dict(family='Arial, sans-serif', size=13, color='white'),
+    showarrow=False,
+    xanchor='left'
+)
+
 # =============================================
 # FUNCIÓN PARA CREAR GRÁFICO
 # =============================================
-def crear_grafico_barras_horizontales(df, columna):
-    # Contar la frecuencia de cada respuesta y ordenarlas de mayor a menor para el gráfico
-    counts = df[columna].value_counts().sort_values(ascending=True)
-
-    # Calcular porcentajes
-    total_responses = counts.sum()
-    percentages = (counts.values / total_responses * 100) if total_responses > 0 else [0] * len(counts)
+def figura_pendiente(columna):
+    # Lo que muestra una tarjeta hasta que entra en pantalla y llega su gráfico
+    return {
+        'layout': {
+            'title': {'text': f'<b>{columna}</b>', 'x': 0.14, 'xanchor': 'left', 'font': {'size': 16}},
+            'height': 300,
+            'paper_bgcolor': 'rgba(0,0,0,0)', 'plot_bgcolor': 'rgba(0,0,0,0)',
+            'font': {'color': 'white', 'family': 'Arial, sans-serif'},
+            'xaxis': {'visible': False}, 'yaxis': {'visible': False}
+        }
+    }
 
-    # Asignar colores: un color destacado para la barra más alta (la última, por el sort_values)
-    colors = [color_neutro2] * (len(counts) - 1) + [color_celeste]
+def crear_grafico_barras_horizontales(respuestas, conteos, columna):
+    # respuestas y conteos llegan ya ordenados de menor a mayor (ver conteos_pregunta)
+    total_responses = conteos.sum()
+    percentages = (conteos / total_responses * 100) if total_responses > 0 else np.zeros(len(conteos))
 
-    # Crear un DataFrame para facilitar el manejo en Plotly
-    df_grafico = pd.DataFrame({
-        'respuesta': counts.index,
-        'valores': counts.values,
-        'porcentaje': percentages,
-        'color': colors
-    })
+    # Asignar colores: un color destacado para la barra más alta (la última, por el orden ascendente)
+    colors = np.full(len(conteos), color_neutro2, dtype=object)
+    if len(colors):
+        colors[-1] = color_celeste
 
     fig = go.Figure()
 
-    # --- Lógica para texto y hover ---
-    text_values = []
-    hover_templates = []
-    for _, row in df_grafico.iterrows():
-        # Si la barra es muy corta (ej. < 15%), el texto del porcentaje solo se muestra en el hover.
-        if row['porcentaje'] < 21:
-            text_values.append('') # No mostrar texto en la barra
-            hover_templates.append(f"Porcentaje: {row['porcentaje']:.1f}%<br>Cantidad: <b>{row['valores']}</b><extra></extra>")
-        else:
-            text_values.append(f"{row['porcentaje']:.1f}%")
-            hover_templates.append(f"<br>Cantidad: <b>{row['valores']}</b><extra></extra>")
-
-    # Agregar barras horizontales
+    # --- Lógica para texto y hover (vectorizada) ---
+    # Si la barra es muy corta (< 21%), el texto del porcentaje solo se muestra en el hover.
+    # El hover es una sola plantilla: el prefijo de porcentaje va en hovertext
+    # (vacío en las barras largas) y la cantidad en customdata, en binario.
+    cortas = percentages < 21
+    porcentajes_txt = np.char.mod('%.1f', percentages)
+    text_values = np.where(cortas, '', np.char.add(porcentajes_txt, '%'))
+    hover_prefijos = np.where(cortas, np.char.add(np.char.add('Porcentaje: ', porcentajes_txt), '%'), '')
+
+    # Agregar barras horizontales (el largo de la barra no necesita más que float32)
     fig.add_trace(go.Bar(
-        y=df_grafico['respuesta'],
-        x=df_grafico['porcentaje'],
+        y=respuestas,
+        x=percentages.astype(np.float32),
         orientation='h',
         marker=dict(
-            color=df_grafico['color'],
+            color=colors,
             line=dict(width=0),
             cornerradius=8
         ),
@@ -126,7 +244,9 @@ def crear_grafico_barras_horizontales(df, columna):
             color='white',
             family='Arial, sans-serif'
         ),
-        hovertemplate=hover_templates,
+        hovertext=hover_prefijos,
+        customdata=conteos,
+        hovertemplate='%{hovertext}<br>Cantidad: <b>%{customdata:d}</b><extra></extra>',
         hoverlabel=dict(
             bgcolor=color_celeste, # Color de fondo del hover
             font=dict(color='black') # Color de la fuente del hover para contraste
@@ -135,21 +255,16 @@ def crear_grafico_barras_horizontales(df, columna):
     ))
 
     # --- Anotaciones para etiquetas de respuesta dentro de la barra ---
-    annotations = []
-    for i, row in df_grafico.iterrows():
-        # El color de la etiqueta debe contrastar con el fondo de la barra.
-        # Para los colores oscuros que usamos (celeste y gris), el blanco funciona bien.
-        label_color = 'white'
-
-        annotations.append(dict(
-            xref='x', yref='y',
+    # El estilo común va una sola vez en la plantilla (annotationdefaults, ver
+    # más abajo); cada anotación lleva solo su posición y su texto.
+    annotations = [
+        dict(
             x=2,  # Posicionar la etiqueta ligeramente a la derecha del inicio de la barra
-            y=row['respuesta'],
-            text=f"<b>{row['respuesta']}</b>",
-            font=dict(family='Arial, sans-serif', size=13, color=label_color),
-            showarrow=False,
-            xanchor='left',
-        ))
+            y=respuesta,
+            text=f"<b>{respuesta}</b>"
+        )
+        for respuesta in respuestas
+    ]
 
     # Configurar layout moderno y limpio
     fig.update_layout(
@@ -163,12 +278,12 @@ def crear_grafico_barras_horizontales(df, columna):
         paper_bgcolor='rgba(0,0,0,0)',
         font=dict(color='white', family='Arial, sans-serif'),
         margin=dict(l=90, r=30, t=60, b=40), # Aumentar margen derecho de los gráficos
-        height=max(300, len(counts.index) * 50 + 60),
+        height=max(300, len(respuestas) * 50 + 60),
         xaxis=dict(
             showgrid=False,
             showticklabels=False,
             zeroline=False,
-            range=[0, max(df_grafico['porcentaje']) * 1.40] # Aumentar espacio para texto fuera de la barra
+            range=[0, (percentages.max() if len(percentages) else 1) * 1.40] # Aumentar espacio para texto fuera de la barra
         ),
         yaxis=dict(
             showgrid=False,
@@ -178,18 +293,79 @@ def crear_grafico_barras_horizontales(df, columna):
         annotations=annotations
     )
 
-    return fig
+    figura = podar_plantilla(fig.to_dict())
+    plantilla = figura['layout']['template']['layout']
+    plantilla['annotationdefaults'] = {**plantilla.get('annotationdefaults', {}), **estilo_etiqueta_respuesta}
+    return figura
 
 # =============================================
 # LAYOUT DE LA APLICACIÓN
 # =============================================
+# Las preguntas se recorren por páginas. Cada página trae solo tarjetas vacías
+# (figura_pendiente); el gráfico de cada tarjeta lo pide su propio callback
+# (por id patrón) cuando la tarjeta entra en pantalla, lo que detecta
+# assets/tarjetas_perezosas.js poniendo en true su store 'visible-encuesta'.
+PREGUNTAS_POR_PAGINA = 20
+
+def opciones_paginas(num_preguntas):
+    return [
+        {'label': f'Preguntas {inicio + 1}–{min(inicio + PREGUNTAS_POR_PAGINA, num_preguntas)} de {num_preguntas}',
+         'value': inicio // PREGUNTAS_POR_PAGINA}
+        for inicio in range(0, num_preguntas, PREGUNTAS_POR_PAGINA)
+    ]
+
+def tarjeta_pregunta(posicion, columna):
+    # Los ids llevan la posición de la pregunta en columnas_graficables
+    return html.Div(
+        id={'type': 'tarjeta-encuesta', 'index': posicion},
+        className='tarjeta-perezosa-encuesta',
+        style=graph_card_style,
+        children=[
+            dcc.Store(id={'type': 'visible-encuesta', 'index': posicion}),
+            dcc.Store(id={'type': 'pedido-encuesta', 'index': posicion}),
+            dcc.Graph(id={'type': 'grafico-encuesta', 'index': posicion}, figure=figura_pendiente(columna), config={'displayModeBar': False})
+        ]
+    )
+
+def tarjeta_estadisticas():
+    # Tarjeta de estadísticas con un estilo consistente al resto del proyecto.
+    # Va al inicio para que el orden de los gráficos sea ascendente.
+    return html.Div(
+        style={**graph_card_style, 'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'center', 'alignItems': 'center', 'gap': '10px'},
+        children=[
+            # Fila superior con dos tarjetas
+            html.Div(
+                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%', 'gap': '10px'},
+                children=[
+                    # Tarjeta de participantes (la cifra depende de los filtros)
+                    html.Div(style=stat_card_style, children=[
+                        html.H4(id='total-ires-encuesta', style={"margin": "0", "fontSize": "36px", "color": "#00FFFF"}),
+                        html.P("Intendencias participantes", style={"margin": "5px 0 0 0", "fontSize": "14px", "color": "white"})
+                    ]),
+                    # Tarjeta de no participantes
+                    html.Div(style=stat_card_style, children=[
+                        html.H4("3", style={"margin": "0", "fontSize": "36px", "color": "#00FFFF"}),
+                        html.P("No participaron", style={"margin": "5px 0 0 0", "fontSize": "14px", "color": "white"})
+                    ]),
+                ]
+            ),
+            # Fila inferior con una tarjeta
+            html.Div(
+                style={**stat_card_style, 'width': '100%', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'boxSizing': 'border-box'},
+                children=[
+                    html.P("Encuesta realizada por UCEC - 12/08/2025", style={'color': '#D3D3D3', 'fontSize': '12px'})
+                ]
+            )
+        ]
+    )
+
 def get_layout():
+    datos_encuesta = registro_datos.obtener('encuesta').datos
+    indice = datos_encuesta['indice_respuestas']
     layout = html.Div(
         className='dashboard-content',
         style={"backgroundColor": "#2c2c2c", "color": "white", "padding": "10px", "fontFamily": "Arial, sans-serif"},
         children=[
-            # Almacén de datos en el lado del cliente para guardar el estado del filtro de preguntas
-            dcc.Store(id='store-question-filter-encuesta', data='primeras'),
             # Panel de control principal con filtros
             html.Div(
                 style={
@@ -201,31 +377,56 @@ def get_layout():
                         style={"display": "flex", "alignItems": "center", "gap": "15px", "flexWrap": "wrap", "justifyContent": "center"},
                         children=[
                             html.Div(
-                                # Contenedor para los botones de filtro de preguntas
-                                id='panel-botones-encuesta',
+                                # Contenedor del selector de página de preguntas
+                                id='panel-paginas-encuesta',
                                 style=control_panel_style,
                                 children=[
-                                    html.Button('Las primeras 5 preguntas', id='btn-primeras-5-encuesta', n_clicks=0, style=button_style),
-                                    html.Button('Las últimas 5 preguntas', id='btn-ultimas-5-encuesta', n_clicks=0, style=button_style),
+                                    dcc.Dropdown(
+                                        id='dropdown-pagina-encuesta',
+                                        options=opciones_paginas(len(datos_encuesta['columnas_graficables'])),
+                                        value=0,
+                                        clearable=False,
+                                        searchable=False,
+                                        style={'color': '#000', 'backgroundColor': '#ADD8E6', 'minWidth': '250px'}
+                                    )
                                 ]
                             ),
                             # Dropdown para filtrar por grupo de eficiencia
                             dcc.Dropdown(
                                 id="dropdown-filter-encuesta",
-                                options=[
-                                    {'label': 'Mayores a Línea Base', 'value': 'mayor a Linea Base'},
-                                    {'label': 'Menores a Línea Base', 'value': 'menor a Linea Base'},
-                                    {'label': 'Todas las intendencias', 'value': 'Todas las intendencias'}
-                                ],
-                                value='Todas las intendencias',
+                                options=OPCIONES_GRUPO,
+                                value=TODAS,
                                 clearable=False,
                                 style={'color': '#000', 'backgroundColor': '#ADD8E6', 'minWidth': '250px', 'flex': '1'}
                             )
                         ]
+                    ),
+                    # Filtros cruzados: se combinan entre sí y con el grupo, y se
+                    # aplican a todas las preguntas salvo a la propia pregunta filtrada
+                    html.Div(
+                        style={"display": "flex", "alignItems": "center", "gap": "15px", "flexWrap": "wrap", "justifyContent": "center", "marginTop": "10px"},
+                        children=[
+                            dcc.Dropdown(
+                                id="dropdown-ire-encuesta",
+                                options=[{'label': ire, 'value': ire} for ire in indice['ires']],
+                                value=[],
+                                multi=True,
+                                placeholder='Todas las IRE',
+                                style={'color': '#000', 'backgroundColor': '#ADD8E6', 'minWidth': '250px', 'flex': '1'}
+                            ),
+                            dcc.Dropdown(
+                                id="dropdown-respuestas-encuesta",
+                                options=opciones_respuestas(indice),
+                                value=[],
+                                multi=True,
+                                placeholder='Encuestados que respondieron...',
+                                style={'color': '#000', 'backgroundColor': '#ADD8E6', 'minWidth': '250px', 'flex': '2'}
+                            )
+                        ]
                     )
                 ]
             ),
-            # Contenedor donde se renderizarán los gráficos
+            # Contenedor de las tarjetas: estadísticas y, a continuación, las de la página
             html.Div(
                 id='graficos-encuesta-container', 
                 style={
@@ -233,7 +434,12 @@ def get_layout():
                     'flexWrap': 'wrap', 'justifyContent': 'space-around',
                     # Se agrega un margen horizontal para que las tarjetas no lleguen a los bordes de la página.
                     'margin': '0 40px'
-                }
+                },
+                children=[
+                    tarjeta_estadisticas(),
+                    # display: contents deja las tarjetas de la página en el mismo flex que la de estadísticas
+                    html.Div(id='tarjetas-encuesta', style={'display': 'contents'})
+                ]
             )
         ]
     )
@@ -243,98 +449,65 @@ def get_layout():
 # CALLBACKS
 # =============================================
 def register_callbacks(app):
-    # Callback para actualizar el filtro de preguntas (primeras/últimas 5) en el dcc.Store
+    # Tarjetas (vacías) de la página elegida
     @app.callback(
-        Output('store-question-filter-encuesta', 'data'),
-        [Input('btn-primeras-5-encuesta', 'n_clicks'),
-         Input('btn-ultimas-5-encuesta', 'n_clicks')],
-        prevent_initial_call=True
+        Output('tarjetas-encuesta', 'children'),
+        Input('dropdown-pagina-encuesta', 'value')
     )
-    def update_question_filter(btn_primeras, btn_ultimas):
-        ctx = callback_context
-        if not ctx.triggered:
-            return 'primeras'
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        if button_id == 'btn-ultimas-5-encuesta':
-            return 'ultimas'
-        return 'primeras'
-
-    # Callback para actualizar el estilo de los botones según el filtro seleccionado
-    @app.callback(
-        [Output('btn-primeras-5-encuesta', 'style'),
-         Output('btn-ultimas-5-encuesta', 'style')],
-        [Input('store-question-filter-encuesta', 'data')]
-    )
-    def update_button_styles(selected_filter):
-        if selected_filter == 'primeras':
-            return button_selected_style, button_style
-        elif selected_filter == 'ultimas':
-            return button_style, button_selected_style
-        return button_style, button_style
-
-    # Callback principal para generar y actualizar los gráficos
-    @app.callback(
-        Output("graficos-encuesta-container", "children"),
-        [Input("store-question-filter-encuesta", "data"),
-         Input("dropdown-filter-encuesta", "value")]
-    )
-    def actualizar_graficos_encuesta(question_filter, selected_filter):
-        if df_encuesta.empty:
+    def mostrar_pagina_encuesta(pagina):
+        datos_encuesta = registro_datos.obtener('encuesta').datos
+        if datos_encuesta['df_encuesta'].empty:
             return [html.P("No se pudieron cargar los datos de la encuesta.")]
 
-        df_filtered = df_encuesta.copy()
-        if selected_filter != 'Todas las intendencias':
-            df_filtered = df_encuesta[df_encuesta['grupo_eficiencia'] == selected_filter]
-
-        # --- Tarjeta de Estadísticas Adicional ---
-        # Se crea una tarjeta extra con información resumida.
-        # Se coloca al inicio para que el orden de los gráficos sea ascendente.
-        
-        # Calcular el número de participantes únicos según el filtro actual
-        total_ires = df_filtered['IRE'].nunique() if 'IRE' in df_filtered.columns else 0
-
-        # Crear la tarjeta de estadísticas con un estilo consistente al resto del proyecto
-        stats_card = html.Div(
-            style={**graph_card_style, 'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'center', 'alignItems': 'center', 'gap': '10px'},
-            children=[
-                # Fila superior con dos tarjetas
-                html.Div(
-                    style={'display': 'flex', 'justifyContent': 'center', 'width': '100%', 'gap': '10px'},
-                    children=[
-                        # Tarjeta de participantes
-                        html.Div(style=stat_card_style, children=[
-                            html.H4(f"{total_ires}", style={"margin": "0", "fontSize": "36px", "color": "#00FFFF"}),
-                            html.P("Intendencias participantes", style={"margin": "5px 0 0 0", "fontSize": "14px", "color": "white"})
-                        ]),
-                        # Tarjeta de no participantes
-                        html.Div(style=stat_card_style, children=[
-                            html.H4("3", style={"margin": "0", "fontSize": "36px", "color": "#00FFFF"}),
-                            html.P("No participaron", style={"margin": "5px 0 0 0", "fontSize": "14px", "color": "white"})
-                        ]),
-                    ]
-                ),
-                # Fila inferior con una tarjeta
-                html.Div(
-                    style={**stat_card_style, 'width': '100%', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'boxSizing': 'border-box'},
-                    children=[
-                        html.P("Encuesta realizada por UCEC - 12/08/2025", style={'color': '#D3D3D3', 'fontSize': '12px'})
-                    ]
-                )
-            ]
-        )
+        columnas_graficables = datos_encuesta['columnas_graficables']
+        inicio = (pagina or 0) * PREGUNTAS_POR_PAGINA
+        return [tarjeta_pregunta(i, columnas_graficables[i]) for i in range(inicio, min(inicio + PREGUNTAS_POR_PAGINA, len(columnas_graficables)))]
 
-        children_elements = [stats_card]
+    # Número de participantes únicos según los filtros actuales
+    @app.callback(
+        Output('total-ires-encuesta', 'children'),
+        [Input("dropdown-filter-encuesta", "value"),
+         Input("dropdown-ire-encuesta", "value"),
+         Input("dropdown-respuestas-encuesta", "value")]
+    )
+    def actualizar_estadisticas_encuesta(selected_filter, ires_sel, respuestas_sel):
+        indice = registro_datos.obtener('encuesta').datos['indice_respuestas']
+        mascara = mascara_encuestados(indice, selected_filter, ires_sel, filtros_de_respuestas(respuestas_sel))
+        return f"{contar_ires(indice, mascara)}"
 
-        if question_filter == 'primeras':
-            preguntas_a_mostrar = columnas_graficables[:5]
-        else:
-            preguntas_a_mostrar = columnas_graficables[-5:]
+    # Pedido de gráfico de cada tarjeta: solo si ya se vio (visible) y cada vez
+    # que cambian los filtros. Se resuelve en el navegador, así que las
+    # tarjetas que nadie ha mirado no llegan al servidor.
+    app.clientside_callback(
+        """
+        function(visible, grupo, ires, respuestas) {
+            if (!visible) {
+                return window.dash_clientside.no_update;
+            }
+            return {grupo: grupo, ires: ires || [], respuestas: respuestas || []};
+        }
+        """,
+        Output({'type': 'pedido-encuesta', 'index': MATCH}, 'data'),
+        [Input({'type': 'visible-encuesta', 'index': MATCH}, 'data'),
+         Input("dropdown-filter-encuesta", "value"),
+         Input("dropdown-ire-encuesta", "value"),
+         Input("dropdown-respuestas-encuesta", "value")],
+        prevent_initial_call=True
+    )
 
-        for col in preguntas_a_mostrar:
-            grafico_div = html.Div(
-                dcc.Graph(figure=crear_grafico_barras_horizontales(df_filtered, col), config={'displayModeBar': False}),
-                style=graph_card_style
-            )
-            children_elements.append(grafico_div)
-        
-        return children_elements
+    # Gráfico de una pregunta con los filtros del pedido
+    @app.callback(
+        Output({'type': 'grafico-encuesta', 'index': MATCH}, 'figure'),
+        Input({'type': 'pedido-encuesta', 'index': MATCH}, 'data'),
+        prevent_initial_call=True
+    )
+    def actualizar_grafico_encuesta(pedido):
+        datos_encuesta = registro_datos.obtener('encuesta').datos
+        posicion = ctx.outputs_list['id']['index']
+        if not 0 <= posicion < len(datos_encuesta['columnas_graficables']):
+            # Los datos se recargaron con menos preguntas que la página abierta
+            raise PreventUpdate
+        col = datos_encuesta['columnas_graficables'][posicion]
+        indice = datos_encuesta['indice_respuestas']
+        mascara = mascara_encuestados(indice, pedido['grupo'], pedido['ires'], filtros_de_respuestas(pedido['respuestas']), excluir=col)
+        return crear_grafico_barras_horizontales(*conteos_pregunta(indice, col, mascara), col)
@@ -0,0 +1,312 @@
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+from dash import dcc, html, dash_table, Input, Output
+from dash.dash_table.Format import Format, Group, Scheme
+import os
+
+import datos
+import registro_datos
+from cache import CacheLRU
+from figuras import podar_plantilla
+
+# =============================================
+# CARGAR Y PROCESAR DATOS
+# =============================================
+def cargar_y_procesar_datos(rutas):
+    # Sumas por año e intendencia, en pandas o en SQLite según EFICIENCIA_BACKEND
+    return datos.agregar_eficiencia(rutas, derivaciones=('DENOMINADOR', 'sum'), cancelados=('NUMERADOR', 'sum'))
+
+# =============================================
+# PANEL DE TENDENCIAS (INTENDENCIA x AÑO)
+# =============================================
+# Todas las métricas se calculan una sola vez por versión de datos, como
+# operaciones de ventana agrupadas por intendencia sobre el panel ordenado
+# por (INTENDENCIA, ANIO); el callback solo elige el año y ordena.
+VENTANA_MOVIL = 3
+# Año incompleto (como en los otros tableros): tiene variación interanual pero no entra en la CAGR
+ANIO_EN_CURSO = 2025
+TOTAL = 'TOTAL'
+
+def construir_panel(sumas):
+    """
+    Panel (INTENDENCIA, ANIO) con derivaciones, cancelados, eficiencia, sus
+    variaciones interanuales y la eficiencia móvil de VENTANA_MOVIL años.
+    Incluye la fila TOTAL (todas las intendencias), con las mismas cuentas.
+    sumas viene indexado por (ANIO, INTENDENCIA).
+    """
+    medidas = sumas[['derivaciones', 'cancelados']].astype(np.float64)
+    total = medidas.groupby(level='ANIO').sum()
+    total.index = pd.MultiIndex.from_product([total.index, [TOTAL]], names=['ANIO', 'INTENDENCIA'])
+    panel = pd.concat([medidas, total]).swaplevel().sort_index()
+
+    # Panel rectangular: un año sin datos queda en NaN en lugar de acortar la ventana
+    completo = pd.MultiIndex.from_product(
+        [panel.index.unique('INTENDENCIA'), sorted(panel.index.unique('ANIO'))], names=['INTENDENCIA', 'ANIO'])
+    panel = panel.reindex(completo)
+    panel['eficiencia'] = _porcentaje(panel['cancelados'], panel['derivaciones'])
+
+    por_intendencia = panel.groupby(level='INTENDENCIA', sort=False)
+    variaciones = por_intendencia[['derivaciones', 'cancelados']].pct_change(fill_method=None) * 100
+    panel['var_derivaciones'] = variaciones['derivaciones'].replace([np.inf, -np.inf], np.nan)
+    panel['var_cancelados'] = variaciones['cancelados'].replace([np.inf, -np.inf], np.nan)
+    panel['delta_eficiencia'] = por_intendencia['eficiencia'].diff()
+    # Eficiencia de la ventana como cociente de sumas (no promedio de porcentajes)
+    moviles = por_intendencia[['cancelados', 'derivaciones']].rolling(VENTANA_MOVIL, min_periods=VENTANA_MOVIL).sum()
+    moviles = moviles.droplevel(0)
+    panel['eficiencia_movil'] = _porcentaje(moviles['cancelados'], moviles['derivaciones'])
+    return panel
+
+def _porcentaje(numerador, denominador):
+    return (numerador / denominador.where(denominador > 0)) * 100
+
+def construir_cagr(panel):
+    """
+    Tasa de crecimiento anual compuesta (%) de derivaciones y cancelados de
+    cada intendencia, desde su primer año con datos hasta el último año
+    completo del panel. Devuelve (DataFrame por INTENDENCIA, último año
+    completo) o (None, None) si no hay al menos dos años completos.
+    """
+    anios_completos = [a for a in panel.index.unique('ANIO') if a < ANIO_EN_CURSO]
+    if len(anios_completos) < 2:
+        return None, None
+    fin = anios_completos[-1]
+    historico = panel.loc[panel.index.get_level_values('ANIO') < ANIO_EN_CURSO, ['derivaciones', 'cancelados']]
+    positivos = historico.where(historico > 0)
+    inicial = positivos.groupby(level='INTENDENCIA').first()
+    # Año de ese primer valor, por columna
+    anio = historico.index.get_level_values('ANIO').to_numpy()
+    primeros = pd.DataFrame({col: np.where(positivos[col].notna(), anio, np.nan) for col in positivos},
+                            index=historico.index).groupby(level='INTENDENCIA').min()
+    periodos = (fin - primeros).where(lambda p: p > 0)
+    final = historico.xs(fin, level='ANIO')
+    cagr = ((final / inicial) ** (1 / periodos) - 1) * 100
+    return cagr.add_prefix('cagr_'), int(fin)
+
+# =============================================
+# MÉTRICAS (COLUMNAS DE LA TABLA Y DEL RANKING)
+# =============================================
+def etiquetas_metricas(fin_cagr):
+    return {
+        'derivaciones': 'Derivaciones',
+        'var_derivaciones': 'Var. % derivaciones',
+        'cancelados': 'Cancelados',
+        'var_cancelados': 'Var. % cancelados',
+        'eficiencia': 'Eficiencia %',
+        'delta_eficiencia': 'Δ eficiencia (pp)',
+        'eficiencia_movil': f'Eficiencia móvil {VENTANA_MOVIL} años %',
+        'cagr_derivaciones': f'CAGR derivaciones hasta {fin_cagr} %',
+        'cagr_cancelados': f'CAGR cancelados hasta {fin_cagr} %'
+    }
+
+METRICAS_ENTERAS = {'derivaciones', 'cancelados'}
+METRICA_INICIAL = 'delta_eficiencia'
+
+def construir_tablas(panel, cagr):
+    """Por año: las métricas de cada intendencia (sin TOTAL) y la fila TOTAL, ya redondeadas para mostrar."""
+    tablas = {}
+    for anio in panel.index.unique('ANIO'):
+        tabla = panel.xs(anio, level='ANIO')
+        if cagr is not None:
+            tabla = tabla.join(cagr)
+        tabla = tabla.round({col: 0 if col in METRICAS_ENTERAS else 1 for col in tabla.columns})
+        tablas[int(anio)] = {'intendencias': tabla.drop(index=TOTAL), 'total': tabla.loc[TOTAL]}
+    return tablas
+
+# =============================================
+# FUNCIONES PARA CREAR GRÁFICOS
+# =============================================
+def crear_grafico_ranking(tabla, total, metrica, etiqueta, anio_sel):
+    # Las barras horizontales se dibujan de abajo hacia arriba: la primera del ranking queda arriba
+    serie = tabla[metrica].dropna().sort_values(ascending=True)
+    valores = serie.to_numpy()
+    formato = ',.0f' if metrica in METRICAS_ENTERAS else '.1f'
+
+    fig = go.Figure(go.Bar(
+        x=valores, y=serie.index.astype(str), orientation='h',
+        marker_color=np.where(valores < 0, '#FFA500', '#00FFFF'),
+        texttemplate=f'%{{x:{formato}}}', textposition='outside', cliponaxis=False,
+        hovertemplate=f'%{{y}}: %{{x:{formato}}}<extra></extra>'
+    ))
+    if pd.notna(total[metrica]):
+        fig.add_vline(x=float(total[metrica]), line_dash='dot', line_color='#B1B1B1',
+                      annotation_text=f'Total {total[metrica]:{formato}}', annotation_font_color='#B1B1B1')
+
+    sin_dato = len(tabla) - len(serie)
+    fig.update_layout(
+        title=f'{etiqueta} | {anio_sel}' + (f' ({sin_dato} sin dato)' if sin_dato else ''),
+        paper_bgcolor="#2c2c2c",
+        plot_bgcolor="#2c2c2c",
+        font_color="white",
+        height=max(400, 24 * len(serie) + 100),
+        showlegend=False,
+        margin=dict(t=50, b=30, l=80, r=60)
+    )
+    fig.update_xaxes(showgrid=False, zeroline=True, zerolinecolor='#555555', showticklabels=False)
+    fig.update_yaxes(showgrid=False, tickfont=dict(size=11))
+    return fig
+
+def resultados_tendencias(datos_tendencias, anio_sel, metrica):
+    """(figura del ranking como dict, filas de la tabla, tarjetas) de un año y métrica."""
+    celda = datos_tendencias['tablas'][anio_sel]
+    etiquetas = etiquetas_metricas(datos_tendencias['fin_cagr'])
+    tabla, total = celda['intendencias'], celda['total']
+    fig = crear_grafico_ranking(tabla, total, metrica, etiquetas[metrica], anio_sel)
+
+    # NaN -> None: celda vacía en la tabla
+    planilla = tabla.reset_index()
+    filas = planilla.astype(object).where(planilla.notna(), None).to_dict('records')
+
+    mejoran = int((tabla['delta_eficiencia'] > 0).sum())
+    con_dato = int(tabla['delta_eficiencia'].notna().sum())
+    delta_total = total['delta_eficiencia']
+    cagr_total = total.get('cagr_cancelados', np.nan)
+    tarjetas = [
+        (f"{total['eficiencia']:.1f}%" if pd.notna(total['eficiencia']) else '-',
+         f"Eficiencia total {anio_sel}" + (f" ({delta_total:+.1f} pp)" if pd.notna(delta_total) else '')),
+        (f"{mejoran} / {con_dato}", "Intendencias que mejoran su eficiencia"),
+        (f"{cagr_total:+.1f}%" if pd.notna(cagr_total) else '-', etiquetas['cagr_cancelados'].replace(' %', '') + ' (total)')
+    ]
+    return podar_plantilla(fig.to_dict()), filas, tarjetas
+
+# =============================================
+# CARGAR DATOS INICIALES
+# =============================================
+def cargar_datos(rutas):
+    panel = construir_panel(cargar_y_procesar_datos(rutas))
+    cagr, fin_cagr = construir_cagr(panel)
+    anios = [int(a) for a in panel.index.unique('ANIO')]
+    completos = [a for a in anios if a < ANIO_EN_CURSO]
+    return {
+        'anios': anios,
+        # Se abre en el último año completo: la variación del año en curso compara un año parcial
+        'anio_inicial': completos[-1] if completos else anios[-1],
+        'fin_cagr': fin_cagr,
+        'tablas': construir_tablas(panel, cagr)
+    }
+
+DATOS_VACIOS = {'anios': [], 'anio_inicial': None, 'fin_cagr': None, 'tablas': {}}
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# Un CSV, un directorio de CSV o un glob (EFICIENCIA_ORIGEN); ver datos.expandir_rutas
+csv_path = os.environ.get('EFICIENCIA_ORIGEN') or os.path.join(script_dir, "Eficiencia_cobranzaNC_2020-2025.csv")
+registro_datos.registrar('tendencias', [csv_path], cargar_datos, DATOS_VACIOS)
+
+# Resultados ya construidos por (año, métrica, versión de datos)
+cache_figuras = CacheLRU('figuras_tendencias')
+registro_datos.al_cambiar('tendencias', cache_figuras.limpiar)
+
+# =============================================
+# ESTILOS
+# =============================================
+card_style = {
+    'backgroundColor': '#333333', 'padding': '20px', 'borderRadius': '10px',
+    'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.4)', 'textAlign': 'center', 'flex': '1', 'margin': '0 10px'
+}
+dropdown_style = {'color': '#000', 'backgroundColor': '#ADD8E6', 'minWidth': '200px', 'flex': '1'}
+
+def metricas_disponibles(fin_cagr):
+    # Sin dos años completos no hay CAGR
+    return {metrica: etiqueta for metrica, etiqueta in etiquetas_metricas(fin_cagr).items()
+            if fin_cagr is not None or not metrica.startswith('cagr_')}
+
+def columnas_tabla(fin_cagr):
+    columnas = [{'name': 'Intendencia', 'id': 'INTENDENCIA'}]
+    for metrica, etiqueta in metricas_disponibles(fin_cagr).items():
+        formato = (Format(group=Group.yes, precision=0, scheme=Scheme.fixed) if metrica in METRICAS_ENTERAS
+                   else Format(precision=1, scheme=Scheme.fixed))
+        columnas.append({'name': etiqueta, 'id': metrica, 'type': 'numeric', 'format': formato})
+    return columnas
+
+# =============================================
+# LAYOUT DE LA APLICACIÓN
+# =============================================
+def get_layout():
+    datos_tendencias = registro_datos.obtener('tendencias').datos
+    fin_cagr = datos_tendencias['fin_cagr']
+    layout = html.Div(
+        className='dashboard-content',
+        style={"backgroundColor": "#2c2c2c", "color": "white", "padding": "10px", "fontFamily": "Arial, sans-serif"},
+        children=[
+            html.Div(
+                style={
+                    "backgroundColor": "#1a1a1a", "padding": "10px", "borderRadius": "10px",
+                    "marginBottom": "10px", "boxShadow": "0 4px 6px rgba(0, 0, 0, 0.3)",
+                    "display": "flex", "alignItems": "center", "gap": "15px", "flexWrap": "wrap"
+                },
+                children=[
+                    html.Label("Año:", style={"fontSize": "16px", "fontWeight": "500"}),
+                    dcc.Dropdown(
+                        id='dropdown-anio-tendencias',
+                        options=[{'label': str(a), 'value': a} for a in datos_tendencias['anios']],
+                        value=datos_tendencias['anio_inicial'],
+                        clearable=False,
+                        style=dropdown_style
+                    ),
+                    html.Label("Ordenar por:", style={"fontSize": "16px", "fontWeight": "500"}),
+                    dcc.Dropdown(
+                        id='dropdown-metrica-tendencias',
+                        options=[{'label': etiqueta, 'value': metrica} for metrica, etiqueta in metricas_disponibles(fin_cagr).items()],
+                        value=METRICA_INICIAL,
+                        clearable=False,
+                        style=dropdown_style
+                    )
+                ]
+            ),
+
+            html.Div(style={"padding": "5px 20px"}, children=[
+                html.Div(id='stats-panel-tendencias', style={"display": "flex", "justifyContent": "center", "alignItems": "stretch", "margin": "5px 0"}),
+                dcc.Graph(id='grafico-ranking-tendencias'),
+                # El orden de la tabla lo cambia el navegador al pulsar cada columna, sin ir al servidor
+                dash_table.DataTable(
+                    id='tabla-tendencias',
+                    columns=columnas_tabla(fin_cagr),
+                    sort_action='native',
+                    style_table={'overflowX': 'auto', 'marginTop': '10px'},
+                    style_header={'backgroundColor': '#1a1a1a', 'color': 'white', 'fontWeight': 'bold', 'border': '1px solid #444'},
+                    style_cell={'backgroundColor': '#333333', 'color': 'white', 'border': '1px solid #444',
+                                'fontFamily': 'Arial, sans-serif', 'padding': '6px'},
+                    style_data_conditional=[
+                        {'if': {'filter_query': f'{{{col}}} < 0', 'column_id': col}, 'color': '#FFA500'}
+                        for col in ['var_derivaciones', 'var_cancelados', 'delta_eficiencia', 'cagr_derivaciones', 'cagr_cancelados']
+                    ]
+                )
+            ])
+        ]
+    )
+    return layout
+
+# =============================================
+# CALLBACKS
+# =============================================
+def register_callbacks(app):
+    @app.callback(
+        [Output('grafico-ranking-tendencias', 'figure'),
+         Output('tabla-tendencias', 'data'),
+         Output('tabla-tendencias', 'sort_by'),
+         Output('stats-panel-tendencias', 'children')],
+        [Input('dropdown-anio-tendencias', 'value'),
+         Input('dropdown-metrica-tendencias', 'value')]
+    )
+    def actualizar_tendencias(anio_sel, metrica):
+        fig_empty = go.Figure().update_layout(paper_bgcolor="#2c2c2c", plot_bgcolor="#2c2c2c", font_color="white")
+
+        # Instantánea vigente de los datos (puede cambiar entre peticiones)
+        instantanea = registro_datos.obtener('tendencias')
+        if anio_sel is None or int(anio_sel) not in instantanea.datos['tablas']:
+            return fig_empty, [], [], []
+        # Una métrica que no está en el desplegable (cliente desactualizado o petición armada a mano)
+        if metrica not in metricas_disponibles(instantanea.datos['fin_cagr']):
+            return fig_empty, [], [], []
+
+        fig, filas, tarjetas = cache_figuras.obtener(
+            (int(anio_sel), metrica, instantanea.version), lambda: resultados_tendencias(instantanea.datos, int(anio_sel), metrica)
+        )
+
+        stats_cards = [
+            html.Div(style=card_style, children=[
+                html.H4(valor, style={"margin": "0", "fontSize": "36px", "color": "#00FFFF"}),
+                html.P(texto, style={"margin": "5px 0 0 0", "fontSize": "14px"})
+            ]) for valor, texto in tarjetas
+        ]
+        return fig, filas, [{'column_id': metrica, 'direction': 'desc'}], stats_cards
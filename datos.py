@@ -0,0 +1,770 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import glob
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+
+# =============================================
+# CACHÉ COLUMNAR EN DISCO (SIDECAR)
+# =============================================
+# Junto a cada archivo fuente se guarda una copia binaria por columnas
+# ("<archivo>.cache.bin"). La copia se valida con la fecha de modificación,
+# el tamaño y el hash del archivo fuente, de modo que los arranques en frío y
+# los reinicios de workers no vuelven a parsear el CSV mientras no cambie.
+#
+# Las columnas van con tipos compactos (texto como categoría con códigos
+# int8/int16, enteros en el menor tipo que los contiene, decimales en float32
+# cuando no se pierde nada) y alineadas, y se leen mapeando el archivo en
+# memoria: los workers de gunicorn que leen el mismo sidecar comparten sus
+# páginas físicas en lugar de tener cada uno su copia.
+VERSION_SIDECAR = 4
+MAGIA_SIDECAR = b'SIDECAR3'
+ALINEACION = 64
+TAMANO_BLOQUE_HASH = 1 << 20
+
+def ruta_sidecar(ruta):
+    return f"{ruta}.cache.bin"
+
+def hash_archivo(ruta):
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def firma_archivo(ruta):
+    st = os.stat(ruta)
+    return {'mtime_ns': st.st_mtime_ns, 'tamano': st.st_size}
+
+def _alinear(n):
+    return -(-n // ALINEACION) * ALINEACION
+
+def _entero_minimo(minimo, maximo):
+    for tipo in (np.int8, np.int16, np.int32):
+        info = np.iinfo(tipo)
+        if info.min <= minimo and maximo <= info.max:
+            return np.dtype(tipo)
+    return np.dtype(np.int64)
+
+def _valores_compactos(valores):
+    """Los mismos valores en el tipo más chico que los representa exactamente."""
+    if valores.dtype.kind == 'i' and len(valores):
+        return valores.astype(_entero_minimo(valores.min(), valores.max()), copy=False)
+    if valores.dtype == np.float64:
+        reducidos = valores.astype(np.float32)
+        if np.array_equal(reducidos, valores, equal_nan=True):
+            return reducidos
+    return valores
+
+def _guardar_sidecar(ruta_cache, df, meta):
+    # Columnas de texto como códigos + categorías para no depender de pickle.
+    # El código -1 marca los valores vacíos.
+    arrays = {}
+    columnas = []
+    for col in df.columns:
+        serie = df[col]
+        i = len(columnas)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = np.asarray(serie.cat.categories, dtype=str)
+            arrays[f"v_{i}"] = serie.cat.codes.to_numpy().astype(_entero_minimo(-1, len(categorias)), copy=False)
+            arrays[f"c_{i}"] = categorias
+            columnas.append({'nombre': col, 'tipo': 'categoria'})
+        elif pd.api.types.is_numeric_dtype(serie):
+            arrays[f"v_{i}"] = _valores_compactos(serie.to_numpy())
+            columnas.append({'nombre': col, 'tipo': 'numerico'})
+        else:
+            # Categorías ordenadas: agrupar por la columna da el mismo orden que con el texto
+            codigos, categorias = pd.factorize(serie, sort=True)
+            arrays[f"v_{i}"] = codigos.astype(_entero_minimo(-1, len(categorias)))
+            arrays[f"c_{i}"] = np.asarray(categorias, dtype=str)
+            columnas.append({'nombre': col, 'tipo': 'texto'})
+
+    # Cabecera JSON y luego cada arreglo tal cual, alineado a ALINEACION bytes
+    arrays = {nombre: np.ascontiguousarray(valores) for nombre, valores in arrays.items()}
+    cabecera = {'meta': {**meta, 'version': VERSION_SIDECAR, 'columnas': columnas}, 'arreglos': {}}
+    desplazamiento = 0
+    for nombre, valores in arrays.items():
+        cabecera['arreglos'][nombre] = {'dtype': valores.dtype.str, 'shape': list(valores.shape), 'offset': desplazamiento}
+        desplazamiento = _alinear(desplazamiento + valores.nbytes)
+    texto = json.dumps(cabecera).encode('utf-8')
+
+    # Escritura atómica: otro worker nunca ve un archivo a medio escribir
+    ruta_tmp = f"{ruta_cache}.{os.getpid()}.tmp"
+    with open(ruta_tmp, 'wb') as f:
+        f.write(MAGIA_SIDECAR + np.uint64(len(texto)).astype('<u8').tobytes() + texto)
+        inicio = _alinear(f.tell())
+        for nombre, valores in arrays.items():
+            f.seek(inicio + cabecera['arreglos'][nombre]['offset'])
+            f.write(valores.tobytes())
+        f.truncate(inicio + desplazamiento)
+    os.replace(ruta_tmp, ruta_cache)
+
+def _abrir_sidecar(ruta_cache):
+    """(meta, arreglos) de un sidecar, con los arreglos mapeados en memoria y de solo lectura."""
+    mapa = np.memmap(ruta_cache, dtype=np.uint8, mode='r')
+    if bytes(mapa[:8]) != MAGIA_SIDECAR:
+        raise ValueError(f"{ruta_cache} no es un sidecar de esta versión")
+    largo = int(mapa[8:16].view('<u8')[0])
+    cabecera = json.loads(bytes(mapa[16:16 + largo]).decode('utf-8'))
+    inicio = _alinear(16 + largo)
+    arreglos = {}
+    for nombre, arreglo in cabecera['arreglos'].items():
+        arreglos[nombre] = np.frombuffer(
+            mapa, dtype=np.dtype(arreglo['dtype']), count=int(np.prod(arreglo['shape'])),
+            offset=inicio + arreglo['offset']
+        ).reshape(arreglo['shape'])
+    meta = cabecera['meta']
+    return (meta if meta.get('version') == VERSION_SIDECAR else None), arreglos
+
+def _df_desde_sidecar(arreglos, meta):
+    datos = {}
+    for i, col in enumerate(meta['columnas']):
+        valores = arreglos[f"v_{i}"]
+        if col['tipo'] in ('categoria', 'texto'):
+            valores = pd.Categorical.from_codes(valores, categories=arreglos[f"c_{i}"])
+        datos[col['nombre']] = valores
+    # copy=False: las columnas siguen apuntando al archivo mapeado (solo lectura)
+    return pd.DataFrame(datos, copy=False)
+
+# Último hash conocido de cada archivo junto con la firma con la que se calculó
+_hashes = {}
+
+def hash_vigente(ruta):
+    """
+    Hash del contenido de ruta sin releer el archivo si ya se conoce: primero
+    se busca en memoria y luego en el sidecar, siempre que la firma coincida.
+    """
+    ruta = os.path.abspath(ruta)
+    firma = firma_archivo(ruta)
+    conocido = _hashes.get(ruta)
+    if conocido is not None and conocido[0] == firma:
+        return conocido[1]
+    try:
+        meta, _ = _abrir_sidecar(ruta_sidecar(ruta))
+        if meta is not None and meta['mtime_ns'] == firma['mtime_ns'] and meta['tamano'] == firma['tamano']:
+            _hashes[ruta] = (firma, meta['hash'])
+            return meta['hash']
+    except (OSError, ValueError, KeyError):
+        pass
+    hash_actual = hash_archivo(ruta)
+    _hashes[ruta] = (firma, hash_actual)
+    return hash_actual
+
+def leer_con_sidecar(ruta, parsear):
+    """
+    Devuelve (parsear(ruta), hash), usando el sidecar si sigue siendo válido.
+    El DataFrame sale del sidecar mapeado en memoria (columnas compactas y de
+    solo lectura), también recién parseado si el sidecar se pudo escribir.
+    """
+    df, hash_actual, firma = _leer_con_sidecar(ruta, parsear)
+    _hashes[os.path.abspath(ruta)] = (firma, hash_actual)
+    return df, hash_actual
+
+def _leer_con_sidecar(ruta, parsear):
+    firma = firma_archivo(ruta)
+    ruta_cache = ruta_sidecar(ruta)
+    hash_actual = None
+
+    try:
+        meta, arreglos = _abrir_sidecar(ruta_cache)
+        # Un sidecar hecho con otro parser (p. ej. lectura entera vs. por
+        # bloques) tiene otra forma: no sirve aunque el archivo sea el mismo
+        if meta is not None and meta.get('parser') != parsear.__name__:
+            meta = None
+        if meta is not None:
+            if meta['mtime_ns'] == firma['mtime_ns'] and meta['tamano'] == firma['tamano']:
+                return _df_desde_sidecar(arreglos, meta), meta['hash'], firma
+            # La fecha cambió (p. ej. se copió el archivo): se confirma por contenido
+            hash_actual = hash_archivo(ruta)
+            if meta['hash'] == hash_actual:
+                df = _df_desde_sidecar(arreglos, meta)
+                _guardar_sidecar_seguro(ruta_cache, df, {**firma, 'hash': hash_actual, 'parser': parsear.__name__})
+                return df, hash_actual, firma
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if hash_actual is None:
+        hash_actual = hash_archivo(ruta)
+    df = parsear(ruta)
+    if _guardar_sidecar_seguro(ruta_cache, df, {**firma, 'hash': hash_actual, 'parser': parsear.__name__}):
+        # Se sigue con la copia mapeada: la misma que usarán los demás workers
+        try:
+            meta, arreglos = _abrir_sidecar(ruta_cache)
+            if meta is not None and meta['hash'] == hash_actual and meta.get('parser') == parsear.__name__:
+                df = _df_desde_sidecar(arreglos, meta)
+        except (OSError, ValueError, KeyError):
+            pass
+    return df, hash_actual, firma
+
+def _guardar_sidecar_seguro(ruta_cache, df, meta):
+    # Si la carpeta no admite escritura se sigue sin caché
+    try:
+        _guardar_sidecar(ruta_cache, df, meta)
+        return True
+    except OSError as e:
+        print(f"No se pudo escribir la caché {ruta_cache}: {e}")
+        return False
+
+# =============================================
+# ARCHIVO DE EFICIENCIA (CSV)
+# =============================================
+# Con INGESTA_FILAS_POR_BLOQUE=<n> el CSV se lee por bloques de n filas y se
+# acumula por (INTENDENCIA, ANIO[, MES]): sirve para exportaciones mensuales o
+# por caso de decenas de millones de filas, con memoria acotada por el bloque.
+# Con 0 (por defecto) se lee entero, como siempre.
+FILAS_POR_BLOQUE = int(os.environ.get('INGESTA_FILAS_POR_BLOQUE', '0'))
+
+# El archivo se describe una sola vez (encabezados aceptados, tipo de cada
+# columna, separador, decimal) y se lee con el parser C de pandas ya con esos
+# tipos: los números se convierten al tokenizar, sin pasar por texto. Una
+# fila con un valor vacío o inválido no se rellena con 0: se rechaza y queda
+# en el reporte de rechazos ("<archivo>.rechazos.json").
+class Columna(NamedTuple):
+    nombre: str                # nombre en el DataFrame
+    tipo: str                  # 'texto', 'entero' o 'decimal'
+    alias: tuple = ()          # otros encabezados con que puede venir
+    obligatoria: bool = True   # si falta en el encabezado, el archivo no se lee
+    por_defecto: object = None # valor de la columna opcional cuando no viene
+
+class Esquema(NamedTuple):
+    columnas: tuple
+    separador: str
+    codificacion: str
+    decimal: object            # ',' o '.'; None: se deduce de las primeras filas
+    anio_minimo: int           # las filas anteriores se descartan (no son rechazos)
+
+ESQUEMA_EFICIENCIA = Esquema(
+    columnas=(
+        Columna('INTENDENCIA', 'texto'),
+        Columna('ANIO', 'entero', alias=('AÑO',)),
+        Columna('MES', 'entero', obligatoria=False),
+        Columna('NUMERADOR', 'entero'),
+        Columna('DENOMINADOR', 'entero'),
+        Columna('EFICIENCIA', 'decimal', alias=('Porcentaje de Eficiencia',), obligatoria=False, por_defecto=1.0)
+    ),
+    separador=';',
+    codificacion='latin1',
+    decimal=None,
+    anio_minimo=2020
+)
+FILAS_MUESTRA_DECIMAL = 1000
+MAX_EJEMPLOS_RECHAZO = 100
+
+def _columnas_presentes(ruta_csv, esquema):
+    """{encabezado tal como viene en el archivo: Columna} de las columnas del esquema."""
+    encabezado = pd.read_csv(ruta_csv, sep=esquema.separador, encoding=esquema.codificacion, nrows=0).columns
+    por_nombre = {nombre: columna for columna in esquema.columnas for nombre in (columna.nombre,) + columna.alias}
+    presentes = {}
+    for original in encabezado:
+        columna = por_nombre.get(original.strip())
+        if columna is not None and columna not in presentes.values():
+            presentes[original] = columna
+    faltan = [c.nombre for c in esquema.columnas if c.obligatoria and c not in presentes.values()]
+    if faltan:
+        raise ValueError(f"{ruta_csv}: faltan las columnas {', '.join(faltan)}")
+    return presentes
+
+def _detectar_decimal(ruta_csv, esquema, presentes):
+    # Con ';' como separador una coma en un número solo puede ser la decimal
+    numericas = [original for original, columna in presentes.items() if columna.tipo != 'texto']
+    muestra = pd.read_csv(ruta_csv, sep=esquema.separador, encoding=esquema.codificacion,
+                          usecols=numericas, dtype=str, nrows=FILAS_MUESTRA_DECIMAL)
+    return ',' if any(muestra[col].str.contains(',', regex=False).any() for col in muestra.columns) else '.'
+
+def _a_numero(texto, decimal):
+    texto = texto.str.strip()
+    if decimal != '.':
+        # Con coma decimal un punto no es válido: "1.234" sería ambiguo
+        texto = texto.where(~texto.str.contains('.', regex=False, na=False)).str.replace(decimal, '.', regex=False)
+    return pd.to_numeric(texto, errors='coerce').astype(np.float64)
+
+def reporte_vacio(ruta_csv):
+    return {'archivo': os.path.basename(ruta_csv), **firma_archivo(ruta_csv), 'decimal': None,
+            'filas': 0, 'validas': 0, 'fuera_de_periodo': 0, 'rechazadas': 0, 'motivos': {}, 'ejemplos': []}
+
+def _validar_bloque(bloque, presentes, esquema, decimal, primera_fila, reporte):
+    """Filas válidas del bloque, ya con los nombres y tipos del esquema; los rechazos van al reporte."""
+    bloque = bloque.rename(columns={original: columna.nombre for original, columna in presentes.items()})
+    motivos = pd.Series(None, index=bloque.index, dtype=object)
+    for columna in presentes.values():
+        valores = bloque[columna.nombre]
+        if columna.tipo == 'texto':
+            problemas = [(valores.isna(), f"{columna.nombre} vacío")]
+        else:
+            if pd.api.types.is_numeric_dtype(valores):
+                numeros = valores
+                invalidos = pd.Series(False, index=valores.index)
+            else:
+                # Lectura tolerante (ver bloques_eficiencia): el texto se convierte aquí
+                numeros = _a_numero(valores, decimal)
+                invalidos = numeros.isna() & valores.notna() & valores.str.strip().ne('')
+            problemas = [(numeros.isna() & ~invalidos, f"{columna.nombre} vacío"),
+                         (invalidos, f"{columna.nombre} no numérico")]
+            if columna.tipo == 'entero':
+                problemas.append((numeros.notna() & (numeros % 1 != 0), f"{columna.nombre} no entero"))
+            bloque[columna.nombre] = numeros
+        # Cada fila rechazada cuenta una vez, con el primer motivo encontrado
+        for mascara, motivo in problemas:
+            motivos = motivos.mask(mascara & motivos.isna(), motivo)
+
+    rechazadas = motivos.notna().to_numpy()
+    reporte['filas'] += len(bloque)
+    if rechazadas.any():
+        reporte['rechazadas'] += int(rechazadas.sum())
+        for motivo, cantidad in motivos[rechazadas].value_counts().items():
+            reporte['motivos'][motivo] = reporte['motivos'].get(motivo, 0) + int(cantidad)
+        # fila: número de fila de datos en el archivo (1 = la primera tras el encabezado)
+        for posicion in np.flatnonzero(rechazadas)[:MAX_EJEMPLOS_RECHAZO - len(reporte['ejemplos'])]:
+            reporte['ejemplos'].append({'fila': primera_fila + int(posicion), 'motivo': motivos.iloc[posicion]})
+        bloque = bloque[~rechazadas]
+
+    en_periodo = (bloque['ANIO'] >= esquema.anio_minimo).to_numpy()
+    reporte['fuera_de_periodo'] += int(len(bloque) - en_periodo.sum())
+    bloque = bloque[en_periodo]
+    reporte['validas'] += len(bloque)
+
+    for columna in esquema.columnas:
+        if columna.nombre not in bloque.columns:
+            if columna.por_defecto is not None:
+                bloque[columna.nombre] = columna.por_defecto
+        elif columna.tipo == 'entero':
+            bloque[columna.nombre] = bloque[columna.nombre].astype(np.int64)
+        elif columna.tipo == 'texto' and isinstance(bloque[columna.nombre].dtype, pd.CategoricalDtype):
+            bloque[columna.nombre] = bloque[columna.nombre].cat.remove_unused_categories()
+    return bloque
+
+def _lector(ruta_csv, opciones, filas_por_bloque):
+    if filas_por_bloque is None:
+        yield pd.read_csv(ruta_csv, **opciones)
+        return
+    with pd.read_csv(ruta_csv, chunksize=filas_por_bloque, **opciones) as lector:
+        yield from lector
+
+def bloques_eficiencia(ruta_csv, reporte, filas_por_bloque=None, texto='category', esquema=ESQUEMA_EFICIENCIA):
+    """
+    Bloques válidos del CSV según el esquema (uno solo, el archivo entero, si
+    filas_por_bloque es None), con el texto como texto ('category' o str).
+    Los rechazos y conteos se acumulan en reporte (ver reporte_vacio).
+    """
+    presentes = _columnas_presentes(ruta_csv, esquema)
+    decimal = esquema.decimal or _detectar_decimal(ruta_csv, esquema, presentes)
+    reporte['decimal'] = decimal
+    opciones = {
+        'sep': esquema.separador, 'encoding': esquema.codificacion, 'engine': 'c', 'decimal': decimal,
+        'usecols': list(presentes),
+        'dtype': {original: (texto if columna.tipo == 'texto' else np.float64) for original, columna in presentes.items()}
+    }
+
+    bloques = _lector(ruta_csv, opciones, filas_por_bloque)
+    leidos = filas = 0
+    estricto = True
+    while True:
+        try:
+            bloque = next(bloques)
+        except StopIteration:
+            return
+        except ValueError:
+            if not estricto:
+                raise
+            # Un valor no numérico: desde este bloque se lee la columna como
+            # texto y se convierte aparte, para saber qué filas rechazar
+            estricto = False
+            bloques.close()
+            tolerante = {**opciones, 'dtype': {original: (texto if columna.tipo == 'texto' else str)
+                                               for original, columna in presentes.items()}}
+            bloques = itertools.islice(_lector(ruta_csv, tolerante, filas_por_bloque), leidos, None)
+            continue
+        leidos += 1
+        validas = _validar_bloque(bloque, presentes, esquema, decimal, filas + 1, reporte)
+        filas += len(bloque)
+        yield validas
+
+def ruta_reporte_rechazos(ruta):
+    return f"{ruta}.rechazos.json"
+
+def _guardar_reporte(ruta_csv, reporte):
+    if reporte['rechazadas']:
+        print(f"{ruta_csv}: {reporte['rechazadas']} de {reporte['filas']} filas rechazadas {reporte['motivos']}")
+    ruta = ruta_reporte_rechazos(ruta_csv)
+    ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=1)
+        os.replace(ruta_tmp, ruta)
+    except OSError as e:
+        print(f"No se pudo escribir el reporte {ruta}: {e}")
+
+def reporte_rechazos(ruta_csv):
+    """Reporte de la última lectura de ruta_csv, o None si no hay o el archivo cambió desde entonces."""
+    ruta_csv = os.path.abspath(ruta_csv)
+    try:
+        with open(ruta_reporte_rechazos(ruta_csv), encoding='utf-8') as f:
+            reporte = json.load(f)
+    except (OSError, ValueError):
+        return None
+    firma = firma_archivo(ruta_csv)
+    if reporte.get('mtime_ns') != firma['mtime_ns'] or reporte.get('tamano') != firma['tamano']:
+        return None
+    return reporte
+
+def parsear_eficiencia(ruta_csv):
+    reporte = reporte_vacio(ruta_csv)
+    df = next(bloques_eficiencia(ruta_csv, reporte))
+    _guardar_reporte(ruta_csv, reporte)
+    return df.reset_index(drop=True)
+
+def parsear_eficiencia_por_bloques(ruta_csv, filas_por_bloque=None):
+    """
+    Lee el CSV por bloques y devuelve solo el agregado por (INTENDENCIA,
+    ANIO[, MES]): sumas de NUMERADOR y DENOMINADOR y la EFICIENCIA que
+    resulta de ellas (en %, con un decimal, como en el archivo anual).
+    En memoria nunca hay más que un bloque y las sumas acumuladas.
+    """
+    filas_por_bloque = filas_por_bloque or FILAS_POR_BLOQUE or 1_000_000
+    reporte = reporte_vacio(ruta_csv)
+    acumulado = None
+    claves = None
+    tipos = {}
+    # Texto como str: las categorías de cada bloque serían distintas
+    for bloque in bloques_eficiencia(ruta_csv, reporte, filas_por_bloque, texto=str):
+        if claves is None:
+            claves = ['INTENDENCIA', 'ANIO'] + (['MES'] if 'MES' in bloque.columns else [])
+        parcial = bloque.groupby(claves)[['NUMERADOR', 'DENOMINADOR']].sum()
+        for col, tipo in parcial.dtypes.items():
+            tipos[col] = np.result_type(tipos.get(col, tipo), tipo)
+        acumulado = parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+    _guardar_reporte(ruta_csv, reporte)
+
+    if acumulado is None:
+        return pd.DataFrame(columns=['INTENDENCIA', 'ANIO', 'NUMERADOR', 'DENOMINADOR', 'EFICIENCIA'])
+    # add() con fill_value pasa los enteros a float: se vuelve al tipo leído
+    df = acumulado.astype(tipos).reset_index()
+    if 'MES' in df.columns:
+        df['MES'] = df['MES'].astype(int)
+    denominador = df['DENOMINADOR'].to_numpy(dtype=float)
+    df['EFICIENCIA'] = np.round(np.divide(df['NUMERADOR'].to_numpy(dtype=float) * 100, denominador,
+                                          out=np.zeros(len(df)), where=denominador > 0), 1)
+    return df
+
+def parseador_eficiencia():
+    """Parser del CSV de eficiencia que corresponde a la configuración (entero o por bloques)."""
+    return parsear_eficiencia_por_bloques if FILAS_POR_BLOQUE > 0 else parsear_eficiencia
+
+# Copia ya cargada por proceso: los dashboards que leen el mismo CSV la comparten
+_cargados = {}
+_lock_cargados = threading.Lock()
+
+def leer_eficiencia(rutas):
+    """
+    Lee el CSV de eficiencia (o la lista de CSV, ver combinar_eficiencia) una
+    sola vez por proceso, y cada archivo una sola vez por versión gracias a
+    su sidecar. El DataFrame devuelto es compartido: quien lo use debe
+    filtrarlo o copiarlo, nunca modificarlo.
+    """
+    rutas = _lista_rutas(rutas)
+    with _lock_cargados:
+        firmas = [firma_archivo(r) for r in rutas]
+        cargado = _cargados.get(rutas)
+        if cargado is not None and cargado[0] == firmas:
+            return cargado[1]
+        preparar_eficiencia(rutas)
+        partes = [leer_con_sidecar(r, parseador_eficiencia())[0] for r in rutas]
+        df = partes[0] if len(partes) == 1 else combinar_eficiencia(partes, rutas)
+        # Lo cargado antes con alguno de estos archivos es una versión vieja del mismo directorio
+        for clave in [c for c in _cargados if not set(c).isdisjoint(rutas)]:
+            del _cargados[clave]
+        _cargados[rutas] = (firmas, df)
+        return df
+
+# =============================================
+# BASE SQLITE (ALTERNATIVA A PANDAS)
+# =============================================
+# Con EFICIENCIA_BACKEND=sqlite los dashboards no cargan el CSV en cada worker:
+# se vuelca una vez, por bloques, a "<archivo>.sqlite" con un índice por
+# (ANIO, INTENDENCIA) y las sumas que necesitan se calculan en SQL. Como el
+# sidecar, la base guarda el hash del CSV y se rehace cuando este cambia.
+BACKEND_EFICIENCIA = os.environ.get('EFICIENCIA_BACKEND', 'pandas').lower()
+FILAS_POR_INSERCION = 200_000
+AGREGACIONES_SQL = {'sum': 'SUM', 'count': 'COUNT'}
+
+_lock_sqlite = threading.Lock()
+
+def ruta_base_sqlite(ruta):
+    return f"{ruta}.sqlite"
+
+def _conectar_lectura(ruta_db):
+    return sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+
+def _meta_base_sqlite(ruta_db):
+    try:
+        conexion = _conectar_lectura(ruta_db)
+    except sqlite3.Error:
+        return None
+    try:
+        return dict(conexion.execute("SELECT clave, valor FROM meta").fetchall())
+    except sqlite3.Error:
+        return None
+    finally:
+        conexion.close()
+
+def _bloques_eficiencia(ruta_csv, parsear):
+    # Con la lectura por bloques se vuelca el agregado (pequeño); si no, el CSV
+    # limpio bloque a bloque, sin tenerlo nunca entero en memoria
+    if parsear is parsear_eficiencia_por_bloques:
+        yield parsear(ruta_csv)
+        return
+    reporte = reporte_vacio(ruta_csv)
+    yield from bloques_eficiencia(ruta_csv, reporte, FILAS_POR_INSERCION, texto=str)
+    _guardar_reporte(ruta_csv, reporte)
+
+def construir_base_sqlite(ruta_csv, parsear=None):
+    """Vuelca el CSV de eficiencia a su base SQLite (con índice y metadatos). Devuelve los metadatos."""
+    ruta_csv = os.path.abspath(ruta_csv)
+    parsear = parsear or parseador_eficiencia()
+    ruta_db = ruta_base_sqlite(ruta_csv)
+    hash_actual = hash_vigente(ruta_csv)
+
+    # Tipo de cada columna numérica en el conjunto, para devolver las sumas con
+    # el mismo tipo que daría pandas (SQLite no distingue 2 de 2.0)
+    tipos = {}
+    ruta_tmp = f"{ruta_db}.{os.getpid()}.{threading.get_ident()}.tmp"
+    conexion = sqlite3.connect(ruta_tmp)
+    try:
+        for bloque in _bloques_eficiencia(ruta_csv, parsear):
+            for col in bloque.select_dtypes('number').columns:
+                tipos[col] = str(np.result_type(tipos.get(col, bloque[col].dtype), bloque[col].dtype))
+            bloque.to_sql('eficiencia', conexion, if_exists='append', index=False)
+        conexion.execute("CREATE TABLE IF NOT EXISTS eficiencia (INTENDENCIA TEXT, ANIO INTEGER, "
+                         "NUMERADOR REAL, DENOMINADOR REAL, EFICIENCIA REAL)")
+        conexion.execute("CREATE INDEX idx_eficiencia_anio_intendencia ON eficiencia (ANIO, INTENDENCIA)")
+        meta = {'hash': hash_actual, 'parser': parsear.__name__, 'version': str(VERSION_SIDECAR), 'tipos': json.dumps(tipos)}
+        conexion.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        conexion.executemany("INSERT INTO meta VALUES (?, ?)", list(meta.items()))
+        conexion.commit()
+    except BaseException:
+        conexion.close()
+        os.remove(ruta_tmp)
+        raise
+    conexion.close()
+    # Escritura atómica, como el sidecar
+    os.replace(ruta_tmp, ruta_db)
+    return meta
+
+def _base_sqlite_vigente(meta, ruta_csv, parsear):
+    return (meta is not None and meta.get('hash') == hash_vigente(ruta_csv) and meta.get('parser') == parsear.__name__
+            and meta.get('version') == str(VERSION_SIDECAR))
+
+def base_sqlite(ruta_csv):
+    """(ruta, metadatos) de la base SQLite de ruta_csv, reconstruyéndola si falta o quedó vieja."""
+    ruta_csv = os.path.abspath(ruta_csv)
+    parsear = parseador_eficiencia()
+    ruta_db = ruta_base_sqlite(ruta_csv)
+    with _lock_sqlite:
+        meta = _meta_base_sqlite(ruta_db)
+        if not _base_sqlite_vigente(meta, ruta_csv, parsear):
+            meta = construir_base_sqlite(ruta_csv, parsear)
+    return ruta_db, meta
+
+def agregar_eficiencia(rutas, **columnas):
+    """
+    Agregados del CSV de eficiencia (o de la lista de CSV) por (ANIO,
+    INTENDENCIA), con la misma forma que
+    df.groupby(['ANIO', 'INTENDENCIA']).agg(**columnas) ('sum' o 'count').
+    Según EFICIENCIA_BACKEND se calculan sobre el DataFrame en memoria o en
+    SQLite; el resultado es el mismo.
+    """
+    if BACKEND_EFICIENCIA != 'sqlite':
+        df = leer_eficiencia(rutas)
+        # Las medidas compactas del sidecar (int16, float32...) se suman en 64 bits
+        medidas = {columna for columna, _ in columnas.values()}
+        df = df[['ANIO', 'INTENDENCIA', *medidas]].astype({c: np.float64 if df[c].dtype.kind == 'f' else np.int64 for c in medidas})
+        sumas = df.groupby(['ANIO', 'INTENDENCIA'], observed=True).agg(**columnas)
+        # Mismo índice que la consulta SQL: ANIO de 64 bits e INTENDENCIA como texto
+        sumas.index = pd.MultiIndex.from_arrays(
+            [sumas.index.get_level_values('ANIO').astype(np.int64), sumas.index.get_level_values('INTENDENCIA').astype(str)],
+            names=['ANIO', 'INTENDENCIA']
+        )
+        return sumas
+
+    rutas = _lista_rutas(rutas)
+    preparar_eficiencia(rutas)
+    selecciones = ', '.join(f'{AGREGACIONES_SQL[funcion]}("{columna}") AS "{nombre}"'
+                            for nombre, (columna, funcion) in columnas.items())
+    consulta = (f"SELECT ANIO, INTENDENCIA, {selecciones} FROM eficiencia "
+                "GROUP BY ANIO, INTENDENCIA ORDER BY ANIO, INTENDENCIA")
+    partes = []
+    for ruta_csv in rutas:
+        ruta_db, meta = base_sqlite(ruta_csv)
+        conexion = _conectar_lectura(ruta_db)
+        try:
+            resultado = pd.read_sql_query(consulta, conexion, index_col=['ANIO', 'INTENDENCIA'])
+        finally:
+            conexion.close()
+        tipos = json.loads(meta['tipos'])
+        partes.append(resultado.astype({nombre: tipos.get(columna, 'float64') if funcion == 'sum' else 'int64'
+                                        for nombre, (columna, funcion) in columnas.items()}))
+    if len(partes) == 1:
+        return partes[0]
+    # La misma regla que combinar_eficiencia, ya sobre los agregados de cada
+    # archivo: cada (ANIO, INTENDENCIA) sale del último archivo que la trae
+    sumas = pd.concat(partes[::-1])
+    return sumas[~sumas.index.duplicated(keep='first')].sort_index()
+
+# =============================================
+# VARIOS ARCHIVOS DE EFICIENCIA (DIRECTORIO O GLOB)
+# =============================================
+# El origen de la eficiencia puede ser un archivo, un directorio (todos sus
+# .csv) o un glob, p. ej. una exportación por año o por región. Cada archivo
+# tiene su propio sidecar (o base SQLite), así que al agregar o cambiar uno
+# solo se parsea ese; si hay varios pendientes se parsean en paralelo, cada
+# uno en un proceso (spawn: no hereda los locks ni los hilos del worker).
+PROCESOS_INGESTA = int(os.environ.get('INGESTA_PROCESOS', '0'))
+
+def expandir_rutas(rutas):
+    """Archivos de rutas, en orden: cada directorio aporta sus .csv y cada glob lo que encuentre (por nombre)."""
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(sorted(glob.glob(os.path.join(glob.escape(ruta), '*.csv'))))
+        elif glob.has_magic(ruta):
+            archivos.extend(sorted(p for p in glob.glob(ruta) if os.path.isfile(p)))
+        else:
+            archivos.append(ruta)
+    return archivos
+
+def _lista_rutas(rutas):
+    rutas = tuple(os.path.abspath(r) for r in ([rutas] if isinstance(rutas, str) else rutas))
+    if not rutas:
+        raise ValueError("No hay archivos de eficiencia")
+    return rutas
+
+def combinar_eficiencia(partes, rutas):
+    """
+    Une los DataFrames de varios archivos (en el orden de rutas) con las
+    mismas categorías. Si una (INTENDENCIA, ANIO) viene en más de un archivo
+    se quedan solo las filas del último: una exportación nueva reemplaza lo
+    que traía la anterior para esa intendencia y año, sin sumarse.
+    """
+    for ruta, parte in zip(rutas[1:], partes[1:]):
+        if set(parte.columns) != set(partes[0].columns):
+            raise ValueError(f"{ruta}: columnas {list(parte.columns)} distintas de las de {rutas[0]} {list(partes[0].columns)}")
+
+    columnas = {}
+    for col in partes[0].columns:
+        series = [parte[col] for parte in partes]
+        if all(isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+            # Categorías unidas y ordenadas, como las deja el sidecar
+            columnas[col] = pd.api.types.union_categoricals(series, sort_categories=True)
+        else:
+            columnas[col] = np.concatenate([s.to_numpy() for s in series])
+    df = pd.DataFrame(columnas)
+
+    origen = np.repeat(np.arange(len(partes)), [len(parte) for parte in partes])
+    ultimo = pd.Series(origen).groupby([df['INTENDENCIA'], df['ANIO']], observed=True).transform('max').to_numpy()
+    vigentes = origen == ultimo
+    if not vigentes.all():
+        print(f"Eficiencia: {int((~vigentes).sum())} filas reemplazadas por archivos posteriores con la misma (INTENDENCIA, ANIO)")
+        df = df[vigentes].reset_index(drop=True)
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+def _archivo_al_dia(ruta):
+    # Sin parsear: el sidecar (o la base SQLite) ya corresponde al archivo actual
+    parsear = parseador_eficiencia()
+    if BACKEND_EFICIENCIA == 'sqlite':
+        return _base_sqlite_vigente(_meta_base_sqlite(ruta_base_sqlite(ruta)), ruta, parsear)
+    try:
+        meta, _ = _abrir_sidecar(ruta_sidecar(ruta))
+    except (OSError, ValueError, KeyError):
+        return False
+    firma = firma_archivo(ruta)
+    return (meta is not None and meta.get('parser') == parsear.__name__
+            and meta['mtime_ns'] == firma['mtime_ns'] and meta['tamano'] == firma['tamano'])
+
+def _preparar_archivo(ruta):
+    if BACKEND_EFICIENCIA == 'sqlite':
+        base_sqlite(ruta)
+    else:
+        leer_con_sidecar(ruta, parseador_eficiencia())
+
+def preparar_eficiencia(rutas):
+    """
+    Deja al día el sidecar (o la base SQLite) de cada archivo, parseando en
+    paralelo los que cambiaron. Con uno solo pendiente no se arma el pool: lo
+    parsea quien lo lea. Devuelve los archivos que estaban pendientes.
+    """
+    pendientes = [r for r in rutas if not _archivo_al_dia(r)]
+    procesos = min(len(pendientes), PROCESOS_INGESTA or os.cpu_count() or 1)
+    if procesos > 1:
+        try:
+            with ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context('spawn')) as pool:
+                list(pool.map(_preparar_archivo, pendientes))
+        except Exception as e:
+            # Lo que quede pendiente (o el error de un archivo inválido) lo
+            # encuentra luego la lectura en este proceso
+            print(f"Eficiencia: no se pudieron preparar los archivos en paralelo: {e}")
+    return pendientes
+
+# =============================================
+# ARCHIVO DE LA ENCUESTA (EXCEL)
+# =============================================
+def parsear_encuesta(ruta_xlsx):
+    # Lee un archivo de Excel. Se necesita tener instalado 'openpyxl'
+    df = pd.read_excel(ruta_xlsx)
+    df.columns = df.columns.str.strip()
+    # Cada columna de texto (IRE, grupo y respuestas) como categoría: códigos enteros compactos
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('category')
+    return df
+
+def leer_encuesta(ruta_xlsx):
+    """
+    Lee la encuesta desde su sidecar columnar; el Excel solo se abre (con
+    openpyxl, lo más lento del arranque) cuando el sidecar falta o ya no
+    corresponde al archivo.
+    """
+    df, _ = leer_con_sidecar(os.path.abspath(ruta_xlsx), parsear_encuesta)
+    return df
+
+# =============================================
+# RECONSTRUCCIÓN DE SIDECARS (LÍNEA DE COMANDOS)
+# =============================================
+PARSEADORES = {'.csv': parseador_eficiencia, '.xlsx': lambda: parsear_encuesta}
+
+def reconstruir_sidecar(ruta):
+    """Vuelve a parsear ruta y reescribe su sidecar, sea o no válido el actual."""
+    ruta = os.path.abspath(ruta)
+    parsear = PARSEADORES[os.path.splitext(ruta)[1].lower()]()
+    firma = firma_archivo(ruta)
+    hash_actual = hash_archivo(ruta)
+    df = parsear(ruta)
+    _guardar_sidecar(ruta_sidecar(ruta), df, {**firma, 'hash': hash_actual, 'parser': parsear.__name__})
+    _hashes[ruta] = (firma, hash_actual)
+    return df
+
+if __name__ == '__main__':
+    # Uso: python datos.py [archivo | directorio | glob ...]
+    # Sin argumentos reconstruye los sidecars de los archivos que usan los dashboards,
+    # p. ej. como paso previo al despliegue para que ningún worker parsee en frío.
+    import sys
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    archivos = expandir_rutas(sys.argv[1:] or [
+        os.environ.get('EFICIENCIA_ORIGEN') or os.path.join(script_dir, "Eficiencia_cobranzaNC_2020-2025.csv"),
+        os.path.join(script_dir, "limpieza encuesta_cnc.xlsx")
+    ])
+    for archivo in archivos:
+        df = reconstruir_sidecar(archivo)
+        print(f"{ruta_sidecar(archivo)}: {len(df)} filas, {len(df.columns)} columnas")
+        if BACKEND_EFICIENCIA == 'sqlite' and archivo.lower().endswith('.csv'):
+            construir_base_sqlite(archivo)
+            print(f"{ruta_base_sqlite(os.path.abspath(archivo))}: base SQLite reconstruida")
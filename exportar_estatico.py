@@ -0,0 +1,208 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+
+from plotly.io.json import to_json_plotly
+import plotly.offline
+
+import registro_datos
+import dashboard_derivaciones
+import dashboard_eficiencia
+import dashboard_encuesta
+
+# =============================================
+# EXPORTACIÓN ESTÁTICA DE LOS TABLEROS
+# =============================================
+# Cada estado de los filtros se construye con las mismas funciones que los
+# callbacks y se escribe como JSON junto a plantilla_estatica/ y plotly.js:
+# un sitio de solo lectura que cualquier servidor de archivos puede servir.
+script_dir = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_PLANTILLA = os.path.join(script_dir, 'plantilla_estatica')
+MAX_SUBCONJUNTOS = 1024
+
+# =============================================
+# ESTADOS A EXPORTAR
+# =============================================
+def mascaras_eficiencia(num_anios, limite):
+    """
+    Máscaras de años (ver dashboard_eficiencia.mascara_anios). Si no caben
+    todas en limite: primero la de todos los años (lo que se ve al abrir la
+    pestaña) y luego por cantidad de años creciente.
+    """
+    todas = (1 << num_anios) - 1
+    if todas <= limite:
+        return list(range(1, todas + 1))
+    mascaras = [todas]
+    for cantidad in range(1, num_anios):
+        for posiciones in itertools.combinations(range(num_anios), cantidad):
+            if len(mascaras) >= limite:
+                return mascaras
+            mascaras.append(sum(1 << p for p in posiciones))
+    return mascaras
+
+def estados(max_subconjuntos):
+    """Manifiesto del sitio y lista de (sección, estado) cuyos archivos hay que construir."""
+    datos_derivaciones = registro_datos.obtener('derivaciones').datos
+    datos_eficiencia = registro_datos.obtener('eficiencia').datos
+    datos_encuesta = registro_datos.obtener('encuesta').datos
+    matriz = datos_eficiencia['matriz_heatmap']
+    indice = datos_encuesta['indice_respuestas']
+
+    mascaras = mascaras_eficiencia(len(matriz['anios']), max_subconjuntos)
+    preguntas = datos_encuesta['columnas_graficables']
+    grupos_encuesta = dashboard_encuesta.OPCIONES_GRUPO
+
+    manifiesto = {
+        'generado': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'versiones': registro_datos.versiones(),
+        'derivaciones': {
+            'anios': [int(a) for a in datos_derivaciones['anios_filtrables']],
+            'grupos': [{'label': dashboard_derivaciones.ETIQUETAS_GRUPO[g], 'value': g} for g in dashboard_derivaciones.GRUPOS_INTENDENCIA]
+        },
+        'eficiencia': {
+            'anios': [int(a) for a in matriz['anios']],
+            'linea_base': f"{datos_eficiencia['linea_base_global']:.1f}%",
+            'mascaras': mascaras
+        },
+        'encuesta': {
+            'grupos': [
+                {**opcion, 'total_ires': dashboard_encuesta.contar_ires(indice, dashboard_encuesta.mascara_encuestados(indice, opcion['value']))}
+                for opcion in grupos_encuesta
+            ],
+            'preguntas': preguntas
+        }
+    }
+    tareas = (
+        [('derivaciones', (int(anio), grupo)) for anio, grupo in datos_derivaciones['cubo']]
+        + [('eficiencia', mascara) for mascara in mascaras]
+        + [('encuesta', (g, posicion)) for g in range(len(grupos_encuesta)) for posicion in range(len(preguntas))]
+    )
+    return manifiesto, tareas
+
+# =============================================
+# CONSTRUCCIÓN DE CADA ESTADO (EN LOS WORKERS)
+# =============================================
+def _derivaciones(estado):
+    anio, grupo = estado
+    celda = registro_datos.obtener('derivaciones').datos['cubo'][(anio, grupo)]
+    fig_derivaciones, fig_cancelados = dashboard_derivaciones.figuras_celda(celda, anio)
+    return f'derivaciones/{anio}_{grupo}.json', {
+        'derivaciones': fig_derivaciones,
+        'cancelados': fig_cancelados,
+        'estadisticas': [f"{celda['total_deriv']:,.0f}", f"{celda['total_cobro']:,.0f}", f"{celda['prom_eficiencia']:.1f}%"]
+    }
+
+def _eficiencia(mascara):
+    ruta = f'eficiencia/{mascara}.json'
+    try:
+        fig_arriba, fig_abajo, anios_datos_text, num_intendencias_text = dashboard_eficiencia.calcular_resultados(
+            registro_datos.obtener('eficiencia').datos, mascara)
+    except ValueError as e:
+        return ruta, {'error': str(e)}
+    return ruta, {'arriba': fig_arriba, 'abajo': fig_abajo, 'anios_datos': anios_datos_text, 'num_intendencias': num_intendencias_text}
+
+def _encuesta(estado):
+    g, posicion = estado
+    datos_encuesta = registro_datos.obtener('encuesta').datos
+    indice = datos_encuesta['indice_respuestas']
+    col = datos_encuesta['columnas_graficables'][posicion]
+    mascara = dashboard_encuesta.mascara_encuestados(indice, dashboard_encuesta.OPCIONES_GRUPO[g]['value'])
+    return f'encuesta/{g}/{posicion}.json', dashboard_encuesta.crear_grafico_barras_horizontales(
+        *dashboard_encuesta.conteos_pregunta(indice, col, mascara), col)
+
+CONSTRUCTORES = {'derivaciones': _derivaciones, 'eficiencia': _eficiencia, 'encuesta': _encuesta}
+
+def _iniciar_worker(versiones):
+    # Con fork los datos ya vienen cargados del proceso principal; si no, se
+    # cargan aquí (de los sidecars) y tienen que ser la misma versión
+    registro_datos.precargar()
+    if registro_datos.versiones() != versiones:
+        raise RuntimeError("Los datos cambiaron durante la exportación; vuelva a ejecutarla.")
+
+def _exportar_lote(directorio, lote):
+    """Construye y escribe los archivos de un lote de estados. Devuelve (archivos, bytes)."""
+    total = 0
+    for seccion, estado in lote:
+        ruta, contenido = CONSTRUCTORES[seccion](estado)
+        texto = to_json_plotly(contenido).encode('utf-8')
+        with open(os.path.join(directorio, ruta), 'wb') as f:
+            f.write(texto)
+        total += len(texto)
+    return len(lote), total
+
+# =============================================
+# EXPORTACIÓN
+# =============================================
+def _publicar(temporal, destino):
+    # El destino anterior se aparta antes de renombrar: os.replace no reemplaza directorios con contenido
+    anterior = None
+    if os.path.exists(destino):
+        anterior = f"{destino}.{os.getpid()}.anterior"
+        os.rename(destino, anterior)
+    os.rename(temporal, destino)
+    if anterior is not None:
+        shutil.rmtree(anterior, ignore_errors=True)
+
+def exportar(destino, procesos=None, max_subconjuntos=MAX_SUBCONJUNTOS):
+    registro_datos.precargar()
+    manifiesto, tareas = estados(max_subconjuntos)
+
+    destino = os.path.abspath(destino)
+    # Se arma al lado y se publica al final renombrándolo: quien sirve el sitio nunca ve una exportación a medias
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    for subdirectorio in ['derivaciones', 'eficiencia'] + [f'encuesta/{g}' for g in range(len(manifiesto['encuesta']['grupos']))]:
+        os.makedirs(os.path.join(temporal, subdirectorio))
+
+    # Unos 4 lotes por proceso: reparte bien la carga sin un viaje por estado
+    procesos = procesos or os.cpu_count() or 1
+    tamano_lote = max(1, -(-len(tareas) // (4 * procesos)))
+    lotes = [tareas[i:i + tamano_lote] for i in range(0, len(tareas), tamano_lote)]
+
+    inicio = time.perf_counter()
+    archivos = bytes_totales = 0
+    try:
+        with ProcessPoolExecutor(procesos, initializer=_iniciar_worker, initargs=(manifiesto['versiones'],)) as pool:
+            for n_archivos, n_bytes in pool.map(_exportar_lote, itertools.repeat(temporal), lotes):
+                archivos += n_archivos
+                bytes_totales += n_bytes
+
+        with open(os.path.join(temporal, 'manifiesto.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, ensure_ascii=False)
+        with open(os.path.join(temporal, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+        shutil.copytree(DIRECTORIO_PLANTILLA, temporal, dirs_exist_ok=True)
+        _publicar(temporal, destino)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    return {
+        'destino': destino,
+        'archivos': archivos,
+        'bytes': bytes_totales,
+        'procesos': procesos,
+        'segundos': round(time.perf_counter() - inicio, 2),
+        'por_seccion': {seccion: sum(1 for s, _ in tareas if s == seccion) for seccion in CONSTRUCTORES}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta cada estado de los tableros como un sitio estático de solo lectura.')
+    parser.add_argument('--destino', default=os.path.join(script_dir, 'sitio_estatico'), help='directorio del sitio (se reemplaza entero)')
+    parser.add_argument('--procesos', type=int, default=None, help='procesos del pool (por defecto, uno por CPU)')
+    parser.add_argument('--max-subconjuntos', type=int, default=MAX_SUBCONJUNTOS,
+                        help='máximo de subconjuntos de años de eficiencia que se exportan')
+    args = parser.parse_args()
+
+    resumen = exportar(args.destino, args.procesos, args.max_subconjuntos)
+    print(f"{resumen['archivos']} estados ({resumen['bytes'] / 1e6:.1f} MB) en {resumen['segundos']} s "
+          f"con {resumen['procesos']} procesos -> {resumen['destino']}", file=sys.stderr)
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
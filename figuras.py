@@ -0,0 +1,78 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+import base64
+
+import numpy as np
+
+# =============================================
+# SERIALIZACIÓN COMPACTA DE FIGURAS
+# =============================================
+# Las figuras viajan al navegador como JSON en cada callback. Estas funciones
+# las achican sin cambiar lo que se ve: arreglos numéricos como binario en
+# base64 (el formato {dtype, bdata, shape} que entiende plotly.js), valores
+# redondeados a la precisión con la que se muestran y una plantilla de
+# estilos reducida a los tipos de traza que usa cada figura.
+
+# Tipos de NumPy que plotly.js sabe leer como arreglo tipado
+TIPOS_PLOTLYJS = {
+    'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+    'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'
+}
+
+def arreglo_binario(valores):
+    """Arreglo NumPy (1D o 2D) como {dtype, bdata[, shape]} para plotly.js."""
+    valores = np.ascontiguousarray(valores)
+    arreglo = {
+        'dtype': TIPOS_PLOTLYJS[str(valores.dtype)],
+        'bdata': base64.b64encode(valores).decode('ascii')
+    }
+    if valores.ndim > 1:
+        arreglo['shape'] = ', '.join(str(n) for n in valores.shape)
+    return arreglo
+
+def redondear_para_mostrar(valores, decimales=1):
+    """
+    Redondea como f'{x:.1f}' en Python (el valor binario exacto, las mitades
+    exactas al par), que es como se formateaban las etiquetas antes de pasar
+    a texttemplate. Enviado en float32, el "%{z:.1f}" del navegador muestra
+    el mismo texto.
+    """
+    valores = np.asarray(valores, dtype=float)
+    escala = 10.0 ** decimales
+    escalados = np.abs(valores) * escala
+    piso = np.floor(escalados)
+    redondeados = piso + (escalados - piso > 0.5)
+
+    # Las mitades, y los casos en que el producto por 10^d puede cruzarlas
+    # por error de redondeo, se deciden con el valor binario exacto
+    for i in np.flatnonzero(np.abs(escalados - piso - 0.5) <= 4 * np.spacing(escalados)):
+        exacto = abs(Decimal(float(valores.flat[i]))).scaleb(decimales)
+        redondeados.flat[i] = float(exacto.to_integral_value(rounding=ROUND_HALF_EVEN))
+
+    return (np.copysign(redondeados, valores) / escala).astype(np.float32)
+
+# Trazas que solo usan ejes cartesianos, y estilos de la plantilla que solo
+# afectan a subplots de otro tipo (polares, 3D, mapas...)
+TRAZAS_CARTESIANAS = {'scatter', 'scattergl', 'bar', 'heatmap', 'histogram', 'box', 'violin', 'contour'}
+SUBPLOTS_NO_CARTESIANOS = {'polar', 'ternary', 'scene', 'geo', 'mapbox', 'map', 'smith'}
+
+def plantilla_reducida(plantilla, tipos):
+    """
+    Copia de la plantilla con solo los estilos de los tipos de traza dados:
+    la plantilla por defecto trae estilos para decenas de tipos y subplots
+    (unos 8 KB que se repetían en cada figura).
+    """
+    layout = plantilla.get('layout', {})
+    if tipos <= TRAZAS_CARTESIANAS:
+        layout = {clave: valor for clave, valor in layout.items() if clave not in SUBPLOTS_NO_CARTESIANOS}
+    return {
+        'data': {tipo: estilo for tipo, estilo in plantilla.get('data', {}).items() if tipo in tipos},
+        'layout': dict(layout)
+    }
+
+def podar_plantilla(figura):
+    """Reduce layout.template a los tipos de traza de la figura. Modifica y devuelve el mismo dict."""
+    layout = figura.get('layout', {})
+    if layout.get('template'):
+        tipos = {traza.get('type', 'scatter') for traza in figura.get('data', [])}
+        layout['template'] = plantilla_reducida(layout['template'], tipos)
+    return figura
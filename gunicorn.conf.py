@@ -0,0 +1,20 @@
+# =============================================
+# CONFIGURACIÓN DE GUNICORN
+# =============================================
+# gunicorn lee este archivo solo desde el directorio de trabajo, así que el
+# Procfile no cambia. Los datos de cada fuente se leen de sidecars mapeados
+# en memoria (ver datos.py): los workers comparten esas páginas aunque cada
+# uno cargue por su cuenta.
+#
+# Con GUNICORN_PRELOAD=1 la aplicación (y, con PRECARGAR_DATOS, los datos)
+# se carga una sola vez en el maestro antes de crear los workers.
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD') == '1'
+
+def post_fork(server, worker):
+    # El vigilante de archivos es un hilo y no sobrevive al fork: con
+    # preload_app quedó en el maestro y cada worker arranca el suyo
+    if server.cfg.preload_app:
+        import registro_datos
+        registro_datos.iniciar_vigilancia()
@@ -0,0 +1,154 @@
+from bisect import bisect_left
+from functools import wraps
+import os
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+
+# =============================================
+# MÉTRICAS POR CALLBACK (FORMATO PROMETHEUS)
+# =============================================
+# instrumentar(app) envuelve cada callback de servidor ya registrado y anota
+# su latencia, llamadas, errores y tamaño de la respuesta JSON. El costo por
+# llamada es un par de perf_counter, una búsqueda binaria y un lock propio de
+# cada callback, de modo que puede quedar activo en producción.
+# Con METRICAS=0 no se instrumenta nada.
+ACTIVO = os.environ.get('METRICAS', '1').strip() != '0'
+
+# Límites superiores de cada cubeta (segundos y bytes); +Inf va aparte
+CUBETAS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CUBETAS_TAMANO = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+_metricas = {}
+
+def tamano_bytes(respuesta):
+    # Dash devuelve la respuesta ya serializada; si es ASCII (lo habitual) no hace falta codificarla
+    if isinstance(respuesta, bytes):
+        return len(respuesta)
+    if isinstance(respuesta, str):
+        return len(respuesta) if respuesta.isascii() else len(respuesta.encode('utf-8'))
+    return 0
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        # Una posición por cubeta más la de +Inf; se acumulan solo al exponer
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+    def lineas(self, nombre, etiquetas):
+        acumulado = 0
+        for limite, n in zip(self.limites + (float('inf'),), self.cubetas):
+            acumulado += n
+            le = '+Inf' if limite == float('inf') else repr(limite)
+            yield f'{nombre}_bucket{{{etiquetas},le="{le}"}} {acumulado}'
+        yield f'{nombre}_sum{{{etiquetas}}} {self.suma}'
+        yield f'{nombre}_count{{{etiquetas}}} {self.cuenta}'
+
+class MetricasCallback:
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.latencia = Histograma(CUBETAS_LATENCIA)
+        self.tamano = Histograma(CUBETAS_TAMANO)
+        self.llamadas = 0
+        self.errores = 0
+        self.sin_cambios = 0
+        self._lock = threading.Lock()
+
+    def anotar(self, segundos, respuesta=None, error=False, sin_cambios=False):
+        with self._lock:
+            self.llamadas += 1
+            self.latencia.observar(segundos)
+            if error:
+                self.errores += 1
+            elif sin_cambios:
+                self.sin_cambios += 1
+            elif respuesta is not None:
+                self.tamano.observar(tamano_bytes(respuesta))
+
+    def copia(self):
+        with self._lock:
+            copia = MetricasCallback(self.nombre)
+            copia.llamadas, copia.errores, copia.sin_cambios = self.llamadas, self.errores, self.sin_cambios
+            for origen, destino in ((self.latencia, copia.latencia), (self.tamano, copia.tamano)):
+                destino.cubetas = list(origen.cubetas)
+                destino.suma, destino.cuenta = origen.suma, origen.cuenta
+            return copia
+
+def _envolver(funcion, metricas):
+    @wraps(funcion)
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            respuesta = funcion(*args, **kwargs)
+        except PreventUpdate:
+            metricas.anotar(time.perf_counter() - inicio, sin_cambios=True)
+            raise
+        except Exception:
+            metricas.anotar(time.perf_counter() - inicio, error=True)
+            raise
+        metricas.anotar(time.perf_counter() - inicio, respuesta=respuesta)
+        return respuesta
+    medida._metricas = metricas
+    return medida
+
+def instrumentar(app):
+    """
+    Envuelve los callbacks de servidor de app (los clientside no pasan por
+    Flask). Debe llamarse después de registrar todos los callbacks; llamarlo
+    de nuevo solo envuelve los que aún no lo estén.
+    """
+    if not ACTIVO:
+        return 0
+    envueltos = 0
+    for entrada in app.callback_map.values():
+        funcion = entrada.get('callback')
+        if funcion is None or hasattr(funcion, '_metricas'):
+            continue
+        nombre = getattr(funcion, '__name__', 'desconocido')
+        metricas = _metricas.setdefault(nombre, MetricasCallback(nombre))
+        entrada['callback'] = _envolver(funcion, metricas)
+        envueltos += 1
+    return envueltos
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def exponer():
+    """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+    copias = [m.copia() for m in list(_metricas.values())]
+    lineas = [
+        '# HELP dash_callback_llamadas_total Llamadas a cada callback de servidor.',
+        '# TYPE dash_callback_llamadas_total counter'
+    ]
+    lineas += [f'dash_callback_llamadas_total{{callback="{_escapar(m.nombre)}"}} {m.llamadas}' for m in copias]
+    lineas += [
+        '# HELP dash_callback_errores_total Llamadas que terminaron en excepción.',
+        '# TYPE dash_callback_errores_total counter'
+    ]
+    lineas += [f'dash_callback_errores_total{{callback="{_escapar(m.nombre)}"}} {m.errores}' for m in copias]
+    lineas += [
+        '# HELP dash_callback_sin_cambios_total Llamadas que terminaron con PreventUpdate.',
+        '# TYPE dash_callback_sin_cambios_total counter'
+    ]
+    lineas += [f'dash_callback_sin_cambios_total{{callback="{_escapar(m.nombre)}"}} {m.sin_cambios}' for m in copias]
+    lineas += [
+        '# HELP dash_callback_latencia_segundos Tiempo de cada callback, incluida la serialización.',
+        '# TYPE dash_callback_latencia_segundos histogram'
+    ]
+    for m in copias:
+        lineas += m.latencia.lineas('dash_callback_latencia_segundos', f'callback="{_escapar(m.nombre)}"')
+    lineas += [
+        '# HELP dash_callback_respuesta_bytes Tamaño de la respuesta JSON de cada callback.',
+        '# TYPE dash_callback_respuesta_bytes histogram'
+    ]
+    for m in copias:
+        lineas += m.tamano.lineas('dash_callback_respuesta_bytes', f'callback="{_escapar(m.nombre)}"')
+    return '\n'.join(lineas) + '\n'
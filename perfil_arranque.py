@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+import json
+import os
+import sys
+import time
+
+# =============================================
+# PERFIL DE ARRANQUE
+# =============================================
+# Con PERFIL_ARRANQUE=<ruta.json> app_principal mide cada fase del arranque
+# (imports, carga de datos de cada dashboard, registro de callbacks, primer
+# render) y escribe el reporte en esa ruta. Sin la variable no se mide nada.
+RUTA_REPORTE = os.environ.get('PERFIL_ARRANQUE', '').strip()
+ACTIVO = bool(RUTA_REPORTE)
+
+_t0 = time.perf_counter()
+_fases = []
+
+@contextmanager
+def fase(nombre):
+    if not ACTIVO:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fin = time.perf_counter()
+        _fases.append({
+            'fase': nombre,
+            'inicio_s': round(inicio - _t0, 6),
+            'duracion_s': round(fin - inicio, 6)
+        })
+
+def reporte():
+    return {
+        'pid': os.getpid(),
+        'python': sys.version.split()[0],
+        'total_s': round(time.perf_counter() - _t0, 6),
+        'fases': list(_fases)
+    }
+
+def escribir_reporte(ruta=None):
+    ruta = ruta or RUTA_REPORTE
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(reporte(), f, ensure_ascii=False, indent=2)
+    print(f"Perfil de arranque escrito en {ruta}")
+    return ruta
@@ -0,0 +1,162 @@
+from types import MappingProxyType
+from typing import NamedTuple
+import hashlib
+import os
+import threading
+import time
+
+import datos
+
+# =============================================
+# REGISTRO DE VERSIONES DE DATOS
+# =============================================
+# Cada dashboard registra aquí sus archivos fuente y la función que construye
+# sus datos derivados. Los callbacks piden siempre la instantánea vigente con
+# obtener(), de modo que un vigilante en segundo plano puede recargar los
+# archivos cuando cambian y sustituir la instantánea sin reiniciar gunicorn.
+# La primera carga es perezosa: ocurre cuando alguien pide la fuente (p. ej.
+# al abrir su pestaña) o cuando se precarga explícitamente con precargar().
+INTERVALO_VIGILANCIA = float(os.environ.get('RECARGA_INTERVALO', '30'))
+
+class Instantanea(NamedTuple):
+    version: str
+    datos: MappingProxyType
+
+_fuentes = {}
+_lock_registro = threading.Lock()
+_vigilante = None
+
+def _firmas(rutas):
+    # Con la ruta: que aparezca o desaparezca un archivo de un directorio también es un cambio
+    return [(r, datos.firma_archivo(r)) for r in rutas]
+
+def _version(rutas):
+    h = hashlib.blake2b(digest_size=16)
+    for ruta in rutas:
+        h.update(datos.hash_vigente(ruta).encode())
+    return h.hexdigest()
+
+def registrar(nombre, rutas, cargar, vacio):
+    """
+    Registra una fuente sin cargarla todavía. cargar(rutas) devuelve un dict
+    con los datos ya procesados; si falla en la primera carga se usa vacio y
+    el vigilante vuelve a intentarlo cuando cambien los archivos. rutas puede
+    incluir directorios o globs: se expanden en cada revisión (ver
+    datos.expandir_rutas) y cargar recibe los archivos que haya en ese momento.
+    """
+    fuente = {
+        'rutas': list(rutas),
+        'cargar': cargar,
+        'firmas': None,
+        'cargada': False,
+        'instantanea': Instantanea(None, MappingProxyType(dict(vacio))),
+        'al_cambiar': [],
+        'lock': threading.RLock()
+    }
+    with _lock_registro:
+        _fuentes[nombre] = fuente
+
+def obtener(nombre):
+    """Instantánea vigente de la fuente; la primera llamada la carga (una sola vez entre hilos)."""
+    fuente = _fuentes[nombre]
+    if not fuente['cargada']:
+        with fuente['lock']:
+            if not fuente['cargada']:
+                try:
+                    _recargar(nombre, fuente)
+                except Exception as e:
+                    print(f"Error al cargar datos de '{nombre}': {e}")
+                fuente['cargada'] = True
+    return fuente['instantanea']
+
+def precargar(nombres=None):
+    """Carga ya las fuentes indicadas (todas si nombres es None), p. ej. al arrancar un worker."""
+    for nombre in (list(_fuentes) if nombres is None else nombres):
+        obtener(nombre)
+
+def al_cambiar(nombre, funcion):
+    """Registra una función que se llama tras cada cambio de versión (p. ej. vaciar cachés)."""
+    _fuentes[nombre]['al_cambiar'].append(funcion)
+
+def versiones():
+    # Las fuentes aún no cargadas aparecen con versión None
+    return {nombre: fuente['instantanea'].version for nombre, fuente in _fuentes.items()}
+
+def _recargar(nombre, fuente):
+    with fuente['lock']:
+        rutas = datos.expandir_rutas(fuente['rutas'])
+        firmas = _firmas(rutas)
+        if firmas == fuente['firmas']:
+            return False
+        version = _version(rutas)
+        if version == fuente['instantanea'].version:
+            # Solo cambió la fecha del archivo, no su contenido
+            fuente['firmas'] = firmas
+            return False
+
+        # Las firmas se anotan antes de cargar: si el archivo es inválido no se
+        # reintenta en cada vuelta, sino cuando vuelva a cambiar
+        fuente['firmas'] = firmas
+        nuevos = fuente['cargar'](rutas)
+        fuente['instantanea'] = Instantanea(version, MappingProxyType(dict(nuevos)))
+
+    for funcion in fuente['al_cambiar']:
+        funcion()
+    return True
+
+def revisar():
+    """Recarga las fuentes cuyos archivos cambiaron. Devuelve los nombres recargados."""
+    recargadas = []
+    with _lock_registro:
+        fuentes = list(_fuentes.items())
+    for nombre, fuente in fuentes:
+        if not fuente['cargada']:
+            # Nadie la ha pedido aún: se cargará fresca cuando se pida
+            continue
+        try:
+            if _recargar(nombre, fuente):
+                recargadas.append(nombre)
+                print(f"Datos de '{nombre}' recargados (versión {fuente['instantanea'].version})")
+        except Exception as e:
+            # Se mantiene la instantánea anterior; se reintenta en la próxima vuelta
+            print(f"Error al recargar datos de '{nombre}': {e}")
+    return recargadas
+
+def _vigilar(intervalo):
+    while True:
+        time.sleep(intervalo)
+        revisar()
+
+def iniciar_vigilancia(intervalo=None):
+    """Arranca (una sola vez por proceso) el hilo que vigila los archivos fuente."""
+    global _vigilante
+    intervalo = INTERVALO_VIGILANCIA if intervalo is None else intervalo
+    if intervalo <= 0:
+        return None
+    with _lock_registro:
+        if _vigilante is None or not _vigilante.is_alive():
+            _vigilante = threading.Thread(target=_vigilar, args=(intervalo,), name='vigilante-datos', daemon=True)
+            _vigilante.start()
+    return _vigilante
+
+# =============================================
+# FORK DE WORKERS (GUNICORN --preload)
+# =============================================
+# Con preload_app la aplicación se importa en el maestro y los workers nacen
+# por fork. Un lock que otro hilo (la precarga o el vigilante a mitad de una
+# recarga) tuviera tomado en ese instante quedaría tomado para siempre en el
+# worker, así que el fork espera a que se suelten. Los hilos no pasan al
+# worker: el vigilante se vuelve a arrancar en post_fork (gunicorn.conf.py).
+def _antes_de_fork():
+    _lock_registro.acquire()
+    for fuente in _fuentes.values():
+        fuente['lock'].acquire()
+
+def _despues_de_fork():
+    for fuente in _fuentes.values():
+        fuente['lock'].release()
+    _lock_registro.release()
+
+# (os.register_at_fork no existe en Windows, donde tampoco hay fork)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_antes_de_fork, after_in_parent=_despues_de_fork, after_in_child=_despues_de_fork)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos de la aplicación están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('RECARGA_INTERVALO', '0')
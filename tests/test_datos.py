@@ -0,0 +1,25 @@
+import datos
+
+CSV_CON_RECHAZOS = (
+    "INTENDENCIA;ANIO;NUMERADOR;DENOMINADOR;EFICIENCIA\n"
+    "LIMA;2021;10;20;0,5\n"
+    "LIMA;2022;;20;0,5\n"
+    "CUSCO;2021;abc;20;0,5\n"
+    "CUSCO;2022;5;10;0,5\n"
+    ";2022;5;10;0,5\n"
+    "PIURA;2021;x1;10;0,5\n"
+)
+
+def _motivos(ruta_csv, filas_por_bloque):
+    reporte = datos.reporte_vacio(str(ruta_csv))
+    for _ in datos.bloques_eficiencia(str(ruta_csv), reporte, filas_por_bloque, texto=str):
+        pass
+    return reporte['motivos']
+
+def test_motivos_no_dependen_del_tamano_de_bloque(tmp_path):
+    ruta_csv = tmp_path / 'eficiencia.csv'
+    ruta_csv.write_text(CSV_CON_RECHAZOS, encoding='latin1')
+    esperados = {'NUMERADOR vacío': 1, 'NUMERADOR no numérico': 2, 'INTENDENCIA vacío': 1}
+    assert _motivos(ruta_csv, None) == esperados
+    for filas_por_bloque in (1, 2, 3):
+        assert _motivos(ruta_csv, filas_por_bloque) == esperados
@@ -0,0 +1,29 @@
+import app_principal
+import dashboard_tendencias
+import registro_datos
+
+def _peticion(anio, metrica):
+    salidas = [('grafico-ranking-tendencias', 'figure'), ('tabla-tendencias', 'data'),
+               ('tabla-tendencias', 'sort_by'), ('stats-panel-tendencias', 'children')]
+    return {
+        'output': '..' + '...'.join(f'{i}.{p}' for i, p in salidas) + '..',
+        'outputs': [{'id': i, 'property': p} for i, p in salidas],
+        'inputs': [{'id': 'dropdown-anio-tendencias', 'property': 'value', 'value': anio},
+                   {'id': 'dropdown-metrica-tendencias', 'property': 'value', 'value': metrica}],
+        'changedPropIds': ['dropdown-metrica-tendencias.value'],
+        'state': []
+    }
+
+def test_metrica_desconocida_devuelve_figura_vacia():
+    cliente = app_principal.server.test_client()
+    anio = registro_datos.obtener('tendencias').datos['anio_inicial']
+
+    respuesta = cliente.post('/_dash-update-component', json=_peticion(anio, 'no_existe'))
+    assert respuesta.status_code == 200
+    salida = respuesta.get_json()['response']
+    assert salida['grafico-ranking-tendencias']['figure']['data'] == []
+    assert salida['tabla-tendencias']['data'] == []
+
+    respuesta = cliente.post('/_dash-update-component', json=_peticion(anio, dashboard_tendencias.METRICA_INICIAL))
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['response']['tabla-tendencias']['data']